@@ -0,0 +1,130 @@
+# benchmark_compression.py
+import os
+import sys
+import tkinter as tk
+from tkinter import filedialog
+import subprocess
+import time
+
+from config import MseqConfig
+from compression_policy import CompressionPolicy
+from logger import setup_logger
+from parallel_zip_writer import get_compressor
+
+# Check for 32-bit Python requirement - zips are written by the 32-bit interpreter
+if sys.maxsize > 2**32:
+    py32_path = MseqConfig.PYTHON32_PATH
+    if os.path.exists(py32_path) and py32_path != sys.executable:
+        script_path = os.path.abspath(__file__)
+        subprocess.run([py32_path, script_path] + sys.argv[1:])
+        sys.exit(0)
+    else:
+        print("32-bit Python not specified or same as current interpreter")
+        print("Continuing with current Python interpreter")
+
+# (method, level) pairs tried per method
+CANDIDATES = {
+    'stored': [('stored', None)],
+    'deflate': [('deflate', level) for level in range(1, 10)],
+    'bzip2': [('bzip2', 9)],
+    'lzma': [('lzma', None)],
+}
+
+def get_folder_from_user():
+    """Get folder selection from user"""
+    print("Opening folder selection dialog...")
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(
+        title="Select a sample day folder to benchmark compression on",
+        mustexist=True
+    )
+    root.destroy()
+
+    if folder_path:
+        print(f"Selected folder: {folder_path}")
+        return folder_path
+    else:
+        print("No folder selected")
+        return None
+
+def get_extensions(config):
+    """Extensions the policy has rules for, longest first so '.raw.seq.txt' beats '.seq.txt'"""
+    extensions = ['.ab1', config.FSA_EXTENSION] + list(config.TEXT_FILES)
+    return sorted(extensions, key=len, reverse=True)
+
+def collect_samples(data_folder, extensions, per_extension):
+    """Read up to per_extension files of every extension under a folder into memory"""
+    samples = {extension: [] for extension in extensions}
+    for root, _, files in os.walk(data_folder):
+        for name in files:
+            extension = next((e for e in extensions if name.lower().endswith(e)), None)
+            if extension is None or len(samples[extension]) >= per_extension:
+                continue
+            with open(os.path.join(root, name), 'rb') as f:
+                samples[extension].append(f.read())
+    return samples
+
+def measure(data_list, method, level):
+    """Compress the samples, returns (ratio, MB per second)"""
+    bytes_in = sum(len(data) for data in data_list)
+    bytes_out = 0
+    start = time.perf_counter()
+    for data in data_list:
+        compressor = get_compressor(method, level)
+        if compressor is None:
+            bytes_out += len(data)
+        else:
+            bytes_out += len(compressor.compress(data)) + len(compressor.flush())
+    seconds = time.perf_counter() - start
+    megabytes_per_second = bytes_in / (1024 * 1024) / seconds if seconds > 0 else float('inf')
+    return bytes_out / bytes_in, megabytes_per_second
+
+def seconds_per_megabyte(ratio, megabytes_per_second, link_megabytes_per_second):
+    """Time to compress one MB and write the result to the share"""
+    return 1 / megabytes_per_second + ratio / link_megabytes_per_second
+
+def main():
+    # Setup logger
+    logger = setup_logger("benchmark_compression")
+    logger.info("Starting compression benchmark...")
+    config = MseqConfig()
+
+    # Sample folder from the command line, e.g. Win11Test, or a dialog
+    data_folder = sys.argv[1] if len(sys.argv) > 1 else get_folder_from_user()
+    if not data_folder:
+        logger.error("No folder selected, exiting")
+        print("No folder selected, exiting")
+        return
+
+    logger.info(f"Using folder: {data_folder}")
+    samples = collect_samples(data_folder, get_extensions(config), config.BENCHMARK_SAMPLE_FILES)
+
+    candidates = [candidate for method in config.COMPRESSION_ALLOWED_METHODS for candidate in CANDIDATES[method]]
+    rules = {}
+    for extension, data_list in samples.items():
+        if not data_list or not sum(len(data) for data in data_list):
+            logger.info(f"{extension}: no sample files, keeping the current rule")
+            continue
+
+        best = None
+        for method, level in candidates:
+            ratio, speed = measure(data_list, method, level)
+            cost = seconds_per_megabyte(ratio, speed, config.BENCHMARK_LINK_MB_PER_SECOND)
+            label = method if level is None else f"{method} {level}"
+            logger.info(f"{extension}: {label:<10} ratio {ratio:.3f}, {speed:8.1f} MB/s, {cost * 1000:.1f} ms/MB")
+            if best is None or cost < best[0]:
+                best = (cost, method, level)
+
+        rules[extension] = (best[1], best[2])
+        logger.info(f"{extension}: chose {best[1]}" + (f" {best[2]}" if best[2] is not None else ""))
+
+    # Keep rules of extensions without samples this time
+    policy = CompressionPolicy.load(config.COMPRESSION_POLICY_PATH, config.COMPRESSION_POLICY)
+    policy = CompressionPolicy(dict(policy.rules, **rules))
+    policy.save(config.COMPRESSION_POLICY_PATH)
+    logger.info(f"Compression policy written to {config.COMPRESSION_POLICY_PATH}")
+    print("All done!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmark_excel_writer.py
+import os
+import sys
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from openpyxl import Workbook
+from openpyxl.styles import PatternFill
+
+from config import MseqConfig
+from excel_dao import ExcelDAO
+from logger import setup_logger
+from validation_report import SUMMARY_HEADERS, validation_rows
+from zip_validator import OrderValidation
+
+# Check for 32-bit Python requirement - the summary is written by the 32-bit interpreter
+if sys.maxsize > 2**32:
+    py32_path = MseqConfig.PYTHON32_PATH
+    if os.path.exists(py32_path) and py32_path != sys.executable:
+        script_path = os.path.abspath(__file__)
+        subprocess.run([py32_path, script_path] + sys.argv[1:])
+        sys.exit(0)
+    else:
+        print("32-bit Python not specified or same as current interpreter")
+        print("Continuing with current Python interpreter")
+
+SAMPLES_PER_ORDER = 24
+
+def make_validations(config, order_count):
+    """Synthetic validated orders, every fourth one needing attention"""
+    validations = []
+    for order in range(order_count):
+        order_number = str(100000 + order)
+        matches = [{'raw_name': f"Sample_{order}_{sample}", 'file_name': f"Sample_{order}_{sample}.ab1"}
+                   for sample in range(SAMPLES_PER_ORDER)]
+        completed = order % 4 != 0
+        result = {
+            'matches': matches if completed else matches[1:],
+            'mismatches_in_zip': [] if completed else [f"Unknown_{order}.ab1"],
+            'mismatches_in_order': [] if completed else [{'raw_name': f"Sample_{order}_0"}],
+            'txt_files': list(config.TEXT_FILES),
+        }
+        validations.append(OrderValidation(
+            'order folder', f"BioI-{20000 + order // 50}_Acct_{order_number}.zip", f"BioI-{20000 + order // 50}",
+            order_number, time.time(), 'Completed' if completed else 'ATTENTION', result, None))
+    return validations
+
+def write_in_memory(path, config, validations):
+    """The summary written through openpyxl's full in-memory model, cell by cell"""
+    fills = {name: PatternFill(start_color=rgb, end_color=rgb, fill_type='solid')
+             for name, rgb in config.EXCEL_STYLES.items()}
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.append(SUMMARY_HEADERS)
+    row = 1
+    for validation in validations:
+        for values, styles, hidden in validation_rows(validation, config):
+            row += 1
+            for column, value in enumerate(values, 1):
+                if value is not None:
+                    worksheet.cell(row=row, column=column, value=value)
+            for letter, style in styles.items():
+                worksheet[f'{letter}{row}'].fill = fills[style]
+            if hidden:
+                worksheet.row_dimensions[row].hidden = True
+    for column in worksheet.columns:
+        length = max(len(str(cell.value)) for cell in column if cell.value is not None)
+        worksheet.column_dimensions[column[0].column_letter].width = length + 2
+    workbook.save(path)
+
+def write_streaming(path, excel_dao, config, validations):
+    """The summary written through the ExcelDAO's streaming sheet writer"""
+    with excel_dao.open_sheet_writer(path) as writer:
+        writer.append(SUMMARY_HEADERS)
+        for validation in validations:
+            for values, styles, hidden in validation_rows(validation, config):
+                writer.append(values, styles, hidden)
+
+def measure(write, *args):
+    """(seconds, peak MB) of a write"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    write(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / (1024 * 1024)
+
+def main():
+    # Setup logger
+    logger = setup_logger("benchmark_excel_writer")
+    logger.info("Starting summary writer benchmark...")
+    config = MseqConfig()
+    excel_dao = ExcelDAO(config)
+
+    # Order counts from the command line, e.g. 100 1000 5000
+    order_counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000]
+    with tempfile.TemporaryDirectory() as temp_folder:
+        for order_count in order_counts:
+            validations = make_validations(config, order_count)
+            for name, write, args in [
+                ('in-memory', write_in_memory, (config, validations)),
+                ('streaming', write_streaming, (excel_dao, config, validations)),
+            ]:
+                path = os.path.join(temp_folder, f"{name} {order_count}.xlsx")
+                seconds, peak = measure(write, path, *args)
+                logger.info(f"{order_count} orders, {name}: {seconds:.2f}s, peak {peak:.1f} MB, "
+                            f"{os.path.getsize(path) / 1024:.0f} KB")
+    print("All done!")
+
+if __name__ == "__main__":
+    main()
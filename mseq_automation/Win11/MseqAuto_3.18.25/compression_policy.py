@@ -0,0 +1,99 @@
+# compression_policy.py
+import json
+import os
+from zipfile import ZIP_BZIP2, ZIP_DEFLATED, ZIP_LZMA, ZIP_STORED
+
+METHODS = {
+    'stored': ZIP_STORED,
+    'deflate': ZIP_DEFLATED,
+    'bzip2': ZIP_BZIP2,
+    'lzma': ZIP_LZMA,
+}
+# Levels each method accepts besides None, zipfile ignores a level for stored and lzma
+LEVELS = {
+    'stored': range(0),
+    'deflate': range(-1, 10),
+    'bzip2': range(1, 10),
+    'lzma': range(0),
+}
+
+
+def check_rule(method, level):
+    """Why a (method, level) rule can't be used, None if it can"""
+    if method not in METHODS:
+        return f"unknown compression method {method!r}"
+    if level is not None and (not isinstance(level, int) or isinstance(level, bool) or level not in LEVELS[method]):
+        return f"level {level!r} is out of range for {method}"
+    return None
+
+
+class CompressionPolicy:
+    """Zip compression method and level per file extension
+
+    Rules map an extension ('.ab1', '.seq.info.txt') to a (method, level)
+    pair, method being one of METHODS and level None for the method's
+    default. The longest matching extension wins, files matching no rule
+    get the default rule, deflate at its default level like before.
+    """
+    DEFAULT_RULE = ('deflate', None)
+
+    def __init__(self, rules=None, default=None):
+        self.rules = {}
+        for extension, (method, level) in (rules or {}).items():
+            problem = check_rule(method, level)
+            if problem:
+                raise ValueError(f"Bad compression rule for {extension}: {problem}")
+            self.rules[extension.lower()] = (method, level)
+        self.default = tuple(default) if default else self.DEFAULT_RULE
+        # Longest first, so '.raw.seq.txt' is matched before '.seq.txt'
+        self.extensions = sorted(self.rules, key=len, reverse=True)
+
+    @classmethod
+    def load(cls, path, defaults=None):
+        """Policy saved by the compression benchmark, on top of the configured defaults
+
+        A rule that isn't a known method with a level in its range is
+        skipped with a message, the file's other rules still apply.
+        """
+        rules = dict(defaults or {})
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    saved_rules = json.load(f)
+                if not isinstance(saved_rules, dict):
+                    raise ValueError("not a mapping of extensions to rules")
+                rules.update(saved_rules)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable compression policy {path}: {e}")
+
+        valid_rules = {}
+        for extension, rule in rules.items():
+            if not isinstance(rule, (list, tuple)) or len(rule) != 2:
+                problem = "not a (method, level) pair"
+            else:
+                problem = check_rule(*rule)
+            if problem:
+                print(f"Skipping compression rule for {extension}: {problem}")
+                continue
+            valid_rules[extension] = tuple(rule)
+        return cls(valid_rules)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.rules, f, indent=2)
+        os.replace(temp_path, path)
+
+    def rule_for(self, file_name):
+        """(method, level) for a file"""
+        name = file_name.lower()
+        for extension in self.extensions:
+            if name.endswith(extension):
+                return self.rules[extension]
+        return self.default
+
+    def zip_args(self, file_name):
+        """(compress_type, compresslevel) to pass to ZipFile.write for a file"""
+        method, level = self.rule_for(file_name)
+        return METHODS[method], level
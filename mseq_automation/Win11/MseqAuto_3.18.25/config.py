@@ -73,6 +73,8 @@ class MseqConfig:
         '.seq.qual.txt',
         '.seq.txt'
     ]
+    ZIP_EXTENSION = '.zip'
+    FSA_EXTENSION = '.fsa'
     
     # Excel validation styling
     EXCEL_STYLES = {
@@ -89,6 +91,60 @@ class MseqConfig:
     KEY_FILE_PATH = r"P:\order_key.txt"
     BATCH_FILE_PATH = r"P:\generate-data-sorting-key-file.bat"
     REINJECT_FOLDER = r"P:\Data\Reinjects"
+    SPREADSHEETS_PATH = r"G:\Lab\Spreadsheets"
+    ABI_UPLOADED_PATH = r"G:\Lab\Spreadsheets\Individual Uploaded to ABI"
+    
+    # Local cache of parsed plate spreadsheets (kept off the network share)
+    SPREADSHEET_CACHE_PATH = os.path.join(
+        os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'MseqAuto', 'spreadsheet_cache.json'
+    )
+    
+    # Per-operation timings of previous runs, used to estimate dry runs
+    TIMINGS_PATH = os.path.join(
+        os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'MseqAuto', 'operation_timings.json'
+    )
+    # Dry-run plans go next to the timings, not wherever the script was started from
+    DRY_RUN_FOLDER = os.path.join(
+        os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'MseqAuto', 'dry_runs'
+    )
+    
+    # Journal of planned and completed moves, kept in the day folder being sorted
+    SORT_JOURNAL_NAME = "sort_journal.jsonl"
+    SORT_JOURNAL_SYNC_BATCH = 32
+    
+    # Folder listings kept in memory by FileSystemDAO. Changes made through the DAO
+    # update them directly, a listing is checked against the share at most once per TTL
+    DIRECTORY_CACHE_SIZE = 512
+    DIRECTORY_CACHE_TTL = 10  # seconds
+    
+    # Worker threads used to move sorted files, one destination folder per worker
+    MOVE_WORKERS = 8
+    
+    # Worker processes writing zip archives in parallel (1 zips in the calling process)
+    ZIP_WORKERS = 4
+    
+    # Zip compression per extension: (method, level) with method 'stored',
+    # 'deflate', 'bzip2' or 'lzma' and level None for the method's default.
+    # Extensions without a rule are deflated at the default level. The
+    # compression benchmark saves its choice to COMPRESSION_POLICY_PATH,
+    # which overrides these rules.
+    COMPRESSION_POLICY = {}
+    COMPRESSION_POLICY_PATH = os.path.join(
+        os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'MseqAuto', 'compression_policy.json'
+    )
+    # Methods the benchmark may choose from - Windows Explorer only opens stored and deflated members
+    COMPRESSION_ALLOWED_METHODS = ('stored', 'deflate')
+    # Write speed to the share assumed by the benchmark, to weigh compression time against bytes written
+    BENCHMARK_LINK_MB_PER_SECOND = 40
+    BENCHMARK_SAMPLE_FILES = 50
+    
+    # Threads reading zip directories during validation - bound by share latency, not CPU
+    VALIDATION_WORKERS = 16
+    
+    # Watch mode: seconds between polls of the day folder, and how long an
+    # .ab1 file's size and mtime must stay unchanged before it is sorted
+    WATCH_POLL_SECONDS = 15
+    WATCH_SETTLE_SECONDS = 30
     
     # Windows version detection
     @staticmethod
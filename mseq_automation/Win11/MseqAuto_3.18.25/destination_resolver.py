@@ -0,0 +1,125 @@
+# destination_resolver.py
+import os
+import re
+from datetime import datetime
+
+
+class DestinationResolver:
+    """Per-run memo of where orders go
+
+    The parent folder of an I number is resolved once (user-selected folder,
+    then P:\\Data\\<today>, then the fallback search paths), and every BioI
+    and order folder that is known to exist or was created is remembered, so
+    sorting a plate costs a handful of directory operations instead of a
+    few per file.
+    """
+    BIOI_FOLDER = re.compile(r'.+bioi-\d+.+', re.IGNORECASE)
+    INUMBER = re.compile(r'bioi-(\d+)', re.IGNORECASE)
+
+    def __init__(self, file_dao, logger=None, user_selected_folder=None):
+        self.file_dao = file_dao
+        self.logger = logger or print
+        self.user_selected_folder = user_selected_folder
+        self.parents = {}  # I number -> parent folder
+        self.existing_folders = set()
+        self.writable = {}  # path -> exists and is writable
+        self.hits = 0
+        self.misses = 0
+
+    def get_parent_folder(self, i_num):
+        """Get the folder the BioI folder of an I number goes into"""
+        if i_num in self.parents:
+            self.hits += 1
+            return self.parents[i_num]
+        self.misses += 1
+        self.parents[i_num] = self._resolve_parent_folder(i_num)
+        return self.parents[i_num]
+
+    def get_order_folder_paths(self, i_num, acct_name, order_num):
+        """Get the BioI folder and order folder paths of an order without creating them"""
+        bioi_folder_path = os.path.join(self.get_parent_folder(i_num), f"BioI-{i_num}")
+        order_folder_path = os.path.join(bioi_folder_path, f"BioI-{i_num}_{acct_name}_{order_num}")
+        return bioi_folder_path, order_folder_path
+
+    def folder_exists(self, path):
+        """Check if a folder exists, remembering folders that do"""
+        if path in self.existing_folders:
+            self.hits += 1
+            return True
+        self.misses += 1
+        if os.path.isdir(path):
+            self.existing_folders.add(path)
+            return True
+        return False
+
+    def ensure_folder(self, path):
+        """Create a folder (and its parents) unless it is known to exist"""
+        if not self.folder_exists(path):
+            self.file_dao.create_folder_if_not_exists(path)
+            self.existing_folders.add(path)
+            self.logger(f"Created folder: {path}")
+        return path
+
+    def summary(self):
+        return (f"Destination resolver: {self.hits} hits, {self.misses} misses, "
+                f"{len(self.parents)} I numbers, {len(self.existing_folders)} known folders")
+
+    def _is_writable(self, path):
+        if path not in self.writable:
+            self.writable[path] = os.path.exists(path) and os.access(path, os.W_OK)
+        return self.writable[path]
+
+    def _resolve_parent_folder(self, i_num):
+        """
+        Resolve the parent folder path for an order based on I number
+
+        Raises:
+            ValueError: If no suitable destination can be found
+        """
+        self.logger(f"Finding destination for I number: {i_num}")
+
+        # If we have a user-selected folder, use it first
+        if self.user_selected_folder and self._is_writable(self.user_selected_folder):
+            self.logger(f"Using user-selected folder: {self.user_selected_folder}")
+            return self.user_selected_folder
+
+        # Preferred path pattern: P:\Data\MM.DD.YY\
+        today = datetime.now().strftime('%m.%d.%y')
+        preferred_path = os.path.join('P:', 'Data', today)
+
+        # Try preferred path first
+        if self._is_writable(preferred_path):
+            # Search for matching I number folder within preferred path
+            for item in self.file_dao.get_directory_contents(preferred_path):
+                if self.BIOI_FOLDER.search(item) and 'reinject' not in item.lower():
+                    dest_path = os.path.join(preferred_path, item)
+                    self.logger(f"Found matching folder in preferred path: {dest_path}")
+                    return dest_path
+
+            self.logger(f"No matching folder found, using preferred path: {preferred_path}")
+            return preferred_path
+
+        # If preferred path doesn't work, try other methods
+        search_paths = [
+            os.path.join('P:', 'Data', 'Individuals'),
+            os.path.join('P:', 'Data'),
+            os.path.dirname(os.getcwd())
+        ]
+
+        for search_path in search_paths:
+            if self._is_writable(search_path):
+                # Search for matching I number folder
+                for item in self.file_dao.get_directory_contents(search_path):
+                    if self.INUMBER.search(item) and 'reinject' not in item.lower():
+                        dest_path = os.path.join(search_path, item)
+                        self.logger(f"Found matching folder in alternative path: {dest_path}")
+                        return dest_path
+
+                # If no matching folder, use this path
+                self.logger(f"Using alternative path: {search_path}")
+                return search_path
+
+        # If no suitable path found, raise an error
+        error_msg = f"Unable to find a writable destination for I number {i_num}"
+        self.logger(error_msg)
+        raise ValueError(error_msg)
@@ -0,0 +1,119 @@
+# directory_snapshot.py
+import os
+import re
+from collections import namedtuple
+
+SnapshotEntry = namedtuple('SnapshotEntry', ['name', 'path', 'is_dir', 'size', 'mtime'])
+
+
+class DirectorySnapshot:
+    """Contents of one directory taken with a single os.scandir call
+
+    Keeps the entry type and stat information that scandir already returns
+    (on Windows, including the P: share, DirEntry.stat() needs no extra round
+    trip), so folder, extension, zip and mSeq artifact queries never stat
+    individual files.
+    """
+
+    def __init__(self, path, entries=None, mtime=None):
+        self.path = path
+        self.entries = entries if entries is not None else {}  # name -> SnapshotEntry
+        self.mtime = mtime  # mtime of the directory itself when it was listed
+        self.checked = None  # time.monotonic() the listing was last known to be current
+
+    @classmethod
+    def scan(cls, path):
+        """List a directory once, an empty snapshot is returned if it doesn't exist"""
+        entries = {}
+        try:
+            mtime = os.stat(path).st_mtime
+            with os.scandir(path) as iterator:
+                for entry in iterator:
+                    entries[entry.name] = cls._make_entry(entry)
+        except FileNotFoundError:
+            return cls(path, {}, None)
+        return cls(path, entries, mtime)
+
+    @staticmethod
+    def _make_entry(entry):
+        try:
+            is_dir = entry.is_dir()
+            stat = entry.stat()
+            size, mtime = (0 if is_dir else stat.st_size), stat.st_mtime
+        except OSError:
+            # Entry vanished between listing and stat
+            is_dir, size, mtime = False, 0, None
+        return SnapshotEntry(entry.name, entry.path, is_dir, size, mtime)
+
+    @staticmethod
+    def entry_for_path(path):
+        """Build an entry for a single path, used to write changes through to a snapshot"""
+        stat = os.stat(path)
+        is_dir = os.path.isdir(path)
+        return SnapshotEntry(os.path.basename(path), path, is_dir,
+                             0 if is_dir else stat.st_size, stat.st_mtime)
+
+    # Write-through updates
+    def add(self, entry):
+        """Add or replace an entry"""
+        self.entries[entry.name] = entry
+
+    def discard(self, name):
+        """Remove an entry if present"""
+        self.entries.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def exists(self):
+        """Check if the directory existed when it was listed"""
+        return self.mtime is not None
+
+    def names(self):
+        """All entry names, in listing order"""
+        return list(self.entries)
+
+    def get(self, name):
+        return self.entries.get(name)
+
+    def folders(self, pattern=None):
+        """Paths of subfolders whose lowercase name matches an optional regex pattern"""
+        if pattern is not None and not hasattr(pattern, 'search'):
+            pattern = re.compile(pattern)
+        return [entry.path for entry in self.entries.values()
+                if entry.is_dir and (pattern is None or pattern.search(entry.name.lower()))]
+
+    def files(self):
+        """Entries that are files"""
+        return [entry for entry in self.entries.values() if not entry.is_dir]
+
+    def files_with_extension(self, extension):
+        """Paths of files ending with an extension (or a tuple of extensions)"""
+        return [entry.path for entry in self.entries.values()
+                if not entry.is_dir and entry.name.endswith(extension)]
+
+    def has_extension(self, extension):
+        """Check if any file ends with an extension (or a tuple of extensions)"""
+        return any(not entry.is_dir and entry.name.endswith(extension)
+                   for entry in self.entries.values())
+
+    def count_by_extensions(self, extensions):
+        """Count files by extension, a file is counted for every extension it ends with"""
+        counts = {ext: 0 for ext in extensions}
+        for entry in self.entries.values():
+            if entry.is_dir:
+                continue
+            for ext in extensions:
+                if entry.name.endswith(ext):
+                    counts[ext] += 1
+        return counts
+
+    def artifacts(self, artifact_names):
+        """Names from a set of artifacts (e.g. mSeq's chromat_dir, mseq4.ini) present here"""
+        return {name for name in artifact_names if name in self.entries}
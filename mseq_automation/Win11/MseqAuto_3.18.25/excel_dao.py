@@ -2,6 +2,9 @@
 import os
 import pylightxl as xl
 from datetime import datetime
+from openpyxl import load_workbook as load_openpyxl_workbook
+
+from streaming_sheet_writer import StreamingSheetWriter
 
 class ExcelDAO:
     def __init__(self, config):
@@ -32,6 +35,32 @@ class ExcelDAO:
             print(f"Error saving Excel file: {e}")
             return None
     
+    def open_sheet_writer(self, file_path):
+        """Write-only streaming workbook, rows are appended with the EXCEL_STYLES fills by name"""
+        return StreamingSheetWriter(file_path, self.config.EXCEL_STYLES)
+    
+    def read_sheet_rows(self, file_path):
+        """Stream the rows of a workbook's first sheet as (values, styles) without loading it whole
+        
+        styles maps column letters to the EXCEL_STYLES name of the cell's fill.
+        Raises the reader's error if the file can't be read.
+        """
+        style_names = {rgb.upper(): name for name, rgb in self.config.EXCEL_STYLES.items()}
+        workbook = load_openpyxl_workbook(file_path, read_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows():
+                values = []
+                styles = {}
+                for cell in row:
+                    values.append(getattr(cell, 'value', None))
+                    fill = getattr(cell, 'fill', None)
+                    rgb = fill.fgColor.rgb if fill is not None and fill.fill_type == 'solid' else None
+                    if isinstance(rgb, str) and rgb[-6:].upper() in style_names:
+                        styles[cell.column_letter] = style_names[rgb[-6:].upper()]
+                yield values, styles
+        finally:
+            workbook.close()
+    
     def set_cell_value(self, worksheet, row, col, value):
         """Set cell value"""
         # pylightxl uses 1-based indexing like Excel
@@ -0,0 +1,105 @@
+# file_classifier.py
+import os
+import re
+from collections import namedtuple
+
+ClassifiedFile = namedtuple(
+    'ClassifiedFile',
+    ['path', 'name', 'kind', 'pcr_number', 'well', 'normalized_name', 'i_number']
+)
+
+
+class FileClassifier:
+    """Single-pass classification of .ab1 files into PCR, blank, control and customer files
+
+    All rules are compiled once. IND files follow the individual sequencing
+    naming ({01A}Sample_Primer.ab1, {PCR123_exp1} tags, {07H}.ab1 blanks),
+    plate files the plate naming (01A_Sample_Primer.ab1, 01A__.ab1 blanks).
+    """
+    PCR = 'pcr'
+    BLANK = 'blank'
+    CONTROL = 'control'
+    CUSTOMER = 'customer'
+
+    # Leading well tag, a bare well tag is an IND blank
+    IND_PREFIX = re.compile(r'^{(?P<well>\d+[A-H])}(?P<blank>.ab1$)?', re.IGNORECASE)
+    PLATE_PREFIX = re.compile(r'^(?P<well>\d{2}[A-H])_(?P<blank>_.ab1$)?', re.IGNORECASE)
+    PCR_TAG = re.compile(r'{(pcr\d+).+}', re.IGNORECASE)
+    BRACES = re.compile(r'{.*?}')
+    INUMBER = re.compile(r'bioi-(\d+)', re.IGNORECASE)
+
+    def __init__(self, config, file_dao, plate=False):
+        self.file_dao = file_dao
+        self.plate = plate
+        if plate:
+            self.controls = frozenset(control.lower() for control in config.PLATE_CONTROLS)
+        else:
+            self.controls = frozenset(control.lower() for control in config.CONTROLS)
+        self._inumber_cache = {}
+
+    def classify(self, file_path):
+        """Classify a single file"""
+        name = os.path.basename(file_path)
+        i_number = self._get_inumber(os.path.dirname(file_path))
+        if self.plate:
+            return self._classify_plate(file_path, name, i_number)
+        return self._classify_ind(file_path, name, i_number)
+
+    def classify_many(self, file_paths):
+        """Classify a batch of files, returns records in the same order"""
+        return [self.classify(file_path) for file_path in file_paths]
+
+    @staticmethod
+    def group_by_kind(records):
+        """Group records into a dict of kind -> [records]"""
+        groups = {FileClassifier.PCR: [], FileClassifier.BLANK: [],
+                  FileClassifier.CONTROL: [], FileClassifier.CUSTOMER: []}
+        for record in records:
+            groups[record.kind].append(record)
+        return groups
+
+    def _classify_ind(self, file_path, name, i_number):
+        prefix = self.IND_PREFIX.match(name)
+        well = prefix.group('well').upper() if prefix else ''
+
+        # PCR tags win over everything else
+        pcr = self.PCR_TAG.search(name)
+        if pcr:
+            return ClassifiedFile(file_path, name, self.PCR, pcr.group(1).upper(), well,
+                                  self.file_dao.normalize_filename(name), i_number)
+
+        # Blanks ({07H}.ab1 or 01A__.ab1) are checked before controls
+        if (prefix and prefix.group('blank')) or self._is_plate_blank(name):
+            return ClassifiedFile(file_path, name, self.BLANK, '', well, '', i_number)
+
+        # Controls are compared without braces, suffixes or extension
+        stem = os.path.splitext(self.BRACES.sub('', self.file_dao.neutralize_suffixes(name)))[0]
+        if stem.lower() in self.controls:
+            return ClassifiedFile(file_path, name, self.CONTROL, '', well, '', i_number)
+
+        return ClassifiedFile(file_path, name, self.CUSTOMER, '', well,
+                              self.file_dao.normalize_filename(name), i_number)
+
+    def _classify_plate(self, file_path, name, i_number):
+        prefix = self.PLATE_PREFIX.match(name)
+        well = prefix.group('well').upper() if prefix else ''
+
+        if name.lower()[4:-4] in self.controls:
+            return ClassifiedFile(file_path, name, self.CONTROL, '', well, '', i_number)
+
+        # 01A__.ab1
+        if prefix and prefix.group('blank'):
+            return ClassifiedFile(file_path, name, self.BLANK, '', well, '', i_number)
+
+        return ClassifiedFile(file_path, name, self.CUSTOMER, '', well,
+                              self.file_dao.normalize_filename(name), i_number)
+
+    def _is_plate_blank(self, name):
+        prefix = self.PLATE_PREFIX.match(name)
+        return bool(prefix and prefix.group('blank'))
+
+    def _get_inumber(self, folder):
+        if folder not in self._inumber_cache:
+            match = self.INUMBER.search(folder)
+            self._inumber_cache[folder] = match.group(1) if match else None
+        return self._inumber_cache[folder]
@@ -1,15 +1,30 @@
 # file_system_dao.py
+import filecmp
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from shutil import move, copyfile
-from zipfile import ZipFile, ZIP_DEFLATED
+from zipfile import ZipFile
+
+from compression_policy import CompressionPolicy
+from directory_snapshot import DirectorySnapshot
+from filename_normalizer import (adjust_abi_chars, neutralize_suffixes, normalize_filename,
+                                 normalize_many, remove_braces)
+from order_key_index import OrderKeyIndex
+from order_key_table import OrderKeyTable, parse_order_key_line
+from zip_engine import add_members, write_zip
 
 
 class FileSystemDAO:
     def __init__(self, config):
         self.config = config
-        self.directory_cache = {}
+        self.directory_cache = OrderedDict()  # path -> DirectorySnapshot, least recently used first
+        self.cache_lock = threading.RLock()  # moves may run on worker threads
+        self.cache_changes = 0  # bumped by every write-through update, a scan racing one isn't cached
+        self.compression_policy = None  # Loaded by get_compression_policy
 
         # Precompiled regex patterns
         self.regex_patterns = {
@@ -22,57 +37,129 @@ class FileSystemDAO:
             # Add other patterns as needed
         }
 
+    def get_snapshot(self, path, refresh=False):
+        """Get a DirectorySnapshot of a folder
+
+        A cached listing is trusted for DIRECTORY_CACHE_TTL seconds, the
+        DAO's own changes keep it current. After that the folder's mtime is
+        checked and the folder relisted only if it changed. The share is
+        only touched outside the lock, so threads don't queue behind each
+        other's network round trips.
+        """
+        now = time.monotonic()
+        with self.cache_lock:
+            snapshot = self.directory_cache.get(path)
+            if snapshot is not None and not refresh and now - snapshot.checked < self.config.DIRECTORY_CACHE_TTL:
+                self.directory_cache.move_to_end(path)
+                return snapshot
+            changes = self.cache_changes
+
+        if snapshot is not None and not refresh and self._is_current(snapshot):
+            with self.cache_lock:
+                snapshot.checked = now
+            return snapshot
+
+        try:
+            snapshot = DirectorySnapshot.scan(path)
+        except Exception as e:
+            print(f"Error reading directory {path}: {e}")
+            snapshot = DirectorySnapshot(path)
+        snapshot.checked = now
+
+        with self.cache_lock:
+            if self.cache_changes != changes:
+                # The DAO changed the tree while listing, the listing may predate it
+                self.directory_cache.pop(path, None)
+                return snapshot
+            self.directory_cache[path] = snapshot
+            self.directory_cache.move_to_end(path)
+            while len(self.directory_cache) > self.config.DIRECTORY_CACHE_SIZE:
+                self.directory_cache.popitem(last=False)
+        return snapshot
+
+    def _is_current(self, snapshot):
+        """Check a cached snapshot against the folder's current mtime"""
+        try:
+            return os.stat(snapshot.path).st_mtime == snapshot.mtime
+        except OSError:
+            return snapshot.mtime is None
+
+    def invalidate(self, path):
+        """Drop the cached snapshots of a folder and everything below it"""
+        prefix = os.path.join(path, '')
+        with self.cache_lock:
+            self.cache_changes += 1
+            for cached_path in [p for p in self.directory_cache if p == path or p.startswith(prefix)]:
+                del self.directory_cache[cached_path]
+
+    # Write-through cache updates, called after this DAO changes the tree.
+    # The parent's new mtime is recorded so our own changes don't force a relist.
+    def _cache_added(self, path):
+        with self.cache_lock:
+            self.cache_changes += 1
+            snapshot = self.directory_cache.get(os.path.dirname(path))
+            if snapshot is None:
+                return
+            try:
+                snapshot.add(DirectorySnapshot.entry_for_path(path))
+                snapshot.mtime = os.stat(snapshot.path).st_mtime
+            except OSError:
+                self.invalidate(snapshot.path)
+
+    def _cache_removed(self, path):
+        with self.cache_lock:
+            self.invalidate(path)
+            snapshot = self.directory_cache.get(os.path.dirname(path))
+            if snapshot is None:
+                return
+            snapshot.discard(os.path.basename(path))
+            try:
+                snapshot.mtime = os.stat(snapshot.path).st_mtime
+            except OSError:
+                self.invalidate(snapshot.path)
+
     def get_directory_contents(self, path, refresh=False):
         """Get directory contents with caching"""
-        if path not in self.directory_cache or refresh:
-            if not os.path.exists(path):
-                self.directory_cache[path] = []
-                return []
-                
-            try:
-                contents = os.listdir(path)
-                self.directory_cache[path] = contents
-            except Exception as e:
-                print(f"Error reading directory {path}: {e}")
-                self.directory_cache[path] = []
-                
-        return self.directory_cache[path]
+        return self.get_snapshot(path, refresh).names()
 
     def get_folders(self, path, pattern=None):
         """Get folders matching an optional regex pattern"""
-        folders = []
-        for item in self.get_directory_contents(path):
-            full_path = os.path.join(path, item)
-            if os.path.isdir(full_path):
-                if pattern is None or re.search(pattern, item.lower()):
-                    folders.append(full_path)
-        return folders
+        return self.get_snapshot(path).folders(pattern)
     
     def get_files_by_extension(self, folder, extension):
         """Get all files with specified extension in a folder"""
-        files = []
-        for item in self.get_directory_contents(folder):
-            if item.endswith(extension):
-                files.append(os.path.join(folder, item))
-        return files
+        return self.get_snapshot(folder).files_with_extension(extension)
     
     def contains_file_type(self, folder, extension):
         """Check if folder contains files with specified extension"""
-        for item in self.get_directory_contents(folder):
-            if item.endswith(extension):
-                return True
-        return False
+        return self.get_snapshot(folder).has_extension(extension)
+    
+    def get_mseq_artifacts(self, folder):
+        """Get the mSeq artifacts (chromat_dir, edit_dir, phd_dir, mseq4.ini) present in a folder"""
+        return self.get_snapshot(folder).artifacts(self.config.MSEQ_ARTIFACTS)
     
     def create_folder_if_not_exists(self, path):
         """Create folder if it doesn't exist"""
         if not os.path.exists(path):
-            os.mkdir(path)
+            os.makedirs(path, exist_ok=True)
+            self._cache_added(path)
         return path
     
+    def delete_empty_folder(self, path):
+        """Delete a folder if it is empty, returns True if it was deleted"""
+        try:
+            os.rmdir(path)
+        except OSError:
+            return False
+        self._cache_removed(path)
+        return True
+    
     def move_folder(self, source, destination):
         """Move folder with proper error handling"""
         try:
-            move(source, destination)
+            new_path = move(source, destination)
+            self._cache_removed(source)
+            self._cache_added(new_path)
             return True
         except Exception as e:
             # Proper logging would be implemented here
@@ -91,15 +178,100 @@ class FileSystemDAO:
         """Join path components"""
         return os.path.join(*args)
     
-    def load_order_key(self, key_file_path):
-        """Load the order key file"""
+    def iter_order_key(self, key_file_path, i_numbers=None, bad_rows=None, file_hash=None):
+        """Stream parsed order key rows as (I number, account, order, sample) tuples
+
+        Rows are yielded with digit string I numbers and order numbers. If
+        i_numbers is given only rows for those I numbers are yielded. Malformed
+        rows are skipped and recorded as (line number, line) in bad_rows if a
+        list is given. A file_hash object is fed every byte of the file.
+        """
+        wanted = {str(i_num) for i_num in i_numbers} if i_numbers is not None else None
+
+        with open(key_file_path, 'rb') as key_file:
+            for line_number, raw_line in enumerate(key_file, 1):
+                if file_hash is not None:
+                    file_hash.update(raw_line)
+                line = raw_line.decode('utf-8', errors='replace')
+                if not line.strip():
+                    continue
+
+                row = parse_order_key_line(line)
+                if row is None:
+                    if bad_rows is not None:
+                        bad_rows.append((line_number, line.rstrip('\r\n')))
+                    continue
+
+                if wanted is None or row[0] in wanted:
+                    yield row
+
+    def load_order_key(self, key_file_path, i_numbers=None, file_hash=None):
+        """Load the order key file into a compact OrderKeyTable"""
+        table = OrderKeyTable()
         try:
-            import numpy as np
-            return np.loadtxt(key_file_path, dtype=str, delimiter='\t')
+            for row in self.iter_order_key(key_file_path, i_numbers, table.bad_rows, file_hash):
+                table.append(*row)
         except Exception as e:
             print(f"Error loading order key file: {e}")
             return None
-    
+
+        for line_number, line in table.bad_rows:
+            print(f"Skipped malformed order key row {line_number}: {line!r}")
+        return table
+
+    def load_order_key_index(self, key_file_path, read_only=False):
+        """Load the compiled order key index, rebuilding it only if the key file changed
+
+        With read_only (dry runs) a rebuilt or restamped index is only kept
+        in memory, the index file on the share is never written.
+        """
+        try:
+            stat = os.stat(key_file_path)
+        except OSError as e:
+            print(f"Error loading order key file: {e}")
+            return None
+
+        index_path = OrderKeyIndex.get_index_path(key_file_path)
+        try:
+            index = OrderKeyIndex.load(index_path)
+        except Exception as e:
+            print(f"Ignoring unreadable order key index {index_path}: {e}")
+            index = None
+
+        # Same size and mtime - reuse without reading the key at all
+        if index and index.signature['size'] == stat.st_size and index.signature['mtime'] == stat.st_mtime:
+            return index
+
+        # The key is hashed while it is parsed, so the share is read only once
+        file_hash = OrderKeyIndex.new_hash()
+        order_key = self.load_order_key(key_file_path, file_hash=file_hash)
+        if order_key is None:
+            return None
+        signature = {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': file_hash.hexdigest()}
+
+        # The batch file rewrites the key every launch, an unchanged hash keeps the index
+        if index and index.signature['size'] == stat.st_size and index.signature['hash'] == signature['hash']:
+            index.signature['mtime'] = stat.st_mtime
+            if not read_only:
+                self._save_order_key_index(index, index_path)
+            return index
+
+        index = OrderKeyIndex.build(
+            order_key,
+            lambda name: self.normalize_filename(name, remove_extension=False),
+            signature
+        )
+        if not read_only:
+            self._save_order_key_index(index, index_path)
+        return index
+
+    def _save_order_key_index(self, index, index_path):
+        """Save the order key index, a failed write only costs a rebuild next launch"""
+        try:
+            index.save(index_path)
+        except Exception as e:
+            print(f"Error saving order key index {index_path}: {e}")
+
     def file_exists(self, path):
         """Check if a file exists"""
         return os.path.isfile(path)
@@ -110,14 +282,7 @@ class FileSystemDAO:
     
     def count_files_by_extensions(self, folder, extensions):
         """Count files with specific extensions in a folder"""
-        counts = {ext: 0 for ext in extensions}
-        for item in self.get_directory_contents(folder):
-            file_path = os.path.join(folder, item)
-            if os.path.isfile(file_path):
-                for ext in extensions:
-                    if item.endswith(ext):
-                        counts[ext] += 1
-        return counts
+        return self.get_snapshot(folder).count_by_extensions(extensions)
     
     def get_folder_creation_time(self, folder):
         """Get the creation time of a folder"""
@@ -129,46 +294,15 @@ class FileSystemDAO:
 
     def clean_braces_format(self, file_name):
         """Remove anything contained in {} from filename"""
-        return re.sub(r'{.*?}', '', self.neutralize_suffixes(file_name))
+        return remove_braces(neutralize_suffixes(file_name))
     
     def adjust_abi_chars(self, file_name):
         """Adjust characters in file name to match ABI naming conventions"""
-        # Create translation table
-        translation_table = str.maketrans({
-            ' ': '',
-            '+': '&',
-            '*': '-',
-            '|': '-',
-            '/': '-',
-            '\\': '-',
-            ':': '-',
-            '"': '',
-            "'": '',
-            '<': '-',
-            '>': '-',
-            '?': '',
-            ',': ''
-        })
-        
-        # Apply translation
-        return file_name.translate(translation_table)
+        return adjust_abi_chars(file_name)
     
     def normalize_filename(self, file_name, remove_extension=True, logger=None):
         """Normalize filename with optional logging"""
-        # Step 1: Adjust characters
-        adjusted_name = self.adjust_abi_chars(file_name)
-        
-        # Step 2: Remove extension if needed
-        if remove_extension and '.' in adjusted_name:
-            name_without_ext = adjusted_name[:adjusted_name.rfind('.')]
-        else:
-            name_without_ext = adjusted_name
-        
-        # Step 3: Remove suffixes
-        neutralized_name = self.neutralize_suffixes(name_without_ext)
-        
-        # Step 4: Remove brace content
-        cleaned_name = re.sub(r'{.*?}', '', neutralized_name)
+        cleaned_name = normalize_filename(file_name, remove_extension)
         
         # Only log if a logger is provided
         if logger:
@@ -176,12 +310,13 @@ class FileSystemDAO:
         
         return cleaned_name
     
+    def normalize_many(self, file_names, remove_extension=True):
+        """Normalize a batch of filenames, returns a list in the same order"""
+        return normalize_many(file_names, remove_extension)
+    
     def neutralize_suffixes(self, file_name):
         """Remove suffixes like _Premixed and _RTI"""
-        new_file_name = file_name
-        new_file_name = new_file_name.replace('_Premixed', '')
-        new_file_name = new_file_name.replace('_RTI', '')
-        return new_file_name
+        return neutralize_suffixes(file_name)
     
     def remove_extension(self, file_name, extension=None):
         """Remove file extension"""
@@ -192,30 +327,42 @@ class FileSystemDAO:
     # Zip operations
     def check_for_zip(self, folder_path):
         """Check if folder contains any zip files"""
-        for item in self.get_directory_contents(folder_path):
-            file_path = os.path.join(folder_path, item)
-            if os.path.isfile(file_path) and file_path.endswith(self.config.ZIP_EXTENSION):
-                return True
-        return False
+        return self.get_snapshot(folder_path).has_extension(self.config.ZIP_EXTENSION)
     
     def zip_files(self, source_folder, zip_path, file_extensions=None, exclude_extensions=None):
         """Create a zip file from files in source_folder matching extensions"""
         with ZipFile(zip_path, 'w') as zip_file:
-            for item in self.get_directory_contents(source_folder):
-                file_path = os.path.join(source_folder, item)
-                if not os.path.isfile(file_path):
-                    continue
-                    
+            for entry in self.get_snapshot(source_folder).files():
+                item, file_path = entry.name, entry.path
+                
                 if file_extensions and not any(item.endswith(ext) for ext in file_extensions):
                     continue
                 
                 if exclude_extensions and any(item.endswith(ext) for ext in exclude_extensions):
                     continue
                 
-                zip_file.write(file_path, arcname=item, compress_type=ZIP_DEFLATED)
+                add_members(zip_file, [file_path], self.get_compression_policy())
         
+        self._cache_added(zip_path)
         return True
     
+    def zip_file_list(self, zip_path, file_paths):
+        """Create a zip file holding the given files under their base names"""
+        write_zip(zip_path, file_paths, policy=self.get_compression_policy())
+        self._cache_added(zip_path)
+        return zip_path
+    
+    def get_compression_policy(self):
+        """Per-extension zip compression, as chosen by the compression benchmark"""
+        if self.compression_policy is None:
+            self.compression_policy = CompressionPolicy.load(self.config.COMPRESSION_POLICY_PATH,
+                                                             self.config.COMPRESSION_POLICY)
+        return self.compression_policy
+    
+    def register_file(self, path):
+        """Add a file written outside this DAO (e.g. by a worker process) to the cached listing"""
+        self._cache_added(path)
+    
     def get_zip_contents(self, zip_path):
         """Get list of files in a zip archive"""
         try:
@@ -232,6 +379,7 @@ class FileSystemDAO:
         
         dest_path = os.path.join(dump_folder, os.path.basename(zip_path))
         copyfile(zip_path, dest_path)
+        self._cache_added(dest_path)
         return dest_path
     
     # PCR folder operations
@@ -363,12 +511,31 @@ class FileSystemDAO:
     def move_file(self, source, destination):
         """Move a file with error handling"""
         try:
-            move(source, destination)
+            new_path = move(source, destination)
+            self._cache_removed(source)
+            self._cache_added(new_path)
             return True
         except Exception as e:
             print(f"Error moving file {source}: {e}")
             return False
 
+    def delete_file(self, path):
+        """Delete a file with error handling"""
+        try:
+            os.remove(path)
+            self._cache_removed(path)
+            return True
+        except Exception as e:
+            print(f"Error deleting file {path}: {e}")
+            return False
+
+    def files_identical(self, path_a, path_b):
+        """Check if two files have the same contents"""
+        try:
+            return filecmp.cmp(path_a, path_b, shallow=False)
+        except OSError:
+            return False
+
     def rename_file_without_braces(self, file_path):
         """Rename a file to remove anything in braces"""
         if '{' not in file_path and '}' not in file_path:
@@ -376,13 +543,15 @@ class FileSystemDAO:
             
         dir_name = os.path.dirname(file_path)
         base_name = os.path.basename(file_path)
-        new_name = re.sub(r'{.*?}', '', base_name)
+        new_name = remove_braces(base_name)
         
         new_path = os.path.join(dir_name, new_name)
         
         try:
             if os.path.exists(file_path):
                 os.rename(file_path, new_path)
+                self._cache_removed(file_path)
+                self._cache_added(new_path)
                 return new_path
         except Exception as e:
             print(f"Error renaming file {file_path}: {e}")
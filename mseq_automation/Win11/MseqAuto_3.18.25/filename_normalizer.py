@@ -0,0 +1,59 @@
+# filename_normalizer.py
+import re
+from functools import lru_cache
+
+# Characters changed when ABI txt files are made from the Excel spreadsheets
+ABI_TRANSLATION_TABLE = str.maketrans({
+    ' ': '',
+    '+': '&',
+    '*': '-',
+    '|': '-',
+    '/': '-',
+    '\\': '-',
+    ':': '-',
+    '"': '',
+    "'": '',
+    '<': '-',
+    '>': '-',
+    '?': '',
+    ',': ''
+})
+
+BRACE_PATTERN = re.compile(r'{.*?}')
+SUFFIXES = ('_Premixed', '_RTI')
+
+# Names are normalized many times per run (order key, sorting, reinjects, validation)
+NORMALIZE_CACHE_SIZE = 65536
+
+
+def adjust_abi_chars(file_name):
+    """Adjust characters in file name to match ABI naming conventions"""
+    return file_name.translate(ABI_TRANSLATION_TABLE)
+
+
+def neutralize_suffixes(file_name):
+    """Remove suffixes like _Premixed and _RTI"""
+    for suffix in SUFFIXES:
+        file_name = file_name.replace(suffix, '')
+    return file_name
+
+
+def remove_braces(file_name):
+    """Remove anything contained in {} from a name"""
+    return BRACE_PATTERN.sub('', file_name)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_filename(file_name, remove_extension=True):
+    """Adjust ABI characters, drop the extension, suffixes and brace content"""
+    adjusted_name = file_name.translate(ABI_TRANSLATION_TABLE)
+
+    if remove_extension and '.' in adjusted_name:
+        adjusted_name = adjusted_name[:adjusted_name.rfind('.')]
+
+    return BRACE_PATTERN.sub('', neutralize_suffixes(adjusted_name))
+
+
+def normalize_many(file_names, remove_extension=True):
+    """Normalize a batch of names, returns a list in the same order"""
+    return [normalize_filename(str(file_name), remove_extension) for file_name in file_names]
@@ -1,8 +1,18 @@
 # folder_processor.py
 import os
 import re
-import numpy as np
-from datetime import datetime
+import time
+from collections import deque
+
+from destination_resolver import DestinationResolver
+from file_classifier import FileClassifier
+from move_plan import MoveExecutor, MovePlan
+from order_catalog import OrderCatalog
+from order_key_index import OrderKeyIndex
+from reinject_index import ReinjectIndex
+from run_plan import RunPlan
+from spreadsheet_catalog import SpreadsheetCatalog
+from zip_engine import ZipEngine
 
 class FolderProcessor:
     def __init__(self, file_dao, ui_automation, config, logger=None):
@@ -11,88 +21,159 @@ class FolderProcessor:
         self.config = config
         self.logger = logger 
         self.order_key_index = None  # Will be populated when needed
+        self.order_key_source = None
+        self.cold_order_key_index = None  # Full key index, built on the first hot index miss
+        self.active_inumbers = None
+        self.order_catalog = None  # Built once per run by get_order_catalog
+        self.reinject_index = None  # Built once per run by get_reinject_list
+        self.spreadsheet_catalog = None  # Built once per run by get_spreadsheet_catalog
+        self.file_classifiers = {}  # IND and plate classifiers, compiled once
+        self.destination_resolver = None  # Built once per run by get_destination_resolver
+        self.timings = None  # OperationTimings to record into, if set
+        self.journal = None  # SortJournal of the day folder, if set
+        self.read_only = False  # Dry runs: the order key index and spreadsheet cache are not saved
+
+    def build_order_key_index(self, order_key, active_inumbers=None):
+        """Build lookup index for faster order key searches
 
-    def build_order_key_index(self, order_key):
-        """Build lookup index for faster order key searches"""
+        With active_inumbers only those I numbers of a raw order key go into
+        the (hot) index, the rest of the key is indexed lazily the first time
+        a lookup misses. A compiled OrderKeyIndex is already built and loaded
+        whole, so it is used as it is and the window doesn't apply.
+        """
         if self.order_key_index is not None:
             return  # Already built
-            
-        self.order_key_index = {}
-        
-        # Process each entry in the order key
-        for entry in order_key:
+
+        self.order_key_source = order_key
+        self.cold_order_key_index = None
+        self.active_inumbers = None
+
+        # Compiled index loaded from disk - nothing left to normalize
+        if isinstance(order_key, OrderKeyIndex):
+            self.order_key_index = order_key
+            self.logger(f"Using compiled order key index with {len(self.order_key_index)} unique entries")
+            return
+
+        if active_inumbers:
+            self.active_inumbers = {str(i_num) for i_num in active_inumbers}
+
+        if self.active_inumbers is None:
+            rows = order_key
+        elif hasattr(order_key, 'rows_for_inumbers'):
+            rows = order_key.rows_for_inumbers(self.active_inumbers)
+        else:
+            rows = (entry for entry in order_key if str(entry[0]) in self.active_inumbers)
+
+        self.order_key_index = self._index_order_key_rows(rows)
+        self.logger(f"Built order key index with {len(self.order_key_index)} unique entries")
+
+    def refresh_order_key_index(self, order_key, active_inumbers=None):
+        """Drop the built indexes and index a newly loaded order key"""
+        self.order_key_index = None
+        self.build_order_key_index(order_key, active_inumbers)
+
+    def _index_order_key_rows(self, rows):
+        """Index order key rows by normalized sample name"""
+        index = {}
+        for entry in rows:
             i_num, acct_name, order_num, sample_name = entry[0:4]
             normalized_name = self.file_dao.normalize_filename(sample_name, remove_extension=False)
-            
+
             # Create entry in index (handle multiple entries with same normalized name)
-            if normalized_name not in self.order_key_index:
-                self.order_key_index[normalized_name] = []
-            self.order_key_index[normalized_name].append((i_num, acct_name, order_num))
-        
-        self.logger(f"Built order key index with {len(self.order_key_index)} unique entries")
+            if normalized_name not in index:
+                index[normalized_name] = []
+            index[normalized_name].append((i_num, acct_name, order_num))
+        return index
+
+    def _get_cold_order_key_index(self):
+        """Index of the full order key, only built when the hot index can't answer"""
+        if self.cold_order_key_index is None:
+            self.cold_order_key_index = self._index_order_key_rows(self.order_key_source)
+            self.logger(f"Built cold order key index with {len(self.cold_order_key_index)} unique entries")
+        return self.cold_order_key_index
+
+    def find_order_key_matches(self, normalized_name, current_i_num=None):
+        """Get (I number, account, order) matches for a normalized name
+
+        The hot matches are the full key's matches within the window, in key
+        order. They are only returned when one of them has the file's own I
+        number, as that match is then picked either way. Otherwise the first
+        match of the full key is picked, which may lie outside the window.
+        """
+        matches = self.order_key_index.get(normalized_name)
+
+        # Hot index covers everything when no window was given
+        if self.active_inumbers is None:
+            return matches or []
+
+        if matches and current_i_num and any(match[0] == current_i_num for match in matches):
+            return matches
+
+        return self._get_cold_order_key_index().get(normalized_name) or []
 
-    def sort_customer_file(self, file_path, order_key, recent_inumbers):
+    def find_order_key_match(self, normalized_name, current_i_num=None):
+        """The (I number, account, order) a file goes to, the match of its own I number first, None without a match"""
+        matches = self.find_order_key_matches(normalized_name, current_i_num)
+        if not matches:
+            return None
+        return next((match for match in matches if current_i_num and match[0] == current_i_num), matches[0])
+
+    def sort_customer_file(self, file_path, order_key, recent_inumbers, normalized_name=None):
         """Sort a customer file based on order key using the index"""
         # Build index if not already done
         if self.order_key_index is None:
-            self.build_order_key_index(order_key)
+            self.build_order_key_index(order_key, recent_inumbers)
             
+        plan = MovePlan(self.file_dao)
+        if not self._plan_customer_file(plan, file_path, normalized_name):
+            return False
+        return not self.execute_move_plan(plan).failed
+
+    def _plan_customer_file(self, plan, file_path, normalized_name=None):
+        """Plan the move of a customer file to its order folder, False if it has no order"""
         file_name = os.path.basename(file_path)
         # Only log once, not for each transformation step
         self.logger(f"Processing customer file: {file_name}")
         
-        # Normalize the filename for matching
-        normalized_name = self.file_dao.normalize_filename(file_name)
+        # Normalize the filename for matching (the classifier may have done it already)
+        if normalized_name is None:
+            normalized_name = self.file_dao.normalize_filename(file_name)
         
-        # Check if we have this filename in our index
-        if normalized_name in self.order_key_index:
-            matches = self.order_key_index[normalized_name]
-            
-            # Prioritize matches from current folder's I number
-            current_i_num = self.file_dao.get_inumber_from_name(os.path.dirname(file_path))
-            
-            for i_num, acct_name, order_num in matches:
-                # Prioritize current I number if available
-                if current_i_num and i_num == current_i_num:
-                    destination_folder = self._create_and_get_order_folder(i_num, acct_name, order_num)
-                    return self._move_file_to_destination(file_path, destination_folder, normalized_name)
-            
-            # If no match with current I number, use the first match
-            i_num, acct_name, order_num = matches[0]
-            destination_folder = self._create_and_get_order_folder(i_num, acct_name, order_num)
-            return self._move_file_to_destination(file_path, destination_folder, normalized_name)
-                
-        # No match found
-        self.logger(f"No match found in order key for: {normalized_name}")
-        return False
+        # Prioritize matches from current folder's I number
+        current_i_num = self.file_dao.get_inumber_from_name(os.path.dirname(file_path))
+        
+        # Check if we have this filename in our index, preferring the current I number
+        match = self.find_order_key_match(normalized_name, current_i_num)
+        if match is None:
+            self.logger(f"No match found in order key for: {normalized_name}")
+            plan.add_unmatched(file_path, 'no order key match')
+            return False
+        i_num, acct_name, order_num = match
+
+        bioi_folder_path, order_folder_path = self._get_order_folder_paths(i_num, acct_name, order_num)
+        plan.add_directory(bioi_folder_path)
+        plan.add_directory(order_folder_path)
+        self._plan_file_placement(plan, file_path, order_folder_path, normalized_name, 'customer')
+        return True
+
+    def get_destination_resolver(self):
+        """Get the per-run destination resolver for the selected data folder"""
+        user_selected_folder = getattr(self, 'current_data_folder', None)
+        if (self.destination_resolver is None or
+                self.destination_resolver.user_selected_folder != user_selected_folder):
+            self.destination_resolver = DestinationResolver(self.file_dao, self.logger, user_selected_folder)
+        return self.destination_resolver
+
+    def _get_order_folder_paths(self, i_num, acct_name, order_num):
+        """Get the BioI folder and order folder paths of an order without creating them"""
+        return self.get_destination_resolver().get_order_folder_paths(i_num, acct_name, order_num)
 
     def _create_and_get_order_folder(self, i_num, acct_name, order_num):
         """Create order folder structure and return the path"""
-        # Create order folder name 
-        order_folder_name = f"BioI-{i_num}_{acct_name}_{order_num}"
-        self.logger(f"Target order folder: {order_folder_name}")
-        
-        # Get parent folder path
-        parent_folder = self._get_destination_for_order_by_inum(i_num)
-        self.logger(f"Parent folder: {parent_folder}")
-        
-        # Create BioI folder if it doesn't exist
-        bioi_folder_name = f"BioI-{i_num}"
-        bioi_folder_path = os.path.join(parent_folder, bioi_folder_name)
-        if not os.path.exists(bioi_folder_path):
-            os.makedirs(bioi_folder_path)
-            self.logger(f"Created BioI folder: {bioi_folder_path}")
-        
-        # Create full order folder path inside BioI folder
-        order_folder_path = os.path.join(bioi_folder_path, order_folder_name)
-        self.logger(f"Order folder path: {order_folder_path}")
-        
-        # Create order folder if it doesn't exist
-        if not os.path.exists(order_folder_path):
-            os.makedirs(order_folder_path)
-            self.logger(f"Created order folder: {order_folder_path}")
-            
-        return order_folder_path
+        resolver = self.get_destination_resolver()
+        bioi_folder_path, order_folder_path = resolver.get_order_folder_paths(i_num, acct_name, order_num)
+        resolver.ensure_folder(bioi_folder_path)
+        return resolver.ensure_folder(order_folder_path)
 
     def get_destination_for_order(self, order_folder, base_path):
         """Determine the correct destination for an order folder"""
@@ -127,133 +208,157 @@ class FolderProcessor:
 
     def _get_destination_for_order_by_inum(self, i_num, current_folder=None):
         """
-        Get the parent folder path for an order based on I number
+        Get the parent folder path for an order based on I number, resolved once per run
         
         Raises:
-            PermissionError: If unable to write to the intended directory
             ValueError: If no suitable destination can be found
         """
-        self.logger(f"Finding destination for I number: {i_num}")
-    
-        # User-selected folder is stored in the original path
-        # Get the current working folder from the processor's context
-        user_selected_folder = getattr(self, 'current_data_folder', None)
-        
-        # If we have a user-selected folder, use it first
-        if user_selected_folder and os.path.exists(user_selected_folder) and os.access(user_selected_folder, os.W_OK):
-            self.logger(f"Using user-selected folder: {user_selected_folder}")
-            return user_selected_folder
-        
-        # Preferred path pattern: P:\Data\MM.DD.YY\
-        today = datetime.now().strftime('%m.%d.%y')
-        preferred_path = os.path.join('P:', 'Data', today)
-        
-        # Try preferred path first
-        if os.path.exists(preferred_path) and os.access(preferred_path, os.W_OK):
-            # Search for matching I number folder within preferred path
-            for item in self.file_dao.get_directory_contents(preferred_path):
-                if (self.file_dao.regex_patterns['bioi_folder'].search(item) and
-                    not re.search('reinject', item.lower())):
-                    dest_path = os.path.join(preferred_path, item)
-                    self.logger(f"Found matching folder in preferred path: {dest_path}")
-                    return dest_path
-            
-            self.logger(f"No matching folder found, using preferred path: {preferred_path}")
-            return preferred_path
-        
-        # If preferred path doesn't work, try other methods
-        search_paths = [
-            os.path.join('P:', 'Data', 'Individuals'),
-            os.path.join('P:', 'Data'),
-            os.path.dirname(os.getcwd())
-        ]
-        
-        for search_path in search_paths:
-            if os.path.exists(search_path) and os.access(search_path, os.W_OK):
-                # Search for matching I number folder
-                for item in self.file_dao.get_directory_contents(search_path):
-                    if (self.file_dao.regex_patterns['inumber'].search(item) and
-                        not re.search('reinject', item.lower())):
-                        dest_path = os.path.join(search_path, item)
-                        self.logger(f"Found matching folder in alternative path: {dest_path}")
-                        return dest_path
-                
-                # If no matching folder, use this path
-                self.logger(f"Using alternative path: {search_path}")
-                return search_path
-        
-        # If no suitable path found, raise an error
-        error_msg = f"Unable to find a writable destination for I number {i_num}"
-        self.logger(error_msg)
-        raise ValueError(error_msg)
+        return self.get_destination_resolver().get_parent_folder(i_num)
 
     def _move_file_to_destination(self, file_path, destination_folder, normalized_name):
         """Handle file placement including reinject logic"""
+        plan = MovePlan(self.file_dao)
+        plan.add_directory(destination_folder)
+        self._plan_file_placement(plan, file_path, destination_folder, normalized_name, 'customer')
+        return not self.execute_move_plan(plan).failed
+
+    def _plan_file_placement(self, plan, file_path, destination_folder, normalized_name, reason):
+        """Plan where a file goes inside its destination folder, including reinject logic"""
         file_name = os.path.basename(file_path)
         
         # Clean filename for destination (remove braces)
-        clean_brace_file_name = re.sub(r'{.*?}', '', file_name)
+        clean_brace_file_name = self.file_dao.regex_patterns['brace_content'].sub('', file_name)
         target_file_path = os.path.join(destination_folder, clean_brace_file_name)
+        alt_file_path = os.path.join(destination_folder, self.config.ALT_INJECTIONS_FOLDER, file_name)
         
         # Check if file is a reinject
-        is_reinject = False
-        if hasattr(self, 'reinject_list') and self.reinject_list:
-            is_reinject = normalized_name in [self.file_dao.normalize_filename(r) for r in self.reinject_list]
-        self.logger(f"Is reinject: {is_reinject}")
+        is_reinject = self.reinject_index is not None and normalized_name in self.reinject_index
         
-        # Handle file placement
-        if os.path.exists(target_file_path):
+        if plan.target_exists(target_file_path):
             # File already exists, put in alternate injections
-            alt_inj_folder = os.path.join(destination_folder, "Alternate Injections")
-            if not os.path.exists(alt_inj_folder):
-                os.makedirs(alt_inj_folder)
-                
-            alt_file_path = os.path.join(alt_inj_folder, file_name)
-            self.file_dao.move_file(file_path, alt_file_path)
-            self.logger(f"File already exists, moved to alternate injections")
-            return True
-        
-        elif is_reinject:
-            # Handle reinjections
-            raw_name_idx = self.reinject_list.index(normalized_name)
-            raw_name = self.raw_reinject_list[raw_name_idx]
-            
-            # Check for preemptive reinject
-            if '{!P}' in raw_name:
-                # Preemptive reinject goes to main folder
-                self.file_dao.move_file(file_path, target_file_path)
-                self.logger(f"Preemptive reinject moved to main folder")
-            else:
-                # Regular reinject goes to alternate injections
-                alt_inj_folder = os.path.join(destination_folder, "Alternate Injections")
-                if not os.path.exists(alt_inj_folder):
-                    os.makedirs(alt_inj_folder)
-                    
-                alt_file_path = os.path.join(alt_inj_folder, file_name)
-                self.file_dao.move_file(file_path, alt_file_path)
-                self.logger(f"Reinject moved to alternate injections")
-            return True
+            return plan.add(file_path, alt_file_path, reason, MovePlan.ALTERNATE)
         
-        else:
-            # Regular file, put in main folder
-            self.file_dao.move_file(file_path, target_file_path)
-            self.logger(f"File moved to main folder")
-            return True
+        if is_reinject:
+            # Preemptive reinject goes to main folder, regular reinject to alternate injections
+            if self.reinject_index.is_preemptive(normalized_name):
+                return plan.add(file_path, target_file_path, reason, MovePlan.PREEMPTIVE)
+            return plan.add(file_path, alt_file_path, reason, MovePlan.REINJECT)
+        
+        # Regular file, put in main folder
+        return plan.add(file_path, target_file_path, reason, MovePlan.MAIN)
+
+    def execute_move_plan(self, plan):
+        """Create the planned folders, then move the files in a bounded thread pool"""
+        executor = MoveExecutor(self.file_dao, self.logger, self.config.MOVE_WORKERS,
+                                ensure_folder=self.get_destination_resolver().ensure_folder,
+                                journal=self.journal)
+        report = executor.execute(plan)
+        if report.results:
+            # Wall-clock per move, folder creation and parallelism included
+            self.record_timing('move', report.seconds, len(report.results))
+        return report
+
+    def resume_from_journal(self, journal):
+        """Finish the moves an interrupted run left unfinished in its journal, without rescanning"""
+        pending = journal.get_pending()
+        if not pending:
+            return None
+        self.logger(f"Resuming {len(pending)} unfinished moves from {journal.path}")
+
+        plan = MovePlan(self.file_dao)
+        for source, destination, reason in pending:
+            if os.path.exists(source) and os.path.exists(destination):
+                if self.file_dao.files_identical(source, destination):
+                    # Copied before the crash but the source was never removed
+                    self.file_dao.delete_file(source)
+                    journal.record_result(source, destination, True)
+                elif self._is_partial_copy(source, destination) and self.file_dao.delete_file(destination):
+                    # A cross-volume copy the crash cut short, redo the move
+                    self.logger(f"Removed partial copy {destination}, moving it again")
+                    plan.add(source, destination, reason, MovePlan.RESUMED)
+                else:
+                    # Something else took the name since, never overwrite it
+                    alt_destination = self._get_free_alternate_path(plan, source, destination)
+                    self.logger(f"Resumed target already exists, moving to {alt_destination} instead")
+                    journal.record_result(source, destination, False)
+                    plan.add(source, alt_destination, reason, MovePlan.ALTERNATE)
+            elif os.path.exists(source):
+                plan.add(source, destination, reason, MovePlan.RESUMED)
+            elif os.path.exists(destination):
+                # Moved before the crash, only the journal entry was lost
+                journal.record_result(source, destination, True)
+            else:
+                self.logger(f"Journaled file is gone, skipping: {source}")
+                journal.record_result(source, destination, False)
+        journal.sync()
+
+        previous_journal, self.journal = self.journal, journal
+        try:
+            return self.execute_move_plan(plan)
+        finally:
+            self.journal = previous_journal
+
+    def _is_partial_copy(self, source, destination):
+        """Check if a planned destination is a truncated copy of its source"""
+        try:
+            return os.path.getsize(destination) < os.path.getsize(source)
+        except OSError:
+            return False
+
+    def _get_free_alternate_path(self, plan, source, destination):
+        """Path in the destination's alternate injections folder that no file or planned move has taken"""
+        destination_folder = os.path.dirname(destination)
+        if os.path.basename(destination_folder) != self.config.ALT_INJECTIONS_FOLDER:
+            destination_folder = os.path.join(destination_folder, self.config.ALT_INJECTIONS_FOLDER)
+        file_name = os.path.basename(source)
+        alt_path = os.path.join(destination_folder, file_name)
+        stem, extension = os.path.splitext(file_name)
+        copy_number = 1
+        while plan.target_exists(alt_path):
+            copy_number += 1
+            alt_path = os.path.join(destination_folder, f"{stem} ({copy_number}){extension}")
+        return alt_path
+
+    def record_timing(self, operation, seconds, count=1):
+        """Record operation durations for dry-run estimates"""
+        if self.timings is not None:
+            self.timings.record(operation, seconds, count)
 
     def sort_ind_folder(self, folder_path, reinject_list, order_key, recent_inumbers):
-        """Sort all files in a BioI folder using batch processing"""
+        """Sort all files in a BioI folder: plan every move, then execute the plan"""
+        plan, new_folder_path = self.plan_ind_folder(folder_path, reinject_list, order_key, recent_inumbers)
+        self.logger(f"Planned {len(plan)} moves into {len(plan.by_destination())} folders, "
+                    f"{len(plan.unmatched)} files left in place")
+        self.execute_move_plan(plan)
+        
+        # Enhanced cleanup: Check if the original folder is empty or can be safely deleted
+        try:
+            self._cleanup_original_folder(folder_path, new_folder_path)
+        except Exception as e:
+            self.logger(f"Error during folder cleanup: {e}")
+        
+        return new_folder_path
+
+    def plan_ind_folder(self, folder_path, reinject_list, order_key, recent_inumbers, plan=None, ab1_files=None):
+        """Plan the sort of a BioI folder without touching it, returns (MovePlan, new BioI folder path)
+
+        Pass the same plan for several folders so targets claimed by one are seen by the next,
+        and ab1_files to only plan some of the folder's files.
+        """
         self.logger(f"Processing folder: {folder_path}")
+        plan = plan if plan is not None else MovePlan(self.file_dao)
         
-        # Store reinject lists for use in methods
-        self.reinject_list = reinject_list
-        self.raw_reinject_list = getattr(self, 'raw_reinject_list', reinject_list)
+        # Store reinject index for use in methods
+        self.reinject_index = self._as_reinject_index(reinject_list)
         
         # Extract I number from the folder
         i_num = self.file_dao.get_inumber_from_name(folder_path)
 
+        if ab1_files is None:
+            ab1_files = self.file_dao.get_files_by_extension(folder_path, ".ab1")
+
         # If no I-number found, try to find it from the ab1 files
         if not i_num:
-            ab1_files = self.file_dao.get_files_by_extension(folder_path, ".ab1")
             for file_path in ab1_files:
                 parent_dir = os.path.basename(os.path.dirname(file_path))
                 i_num = self.file_dao.get_inumber_from_name(parent_dir)
@@ -261,56 +366,28 @@ class FolderProcessor:
                     self.logger(f"Found I number {i_num} from parent directory of AB1 file")
                     break
 
-        # Create or find the target BioI folder first
+        # The target BioI folder is planned first
         if i_num:
-            new_folder_name = f"BioI-{i_num}"
-            new_folder_path = os.path.join(os.path.dirname(folder_path), new_folder_name)
-            
-            # Create the new folder if it doesn't exist
-            if not os.path.exists(new_folder_path):
-                os.makedirs(new_folder_path)
-                self.logger(f"Created new BioI folder: {new_folder_path}")
+            new_folder_path = os.path.join(os.path.dirname(folder_path), f"BioI-{i_num}")
+            plan.add_directory(new_folder_path)
         else:
             # If no I number found, use the original folder
             new_folder_path = folder_path
             self.logger(f"No I number found, using original folder: {folder_path}")
         
-        # Get all .ab1 files in the folder
-        ab1_files = self.file_dao.get_files_by_extension(folder_path, ".ab1")
         self.logger(f"Found {len(ab1_files)} .ab1 files in folder")
         
-        # Group files by type for batch processing
-        pcr_files = {}
-        control_files = []
-        blank_files = []
-        customer_files = []
+        # Classify all files in one pass, then group by type for batch processing
+        groups = FileClassifier.group_by_kind(self.get_file_classifier().classify_many(ab1_files))
+        control_files = groups[FileClassifier.CONTROL]
+        blank_files = groups[FileClassifier.BLANK]
+        customer_files = groups[FileClassifier.CUSTOMER]
         
-        # Classify files first - FIXED VERSION with no duplicate check
-        for file_path in ab1_files:
-            file_name = os.path.basename(file_path)
-            
-            # Check for PCR files
-            pcr_number = self.file_dao.get_pcr_number(file_name)
-            if pcr_number:
-                if pcr_number not in pcr_files:
-                    pcr_files[pcr_number] = []
-                pcr_files[pcr_number].append(file_path)
-                continue
-
-            # Check for blank files (check this before control files)
-            if self.file_dao.is_blank_file(file_name):
-                self.logger(f"Identified blank file: {file_name}")
-                blank_files.append(file_path)
-                continue
-
-            # Check for control files
-            if self.file_dao.is_control_file(file_name, self.config.CONTROLS):
-                self.logger(f"Identified control file: {file_name}")
-                control_files.append(file_path)
-                continue
-                
-            # Must be a customer file
-            customer_files.append(file_path)
+        pcr_files = {}
+        for record in groups[FileClassifier.PCR]:
+            if record.pcr_number not in pcr_files:
+                pcr_files[record.pcr_number] = []
+            pcr_files[record.pcr_number].append(record)
 
         # Detailed logging for debugging
         self.logger(f"Classified {len(pcr_files)} PCR numbers, {len(control_files)} controls, {len(blank_files)} blanks, {len(customer_files)} customer files")
@@ -318,65 +395,35 @@ class FolderProcessor:
         # Log all blank files for verification
         if blank_files:
             self.logger("Blank files identified:")
-            for file_path in blank_files:
-                self.logger(f"  - {os.path.basename(file_path)}")
+            for record in blank_files:
+                self.logger(f"  - {record.name}")
         else:
             self.logger("No blank files were identified in this folder")
 
-        # Process each group
-        # Process PCR files by PCR number
-        for pcr_number, files in pcr_files.items():
-            self.logger(f"Processing {len(files)} files for PCR number {pcr_number}")
-            for file_path in files:
-                self._sort_pcr_file(file_path, pcr_number)
-        
-        # Process controls - Now placing in the new BioI folder
-        if control_files:
-            self.logger(f"Processing {len(control_files)} control files")
-            controls_folder = os.path.join(new_folder_path, "Controls")
-            if not os.path.exists(controls_folder):
-                os.makedirs(controls_folder)
-                
-            for file_path in control_files:
-                target_path = os.path.join(controls_folder, os.path.basename(file_path))
-                moved = self.file_dao.move_file(file_path, target_path)
-                if moved:
-                    self.logger(f"Moved control file {os.path.basename(file_path)} to {controls_folder}")
-                else:
-                    self.logger(f"Failed to move control file {os.path.basename(file_path)}")
+        # PCR files by PCR number
+        for pcr_number, records in pcr_files.items():
+            self.logger(f"Processing {len(records)} files for PCR number {pcr_number}")
+            for record in records:
+                self._plan_pcr_file(plan, record.path, pcr_number, record.normalized_name)
         
-        # Process blanks - Now placing in the new BioI folder
-        if blank_files:
-            self.logger(f"Processing {len(blank_files)} blank files")
-            blank_folder = os.path.join(new_folder_path, "Blank")
-            if not os.path.exists(blank_folder):
-                os.makedirs(blank_folder)
-                
-            for file_path in blank_files:
-                target_path = os.path.join(blank_folder, os.path.basename(file_path))
-                moved = self.file_dao.move_file(file_path, target_path)
-                if moved:
-                    self.logger(f"Moved blank file {os.path.basename(file_path)} to {blank_folder}")
-                else:
-                    self.logger(f"Failed to move blank file {os.path.basename(file_path)}")
+        # Controls and blanks go into the new BioI folder
+        for records, subfolder in ((control_files, self.config.CONTROLS_FOLDER),
+                                   (blank_files, self.config.BLANK_FOLDER)):
+            destination = os.path.join(new_folder_path, subfolder)
+            for record in records:
+                plan.add(record.path, os.path.join(destination, record.name), records[0].kind)
         
-        # Process customer files (with optimized order key lookup)
+        # Customer files (with optimized order key lookup)
         if customer_files:
             self.logger(f"Processing {len(customer_files)} customer files")
             # Build order key index first
             if self.order_key_index is None:
-                self.build_order_key_index(order_key)
+                self.build_order_key_index(order_key, recent_inumbers)
                 
-            for file_path in customer_files:
-                self.sort_customer_file(file_path, order_key, recent_inumbers)
+            for record in customer_files:
+                self._plan_customer_file(plan, record.path, record.normalized_name)
         
-        # Enhanced cleanup: Check if the original folder is empty or can be safely deleted
-        try:
-            self._cleanup_original_folder(folder_path, new_folder_path)
-        except Exception as e:
-            self.logger(f"Error during folder cleanup: {e}")
-        
-        return new_folder_path
+        return plan, new_folder_path
         
     def _cleanup_original_folder(self, original_folder, new_folder):
         """
@@ -386,9 +433,6 @@ class FolderProcessor:
             self.logger("Original folder is the same as new folder, no cleanup needed")
             return
         
-        # Force refresh directory cache first
-        self.file_dao.get_directory_contents(original_folder, refresh=True)
-        
         # Check if any .ab1 files remain in the original folder
         ab1_files = self.file_dao.get_files_by_extension(original_folder, ".ab1")
         if ab1_files:
@@ -400,94 +444,91 @@ class FolderProcessor:
             
             return
         
-        # Refresh directory contents
-        remaining_items = self.file_dao.get_directory_contents(original_folder, refresh=True)
+        remaining_items = self.file_dao.get_directory_contents(original_folder)
         
         # If completely empty, delete the folder
         if not remaining_items:
-            try:
-                os.rmdir(original_folder)
+            if self.file_dao.delete_empty_folder(original_folder):
                 self.logger(f"Deleted empty original folder: {original_folder}")
-                return
-            except Exception as e:
-                self.logger(f"Failed to delete original folder: {e}")
-                return
+            else:
+                self.logger(f"Failed to delete original folder: {original_folder}")
+            return
         
         # Try to move any remaining Control/Blank folders to the new location
         moved_all = True
+        snapshot = self.file_dao.get_snapshot(original_folder)
         for item in list(remaining_items):  # Create a copy of the list to avoid iteration issues
             item_path = os.path.join(original_folder, item)
             
             if item in ["Controls", "Blank", "Alternate Injections"]:
                 # Try to move this folder to the new location if it's not empty
-                if os.path.isdir(item_path) and os.listdir(item_path):
+                entry = snapshot.get(item)
+                is_dir = entry is not None and entry.is_dir
+                if is_dir and self.file_dao.get_directory_contents(item_path):
                     try:
                         # Create target folder in new location if needed
                         target_path = os.path.join(new_folder, item)
-                        if not os.path.exists(target_path):
-                            os.makedirs(target_path)
+                        self.file_dao.create_folder_if_not_exists(target_path)
                         
                         # Move all files from old to new location
-                        for subitem in os.listdir(item_path):
-                            old_file = os.path.join(item_path, subitem)
-                            new_file = os.path.join(target_path, subitem)
-                            if os.path.isfile(old_file):
-                                self.file_dao.move_file(old_file, new_file)
-                                self.logger(f"Moved remaining file {subitem} to {target_path}")
+                        for entry in self.file_dao.get_snapshot(item_path).files():
+                            new_file = os.path.join(target_path, entry.name)
+                            self.file_dao.move_file(entry.path, new_file)
+                            self.logger(f"Moved remaining file {entry.name} to {target_path}")
                         
                         # Check if folder is now empty and can be deleted
-                        if not os.listdir(item_path):
-                            os.rmdir(item_path)
+                        if not self.file_dao.get_directory_contents(item_path):
+                            self.file_dao.delete_empty_folder(item_path)
                             self.logger(f"Deleted now-empty folder: {item}")
                     except Exception as e:
                         self.logger(f"Failed to move remaining files from {item}: {e}")
                         moved_all = False
                         continue
-                elif os.path.isdir(item_path) and not os.listdir(item_path):
+                elif is_dir:
                     # Empty folder - delete it
-                    try:
-                        os.rmdir(item_path)
+                    if self.file_dao.delete_empty_folder(item_path):
                         self.logger(f"Deleted empty folder: {item}")
-                    except Exception as e:
-                        self.logger(f"Failed to delete empty folder {item}: {e}")
+                    else:
+                        self.logger(f"Failed to delete empty folder {item}")
                         moved_all = False
             else:
                 # Non-standard item
                 self.logger(f"Found non-standard item in folder: {item}")
                 moved_all = False
         
-        # Refresh contents one more time after all operations
-        remaining_items = self.file_dao.get_directory_contents(original_folder, refresh=True)
+        remaining_items = self.file_dao.get_directory_contents(original_folder)
         
         # If we've successfully cleaned everything up, try to delete the original folder
         if not remaining_items:
-            try:
-                os.rmdir(original_folder)
+            if self.file_dao.delete_empty_folder(original_folder):
                 self.logger(f"Deleted original folder after cleaning: {original_folder}")
-            except Exception as e:
-                self.logger(f"Failed to delete original folder: {e}")
+            else:
+                self.logger(f"Failed to delete original folder: {original_folder}")
         else:
             self.logger(f"Unable to clean up original folder. {len(remaining_items)} items remain.")
     
-    def _sort_pcr_file(self, file_path, pcr_number):
+    def _sort_pcr_file(self, file_path, pcr_number, normalized_name=None):
         """Sort a PCR file to the appropriate folder"""
+        plan = MovePlan(self.file_dao)
+        self._plan_pcr_file(plan, file_path, pcr_number, normalized_name)
+        return not self.execute_move_plan(plan).failed
+
+    def _plan_pcr_file(self, plan, file_path, pcr_number, normalized_name=None):
+        """Plan the move of a PCR file to its FB-PCR folder in the day folder"""
         file_name = os.path.basename(file_path)
         self.logger(f"Processing PCR file: {file_name} with PCR Number: {pcr_number}")
         
         # Get the day data folder
         day_data_path = os.path.dirname(os.path.dirname(file_path))
         
-        # Create PCR folder name and path
-        pcr_folder_name = f"FB-{pcr_number}"
-        pcr_folder_path = os.path.join(day_data_path, pcr_folder_name)
-        
-        # Create PCR folder if it doesn't exist
-        if not os.path.exists(pcr_folder_path):
-            os.makedirs(pcr_folder_path)
+        # PCR folder name and path
+        pcr_folder_path = os.path.join(day_data_path, f"FB-{pcr_number}")
+        plan.add_directory(pcr_folder_path)
         
-        # Use the same move file logic
-        normalized_name = self.file_dao.normalize_filename(file_name)
-        return self._move_file_to_destination(file_path, pcr_folder_path, normalized_name)
+        # Use the same placement logic as customer files
+        if normalized_name is None:
+            normalized_name = self.file_dao.normalize_filename(file_name)
+        return self._plan_file_placement(plan, file_path, pcr_folder_path, normalized_name, 'pcr')
 
     def _sort_control_file(self, file_path):
         """Sort a control file to the Controls folder"""
@@ -495,8 +536,7 @@ class FolderProcessor:
         controls_folder = os.path.join(parent_folder, "Controls")
         
         # Create Controls folder if it doesn't exist
-        if not os.path.exists(controls_folder):
-            os.makedirs(controls_folder)
+        self.file_dao.create_folder_if_not_exists(controls_folder)
         
         # Just move the file directly (no special handling needed)
         target_path = os.path.join(controls_folder, os.path.basename(file_path))
@@ -515,13 +555,11 @@ class FolderProcessor:
             bioi_folder_path = os.path.join(os.path.dirname(immediate_parent), bioi_folder_name)
             
             # Ensure BioI folder exists
-            if not os.path.exists(bioi_folder_path):
-                os.makedirs(bioi_folder_path)
+            self.file_dao.create_folder_if_not_exists(bioi_folder_path)
             
             # Create Blank folder inside BioI folder
             blank_folder = os.path.join(bioi_folder_path, "Blank")
-            if not os.path.exists(blank_folder):
-                os.makedirs(blank_folder)
+            self.file_dao.create_folder_if_not_exists(blank_folder)
             
             # Move file to Blank folder
             target_path = os.path.join(blank_folder, file_name)
@@ -530,11 +568,75 @@ class FolderProcessor:
             # Fallback to original logic if no I number found
             parent_folder = immediate_parent
             blank_folder = os.path.join(parent_folder, "Blank")
-            if not os.path.exists(blank_folder):
-                os.makedirs(blank_folder)
+            self.file_dao.create_folder_if_not_exists(blank_folder)
             target_path = os.path.join(blank_folder, file_name)
             return self.file_dao.move_file(file_path, target_path)
 
+    def get_file_classifier(self, plate=False):
+        """Get the compiled IND or plate file classifier"""
+        if plate not in self.file_classifiers:
+            self.file_classifiers[plate] = FileClassifier(self.config, self.file_dao, plate=plate)
+        return self.file_classifiers[plate]
+
+    # Plate sorting
+    def _classify_plate_folder(self, folder):
+        """Classify the ab1 files of a plate folder"""
+        ab1_files = self.file_dao.get_files_by_extension(folder, '.ab1')
+        return FileClassifier.group_by_kind(self.get_file_classifier(plate=True).classify_many(ab1_files))
+
+    def _move_records_to_subfolder(self, records, folder, subfolder_name):
+        """Move classified files into a subfolder of their plate folder"""
+        if not records:
+            return 0
+        destination = os.path.join(folder, subfolder_name)
+        start = time.perf_counter()
+        self.file_dao.create_folder_if_not_exists(destination)
+        moved = 0
+        for record in records:
+            if self.file_dao.move_file(record.path, os.path.join(destination, record.name)):
+                moved += 1
+            else:
+                self.logger(f"Failed to move {record.name} to {subfolder_name}")
+        self.record_timing('move', time.perf_counter() - start, len(records))
+        self.logger(f"Moved {moved} files to {destination}")
+        return moved
+
+    def plan_plate_folder(self, folder):
+        """Plan the plate sort (controls, blanks, brace removal) of a plate folder without touching it"""
+        plan = MovePlan(self.file_dao)
+        groups = self._classify_plate_folder(folder)
+        for kind, subfolder in ((FileClassifier.CONTROL, self.config.CONTROLS_FOLDER),
+                                (FileClassifier.BLANK, self.config.BLANK_FOLDER)):
+            for record in groups[kind]:
+                plan.add(record.path, os.path.join(folder, subfolder, record.name), kind)
+        for record in groups[FileClassifier.CUSTOMER]:
+            new_name = self.file_dao.regex_patterns['brace_content'].sub('', record.name)
+            if new_name != record.name:
+                plan.add(record.path, os.path.join(folder, new_name), 'rename')
+        return plan
+
+    def sort_controls(self, folder):
+        """Move plate control files into the Controls folder"""
+        groups = self._classify_plate_folder(folder)
+        return self._move_records_to_subfolder(groups[FileClassifier.CONTROL], folder, self.config.CONTROLS_FOLDER)
+
+    def sort_blanks(self, folder):
+        """Move plate blank files (01A__.ab1) into the Blank folder"""
+        groups = self._classify_plate_folder(folder)
+        return self._move_records_to_subfolder(groups[FileClassifier.BLANK], folder, self.config.BLANK_FOLDER)
+
+    def remove_braces_from_filenames(self, folder):
+        """Remove anything in braces from the ab1 file names of a plate folder"""
+        renamed = 0
+        start = time.perf_counter()
+        for file_path in self.file_dao.get_files_by_extension(folder, '.ab1'):
+            if self.file_dao.rename_file_without_braces(file_path) != file_path:
+                renamed += 1
+        if renamed:
+            self.record_timing('rename', time.perf_counter() - start, renamed)
+            self.logger(f"Removed braces from {renamed} file names")
+        return renamed
+
     def _rename_processed_folder(self, folder_path):
         """Rename the folder after processing"""
         i_num = self.file_dao.get_inumber_from_name(folder_path)
@@ -544,12 +646,10 @@ class FolderProcessor:
             
             # Only rename if the new name doesn't already exist
             if not os.path.exists(new_folder_path) and os.path.basename(folder_path) != new_folder_name:
-                try:
-                    os.rename(folder_path, new_folder_path)
+                if self.file_dao.move_folder(folder_path, new_folder_path):
                     self.logger(f"Renamed folder to: {new_folder_name}")
                     return True
-                except Exception as e:
-                    self.logger(f"Failed to rename folder: {e}")
+                self.logger(f"Failed to rename folder: {os.path.basename(folder_path)}")
         
         return False
     
@@ -558,9 +658,9 @@ class FolderProcessor:
         i_numbers = []
         bioi_folders = []
         
-        for item in self.file_dao.get_directory_contents(path):
-            item_path = os.path.join(path, item)
-            if os.path.isdir(item_path):
+        for entry in self.file_dao.get_snapshot(path):
+            item, item_path = entry.name, entry.path
+            if entry.is_dir:
                 # Check if it's a BioI folder
                 if self.file_dao.regex_patterns['inumber'].search(item):
                     i_num = self.file_dao.get_inumber_from_name(item)
@@ -574,55 +674,374 @@ class FolderProcessor:
         
         return i_numbers, bioi_folders
 
+    def get_order_catalog(self, order_key=None):
+        """Get the per-run order catalog, loading the order key only once"""
+        if self.order_catalog is None:
+            if order_key is None:
+                order_key = self.file_dao.load_order_key_index(self.config.KEY_FILE_PATH, self.read_only)
+            if order_key is None:
+                self.logger("Warning: Could not load order key file, unable to verify order counts")
+                order_key = []
+            self.order_catalog = OrderCatalog.from_order_key(order_key, self.file_dao.adjust_abi_chars)
+            self.logger(f"Built order catalog with {len(self.order_catalog)} orders")
+        return self.order_catalog
+
+    def _get_expected_file_count(self, order_number):
+        """Get expected number of files for an order based on the order key"""
+        return self.get_order_catalog().expected_count(order_number)
+
+    def _get_order_sample_names(self, order_number):
+        """Get ABI adjusted sample names for an order"""
+        return self.get_order_catalog().normalized_samples(order_number)
+
+    # mSeq processing
+    def check_order_status(self, folder):
+        """Check if an order folder has been processed, has braces, and has ab1 files"""
+        has_braces = False
+        has_ab1_files = False
+
+        # Check for mSeq artifacts
+        was_mseqed = self.file_dao.get_mseq_artifacts(folder) == self.config.MSEQ_ARTIFACTS
+
+        # Check for braces in ab1 files
+        for item in self.file_dao.get_directory_contents(folder):
+            if item.endswith('.ab1'):
+                has_ab1_files = True
+                if '{' in item or '}' in item:
+                    has_braces = True
+                    break
+
+        return was_mseqed, has_braces, has_ab1_files
+
+    def _move_to_not_ready(self, order_folder, day_data_path):
+        """Move an incomplete order folder to the IND Not Ready folder"""
+        plan = RunPlan('ind_auto_mseq')
+        self._plan_not_ready(plan, order_folder, day_data_path)
+        self.run_mseq_plan(plan)
+
+    def process_bio_folder(self, folder):
+        """Process a BioI folder (specialized for IND)"""
+        self.run_mseq_plan(self.plan_bio_folder(folder))
+
+    def plan_bio_folder(self, folder, plan=None):
+        """Decide the mSeq and Not Ready actions for the order folders of a BioI folder"""
+        plan = plan if plan is not None else RunPlan('ind_auto_mseq')
+        self.logger(f"Processing BioI folder: {os.path.basename(folder)}")
+        catalog = self.get_order_catalog()
+
+        # Get all order folders in this BioI folder
+        for order_folder in self.get_order_folders(folder):
+            # Skip Andreev's orders for mSeq processing
+            if self.config.ANDREEV_NAME in order_folder.lower():
+                continue
+
+            order_number = self.get_order_number_from_folder_name(order_folder)
+            ab1_files = self.file_dao.get_files_by_extension(order_folder, '.ab1')
+
+            # Check order status
+            was_mseqed, has_braces, has_ab1_files = self.check_order_status(order_folder)
+
+            if not was_mseqed and not has_braces:
+                # Process if we have the right number of ab1 files
+                if len(ab1_files) == catalog.expected_count(order_number):
+                    if has_ab1_files:
+                        plan.add('mseq', order_folder)
+                else:
+                    self._plan_not_ready(plan, order_folder, os.path.dirname(folder))
+        return plan
+
+    def process_order_folder(self, order_folder, data_folder_path):
+        """Process an order folder"""
+        self.run_mseq_plan(self.plan_order_folder(order_folder, data_folder_path))
+
+    def plan_order_folder(self, order_folder, data_folder_path, plan=None):
+        """Decide the mSeq and folder moves for an order folder"""
+        plan = plan if plan is not None else RunPlan('ind_auto_mseq')
+        self.logger(f"Processing order folder: {os.path.basename(order_folder)}")
+        catalog = self.get_order_catalog()
+
+        order_number = self.get_order_number_from_folder_name(order_folder)
+        ab1_files = self.file_dao.get_files_by_extension(order_folder, '.ab1')
+        expected_count = catalog.expected_count(order_number)
+        in_not_ready = os.path.basename(os.path.dirname(order_folder)) == self.config.IND_NOT_READY_FOLDER
+
+        # Skip Andreev's orders for mSeq processing
+        if self.config.ANDREEV_NAME in order_folder.lower():
+            # For Andreev's orders, just check if complete to move back if needed
+            if len(ab1_files) == expected_count and in_not_ready:
+                destination = self.get_destination_for_order(order_folder, data_folder_path)
+                plan.add('move_folder', order_folder, destination, "Andreev's order moved back")
+            return plan
+
+        # Check order status
+        was_mseqed, has_braces, has_ab1_files = self.check_order_status(order_folder)
+
+        # Process based on status
+        if not was_mseqed and not has_braces:
+            if len(ab1_files) == expected_count and has_ab1_files:
+                plan.add('mseq', order_folder)
+
+                # If processing from IND Not Ready, move it back
+                if in_not_ready:
+                    destination = self.get_destination_for_order(order_folder, data_folder_path)
+                    plan.add('move_folder', order_folder, destination, "Order moved back")
+            else:
+                self._plan_not_ready(plan, order_folder, os.path.dirname(data_folder_path))
+
+        # If already mSeqed but in IND Not Ready, move it back
+        elif was_mseqed and in_not_ready:
+            destination = self.get_destination_for_order(order_folder, data_folder_path)
+            plan.add('move_folder', order_folder, destination, "Processed order moved back")
+        return plan
+
+    def process_pcr_folder(self, folder):
+        """Process a PCR folder"""
+        self.run_mseq_plan(self.plan_pcr_folder(folder))
+
+    def plan_pcr_folder(self, folder, plan=None):
+        """Decide if a PCR folder gets mSeqed"""
+        plan = plan if plan is not None else RunPlan('ind_auto_mseq')
+        self.logger(f"Processing PCR folder: {os.path.basename(folder)}")
+
+        # Check if already processed
+        was_mseqed, has_braces, has_ab1_files = self.check_order_status(folder)
+
+        if not was_mseqed and not has_braces and has_ab1_files:
+            plan.add('mseq', folder)
+        else:
+            self.logger(f"mSeq NOT completed: {os.path.basename(folder)}")
+        return plan
+
+    def _plan_not_ready(self, plan, order_folder, day_data_path):
+        """Plan the move of an incomplete order folder to the IND Not Ready folder"""
+        not_ready_path = os.path.join(day_data_path, self.config.IND_NOT_READY_FOLDER)
+        plan.add('move_folder', order_folder, not_ready_path, "Order moved to Not Ready")
+
+    def run_mseq_plan(self, plan):
+        """Carry out planned mSeq runs and folder moves in order"""
+        for action in plan:
+            name = os.path.basename(action.source)
+            start = time.perf_counter()
+            if action.operation == 'mseq':
+                self.ui_automation.process_folder(action.source)
+                # mSeq wrote its output behind the DAO's back
+                self.file_dao.invalidate(action.source)
+                self.logger(f"mSeq completed: {name}")
+            elif action.operation == 'move_folder':
+                self.file_dao.create_folder_if_not_exists(action.destination)
+                self.file_dao.move_folder(action.source, action.destination)
+                self.logger(f"{action.detail}: {name}")
+            else:
+                continue
+            self.record_timing(action.operation, time.perf_counter() - start)
+
+    # Zipping
+    def get_order_zip_plan(self, folder, include_txt=True):
+        """Get (zip path, files to zip) for an order or PCR folder, None if it isn't ready to zip"""
+        snapshot = self.file_dao.get_snapshot(folder)
+        ab1_files = snapshot.files_with_extension('.ab1')
+        if not ab1_files:
+            return None
+
+        folder_name = os.path.basename(folder)
+        files = list(ab1_files)
+        if self.config.ANDREEV_NAME in folder_name.lower():
+            # Andreev's zips are named like 123456_I-20000.zip and only hold ab1 files
+            order_number = self.get_order_number_from_folder_name(folder)
+            i_number = self.get_inumber_from_folder_name(folder)
+            zip_name = f"{order_number}_I-{i_number}{self.config.ZIP_EXTENSION}"
+        else:
+            zip_name = folder_name + self.config.ZIP_EXTENSION
+            if include_txt:
+                # All 5 mSeq txt files have to be there
+                txt_files = snapshot.files_with_extension(tuple(self.config.TEXT_FILES))
+                if len(txt_files) != len(self.config.TEXT_FILES):
+                    return None
+                files.extend(txt_files)
+        return os.path.join(folder, zip_name), files
+
+    def zip_order_folder(self, folder, include_txt=True):
+        """Zip the ab1 (and mSeq txt) files of an order or PCR folder, returns the zip path"""
+        return self._zip_folder(folder, self.get_order_zip_plan(folder, include_txt))
+
+    def get_plate_zip_plan(self, folder, fsa_only=False):
+        """Get (zip path, files to zip) for a plate folder, None if it isn't ready to zip
+
+        Sequencing plates need ab1 files and all 5 mSeq txt files, fragment
+        analysis plates are zipped with their fsa files only.
+        """
+        snapshot = self.file_dao.get_snapshot(folder)
+        zip_path = os.path.join(folder, os.path.basename(folder) + self.config.ZIP_EXTENSION)
+        if not fsa_only:
+            ab1_files = snapshot.files_with_extension('.ab1')
+            txt_files = snapshot.files_with_extension(tuple(self.config.TEXT_FILES))
+            if ab1_files and len(txt_files) == len(self.config.TEXT_FILES):
+                return zip_path, ab1_files + txt_files
+        fsa_files = snapshot.files_with_extension(self.config.FSA_EXTENSION)
+        if fsa_files:
+            return zip_path, fsa_files
+        return None
+
+    def zip_plate_folder(self, folder, fsa_only=False):
+        """Zip the ab1 and mSeq txt files (or only the fsa files) of a plate folder, returns the zip path"""
+        return self._zip_folder(folder, self.get_plate_zip_plan(folder, fsa_only))
+
+    def _zip_folder(self, folder, zip_plan):
+        if zip_plan is None:
+            self.logger(f"Not ready to zip: {os.path.basename(folder)}")
+            return None
+
+        zip_path, files = zip_plan
+        start = time.perf_counter()
+        try:
+            self.file_dao.zip_file_list(zip_path, files)
+        except Exception as e:
+            self.logger(f"Error zipping {os.path.basename(folder)}: {e}")
+            return None
+        self.record_timing('zip', time.perf_counter() - start)
+        return zip_path
+
+    def zip_folders(self, jobs):
+        """Write the ZipJobs of several folders in the zip worker pool, returns the ZipReport"""
+        engine = ZipEngine(self.config.ZIP_WORKERS, self.logger, self.file_dao.get_compression_policy())
+        report = engine.run(jobs)
+        for result in report.zipped:
+            self.file_dao.register_file(result.job.zip_path)
+            if result.job.copy_path:
+                self.file_dao.register_file(result.job.copy_path)
+        if report.results:
+            # Wall-clock per archive, parallelism included, shared out between full writes
+            # and appends (planned as 'zip_append') by the worker time each took
+            worker_seconds = {}
+            for result in report.results:
+                operation = 'zip_append' if result.action == 'appended' else 'zip'
+                if result.action != 'unchanged':
+                    worker_seconds.setdefault(operation, []).append(result.seconds)
+            total_seconds = sum(result.seconds for result in report.results)
+            for operation, seconds in worker_seconds.items():
+                share = sum(seconds) / total_seconds if total_seconds > 0 else len(seconds) / len(report.results)
+                self.record_timing(operation, report.seconds * share, len(seconds))
+        return report
+
+    # Zip validation
+    def get_order_folders(self, bio_folder):
+        """Get order folders in a BioI folder, excluding reinject folders"""
+        return [folder for folder in self.file_dao.get_folders(bio_folder, r'bioi-\d+_.+_\d+')
+                if 'reinject' not in os.path.basename(folder).lower()]
+
+    def find_zip_file(self, folder):
+        """Get the path of the first zip file in a folder, None if there is none"""
+        zip_files = self.file_dao.get_files_by_extension(folder, self.config.ZIP_EXTENSION)
+        return zip_files[0] if zip_files else None
+
+    def get_inumber_from_folder_name(self, folder):
+        """Get the I number of a BioI or order folder"""
+        return self.file_dao.get_inumber_from_name(os.path.basename(folder))
+
+    def get_order_number_from_folder_name(self, folder):
+        """Get the order number from an order folder name like BioI-20000_Name_123456"""
+        folder_name = os.path.basename(folder)
+        if re.search(r'.+_\d+', folder_name):
+            order_num = re.search(r'_\d+', folder_name).group(0)
+            return re.search(r'\d+', order_num).group(0)
+        return ''
+
+    def validate_zip_contents(self, zip_path, i_number, order_number, order_key=None, zip_contents=None):
+        """Compare the ab1 and txt files in an order zip against the order key
+
+        Pass zip_contents when the member names were already read from the zip.
+        """
+        if zip_contents is None:
+            zip_contents = self.file_dao.get_zip_contents(zip_path)
+        return self._reconcile_order(self.get_order_catalog(order_key), i_number, order_number, zip_contents)
+
+    def validate_zip_batch(self, orders, order_key=None):
+        """validate_zip_contents for many orders, (i_number, order_number, zip_contents) each, one result per order"""
+        catalog = self.get_order_catalog(order_key)
+        return [self._reconcile_order(catalog, i_number, order_number, zip_contents)
+                for i_number, order_number, zip_contents in orders]
+
+    def _reconcile_order(self, catalog, i_number, order_number, zip_contents):
+        """Match an order's samples with the zip's ab1 files, then find the txt files
+
+        Every clean ab1 name maps to a queue of its files in zip order, so
+        each order item takes the first remaining file with its name in one
+        lookup. That is the pairing of legacy D's nested loop, duplicates
+        included, at a cost linear in the order and zip sizes.
+        """
+        order_items = list(zip(catalog.normalized_samples(order_number), catalog.samples(order_number)))
+        expected_count = len(order_items)
+        zip_contents = list(zip_contents)
+
+        ab1_files = {}  # clean name -> deque of positions in zip_contents
+        for position, zip_item in enumerate(zip_contents):
+            if zip_item.endswith('.ab1'):
+                clean_zip_item = self.file_dao.neutralize_suffixes(zip_item).replace('.ab1', '')
+                ab1_files.setdefault(clean_zip_item, deque()).append(position)
+
+        # Match order items to ab1 files, each file can only match once
+        matches = []
+        mismatches_in_order = []
+        matched_positions = set()
+        for adjusted_name, raw_name in order_items:
+            positions = ab1_files.get(adjusted_name)
+            if positions:
+                position = positions.popleft()
+                matched_positions.add(position)
+                matches.append({'raw_name': raw_name, 'file_name': zip_contents[position]})
+            else:
+                mismatches_in_order.append({'raw_name': raw_name})
+
+        zip_contents = [item for position, item in enumerate(zip_contents) if position not in matched_positions]
+        mismatches_in_zip = [item for item in zip_contents if item.endswith('.ab1')]
+
+        # Each mSeq output txt file should be present once
+        txt_files = []
+        for txt_ext in self.config.TEXT_FILES:
+            for zip_item in zip_contents:
+                if zip_item.endswith(txt_ext):
+                    txt_files.append(txt_ext)
+                    zip_contents.remove(zip_item)
+                    break
+
+        self.logger(f"Order {order_number}: {len(matches)}/{expected_count} matches, {len(txt_files)} txt files")
+        return {
+            'i_number': i_number,
+            'order_number': order_number,
+            'expected_count': expected_count,
+            'match_count': len(matches),
+            'mismatch_count': len(mismatches_in_zip) + len(mismatches_in_order),
+            'txt_count': len(txt_files),
+            'matches': matches,
+            'mismatches_in_zip': mismatches_in_zip,
+            'mismatches_in_order': mismatches_in_order,
+            'txt_files': txt_files
+        }
+
+    def get_spreadsheet_catalog(self):
+        """Get the per-run catalog of the plate spreadsheet folders"""
+        if self.spreadsheet_catalog is None:
+            self.spreadsheet_catalog = SpreadsheetCatalog(
+                [self.config.SPREADSHEETS_PATH, self.config.ABI_UPLOADED_PATH],
+                cache_path=self.config.SPREADSHEET_CACHE_PATH,
+                logger=self.logger
+            )
+        return self.spreadsheet_catalog
+
     def get_reinject_list(self, i_numbers, reinject_path=None):
-        """Get list of reactions that are reinjects - optimized version"""
-        import re
-        import os
-        import numpy as np
-        
-        reinject_list = []
-        raw_reinject_list = []
-        
-        # Cache of processed text files to avoid reprocessing
-        processed_files = set()
-        
-        # Process text files only once
-        spreadsheets_path = r'G:\Lab\Spreadsheets'
-        abi_path = os.path.join(spreadsheets_path, 'Individual Uploaded to ABI')
-        
-        # Build a list of potential reinject files first
-        reinject_files = []
-        
-        # Scan directories once
-        if os.path.exists(spreadsheets_path):
-            for file in self.file_dao.get_directory_contents(spreadsheets_path):
-                if 'reinject' in file.lower() and file.endswith('.txt'):
-                    # Check if any of our I numbers are in the filename
-                    if any(i_num in file for i_num in i_numbers):
-                        reinject_files.append(os.path.join(spreadsheets_path, file))
-        
-        if os.path.exists(abi_path):
-            for file in self.file_dao.get_directory_contents(abi_path):
-                if 'reinject' in file.lower() and file.endswith('.txt'):
-                    # Check if any of our I numbers are in the filename
-                    if any(i_num in file for i_num in i_numbers):
-                        reinject_files.append(os.path.join(abi_path, file))
-        
-        # Process each found reinject file
-        for file_path in reinject_files:
+        """Get a ReinjectIndex of reactions that are reinjects - optimized version"""
+        reinject_index = ReinjectIndex(
+            lambda name: self.file_dao.normalize_filename(name, remove_extension=False)
+        )
+        
+        # Both spreadsheet folders are listed once, parsed plates come from the local cache
+        catalog = self.get_spreadsheet_catalog()
+        
+        # Process each found reinject file (rows B6:B101 in Excel terms)
+        for file_path in catalog.reinject_files(i_numbers):
             try:
-                if file_path in processed_files:
-                    continue
-                    
-                processed_files.add(file_path)
-                data = np.loadtxt(file_path, dtype=str, delimiter='\t')
-                
-                # Parse rows 5-101 (B6:B101 in Excel terms)
-                for j in range(5, min(101, data.shape[0])):
-                    if j < data.shape[0] and data.shape[1] > 1:
-                        raw_reinject_list.append(data[j, 1])
-                        cleaned_name = self.file_dao.clean_braces_format(data[j, 1])
-                        reinject_list.append(cleaned_name)
+                for sample_name in catalog.get_plate_samples(file_path):
+                    reinject_index.add(sample_name)
             except Exception as e:
                 self.logger(f"Error processing reinject file {file_path}: {e}")
         
@@ -636,56 +1055,49 @@ class FolderProcessor:
                 sheet = db.ws('Sheet1')
                 
                 # Get reinject entries from Excel
-                reinject_prep_list = []
+                reinject_prep_set = set()
                 for row in range(1, sheet.maxrow + 1):
                     if sheet.maxcol >= 2:  # Ensure we have at least 2 columns
                         sample = sheet.index(row, 1)  # Use index instead of address
                         primer = sheet.index(row, 2)  # Use index instead of address
                         if sample and primer:
-                            reinject_prep_list.append(sample + primer)
+                            reinject_prep_set.add(sample + primer)
                 
-                # Convert to numpy array for easier searching
-                reinject_prep_array = np.array(reinject_prep_list)
-                
-                # Check for partial plate reinjects by comparing against reinject_prep_array
+                # Check for partial plate reinjects against the reinject prep entries
+                txt_files = []
                 for i_num in i_numbers:
-                    # Check all txt files for this I number
-                    # Fix: Change glob pattern to valid regex pattern
-                    regex_pattern = f'.*{i_num}.*txt'
-                    txt_files = []
-                    
-                    for file in self.file_dao.get_directory_contents(spreadsheets_path):
-                        if re.search(regex_pattern, file, re.IGNORECASE) and not 'reinject' in file:
-                            txt_files.append(os.path.join(spreadsheets_path, file))
-                    
-                    if os.path.exists(abi_path):
-                        for file in self.file_dao.get_directory_contents(abi_path):
-                            if re.search(regex_pattern, file, re.IGNORECASE) and not 'reinject' in file:
-                                txt_files.append(os.path.join(abi_path, file))
-                    
-                    # Check each txt file for matches against reinject_prep_array
-                    for file_path in txt_files:
-                        try:
-                            data = np.loadtxt(file_path, dtype=str, delimiter='\t')
-                            for j in range(5, min(101, data.shape[0])):
-                                if j < data.shape[0] and data.shape[1] > 1:
-                                    # Check if this sample is in the reinject list
-                                    sample_name = data[j, 1][5:] if len(data[j, 1]) > 5 else data[j, 1]
-                                    indices = np.where(reinject_prep_array == sample_name)[0]
-                                    
-                                    if len(indices) > 0:
-                                        raw_reinject_list.append(data[j, 1])
-                                        cleaned_name = self.file_dao.clean_braces_format(data[j, 1])
-                                        reinject_list.append(cleaned_name)
-                        except Exception as e:
-                            self.logger(f"Error processing txt file {file_path}: {e}")
+                    for file_path in catalog.plate_files(i_num):
+                        if file_path not in txt_files:
+                            txt_files.append(file_path)
+                
+                for file_path in txt_files:
+                    try:
+                        for sample_name in catalog.get_plate_samples(file_path):
+                            # Strip the {well} prefix before comparing
+                            prep_name = sample_name[5:] if len(sample_name) > 5 else sample_name
+                            if prep_name in reinject_prep_set:
+                                reinject_index.add(sample_name)
+                    except Exception as e:
+                        self.logger(f"Error processing txt file {file_path}: {e}")
             
             except Exception as e:
                 self.logger(f"Error processing reinject Excel file: {e}")
         
-        # Store the raw_reinject_list for reference in _move_file_to_destination
-        self.raw_reinject_list = raw_reinject_list
-        return reinject_list
+        if not self.read_only:
+            catalog.save_cache()
+        
+        # Store the index for reference in _move_file_to_destination
+        self.reinject_index = reinject_index
+        return reinject_index
+
+    def _as_reinject_index(self, reinject_list):
+        """Accept a ReinjectIndex or a plain list of raw reinject names"""
+        if reinject_list is None or isinstance(reinject_list, ReinjectIndex):
+            return reinject_list
+        return ReinjectIndex(
+            lambda name: self.file_dao.normalize_filename(name, remove_extension=False),
+            reinject_list
+        )
 
 if __name__ == "__main__":
     # Simple test if run directly
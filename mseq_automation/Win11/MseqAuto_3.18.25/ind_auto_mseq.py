@@ -11,6 +11,7 @@ from ui_automation import MseqAutomation
 import re
 import time
 from logger import setup_logger
+from run_plan import OperationTimings, RunPlan, report_dry_run
 
 # Check for 32-bit Python requirement - gracefully fallback if not available
 if sys.maxsize > 2**32:
@@ -23,7 +24,7 @@ if sys.maxsize > 2**32:
         script_path = os.path.abspath(__file__)
         
         # Re-run this script with 32-bit Python and exit current process
-        subprocess.run([py32_path, script_path])
+        subprocess.run([py32_path, script_path] + sys.argv[1:])
         sys.exit(0)
     else:
         print("32-bit Python not specified or same as current interpreter")
@@ -63,20 +64,30 @@ def main():
     logger.info("Config loaded")
     file_dao = FileSystemDAO(config)
     logger.info("FileSystemDAO initialized")
-    ui_automation = MseqAutomation(config)
+    
+    # Dry run: plan everything, don't start mSeq or touch any folder
+    dry_run = '--dry-run' in sys.argv
+    timings = OperationTimings(config.TIMINGS_PATH)
+    
+    ui_automation = None if dry_run else MseqAutomation(config)
     logger.info("UI Automation initialized")
     processor = FolderProcessor(file_dao, ui_automation, config, logger=logger.info)
+    processor.timings = timings
+    processor.read_only = dry_run
     logger.info("Folder processor initialized")
     
     # Run batch file to generate order key
-    try:
-        logger.info(f"Running batch file: {config.BATCH_FILE_PATH}")
-        subprocess.run(config.BATCH_FILE_PATH, shell=True, check=True)
-        logger.info("Batch file completed successfully")
-    except subprocess.CalledProcessError:
-        logger.error(f"Batch file {config.BATCH_FILE_PATH} failed to run")
-        print(f"Error: Batch file {config.BATCH_FILE_PATH} failed to run")
-        return
+    if dry_run:
+        logger.info("Dry run - using the existing order key")
+    else:
+        try:
+            logger.info(f"Running batch file: {config.BATCH_FILE_PATH}")
+            subprocess.run(config.BATCH_FILE_PATH, shell=True, check=True)
+            logger.info("Batch file completed successfully")
+        except subprocess.CalledProcessError:
+            logger.error(f"Batch file {config.BATCH_FILE_PATH} failed to run")
+            print(f"Error: Batch file {config.BATCH_FILE_PATH} failed to run")
+            return
     
     # Select folder
     data_folder = get_folder_from_user()
@@ -89,6 +100,9 @@ def main():
     logger.info(f"Using folder: {data_folder}")
     data_folder = re.sub(r'/', '\\\\', data_folder)
     
+    # Build the order catalog once for expected counts of every order
+    processor.get_order_catalog()
+    
     # Process BioI folders
     bio_folders = file_dao.get_folders(data_folder, r'bioi-\d+')
     logger.info(f"Found {len(bio_folders)} BioI folders")
@@ -99,6 +113,19 @@ def main():
     pcr_folders = file_dao.get_folders(data_folder, r'fb-pcr\d+_\d+')
     logger.info(f"Found {len(pcr_folders)} PCR folders")
     
+    # Dry run - decide every mSeq run and folder move, export the plan
+    if dry_run:
+        plan = RunPlan("ind_auto_mseq")
+        for folder in bio_folders:
+            processor.plan_bio_folder(folder, plan)
+        for folder in immediate_orders:
+            processor.plan_order_folder(folder, data_folder, plan)
+        for folder in pcr_folders:
+            processor.plan_pcr_folder(folder, plan)
+        report_dry_run(plan, timings, config.DRY_RUN_FOLDER, logger.info)
+        print("Dry run done, mSeq was not started")
+        return
+    
     # Process BioI folders
     for i, folder in enumerate(bio_folders):
         logger.info(f"Processing BioI folder {i+1}/{len(bio_folders)}: {os.path.basename(folder)}")
@@ -118,6 +145,7 @@ def main():
         logger.info(f"Processing PCR folder {i+1}/{len(pcr_folders)}: {os.path.basename(folder)}")
         processor.process_pcr_folder(folder)
     
+    timings.save()
     logger.info("All processing completed")
     print("")
     print("ALL DONE")
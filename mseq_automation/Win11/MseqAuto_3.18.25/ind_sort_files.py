@@ -6,12 +6,15 @@ from tkinter import filedialog
 import subprocess
 import re
 from datetime import datetime, timedelta
-import numpy as np
 
 from config import MseqConfig
 from file_system_dao import FileSystemDAO
 from folder_processor import FolderProcessor
+from ingest_watcher import IngestWatcher
+from move_plan import MovePlan
+from sort_journal import SortJournal
 from logger import setup_logger
+from run_plan import OperationTimings, RunPlan, report_dry_run
 
 # Check for 32-bit Python requirement - gracefully fallback if not available
 if sys.maxsize > 2**32:
@@ -24,7 +27,7 @@ if sys.maxsize > 2**32:
         script_path = os.path.abspath(__file__)
         
         # Re-run this script with 32-bit Python and exit current process
-        subprocess.run([py32_path, script_path])
+        subprocess.run([py32_path, script_path] + sys.argv[1:])
         sys.exit(0)
     else:
         print("32-bit Python not specified or same as current interpreter")
@@ -97,15 +100,26 @@ def main():
     processor = FolderProcessor(file_dao, None, config, logger=logger.info)
     logger.info("Folder processor initialized")
     
+    # Dry run: plan everything, touch nothing
+    dry_run = '--dry-run' in sys.argv
+    # Watch mode: keep sorting files as the sequencers write them
+    watch = '--watch' in sys.argv
+    timings = OperationTimings(config.TIMINGS_PATH)
+    processor.timings = timings
+    processor.read_only = dry_run
+    
     # Run batch file to generate order key
-    try:
-        logger.info(f"Running batch file: {config.BATCH_FILE_PATH}")
-        subprocess.run(config.BATCH_FILE_PATH, shell=True, check=True)
-        logger.info("Batch file completed successfully")
-    except subprocess.CalledProcessError:
-        logger.error(f"Batch file {config.BATCH_FILE_PATH} failed to run")
-        print(f"Error: Batch file {config.BATCH_FILE_PATH} failed to run")
-        return
+    if dry_run:
+        logger.info("Dry run - using the existing order key")
+    else:
+        try:
+            logger.info(f"Running batch file: {config.BATCH_FILE_PATH}")
+            subprocess.run(config.BATCH_FILE_PATH, shell=True, check=True)
+            logger.info("Batch file completed successfully")
+        except subprocess.CalledProcessError:
+            logger.error(f"Batch file {config.BATCH_FILE_PATH} failed to run")
+            print(f"Error: Batch file {config.BATCH_FILE_PATH} failed to run")
+            return
     
     # Select folder
     data_folder = get_folder_from_user()
@@ -128,10 +142,14 @@ def main():
     recent_inumbers = get_recent_inumbers(file_dao, config, logger)
     logger.info(f"Using recent I numbers: {recent_inumbers}")
     
-    # Load order key and adjust characters
-    order_key = file_dao.load_order_key(config.KEY_FILE_PATH)
+    # Load compiled order key index (rebuilt only if the key file changed)
+    order_key = file_dao.load_order_key_index(config.KEY_FILE_PATH, read_only=dry_run)
     logger.info("Order key loaded")
     
+    # Index only the active I numbers up front, the rest of the key is a lazy fallback
+    active_inumbers = set(recent_inumbers) | set(i_numbers)
+    processor.build_order_key_index(order_key, active_inumbers)
+    
     # Get complete list of reinjects
     reinject_path = f"P:\\Data\\Reinjects\\Reinject List_{datetime.now().strftime('%m-%d-%Y')}.xlsx"
     try:
@@ -141,11 +159,39 @@ def main():
         logger.error(f"Error loading reinject list: {e}")
         reinject_list = []
     
-    # Process each BioI folder
-    for i, folder in enumerate(bio_folders):
-        logger.info(f"Processing folder {i+1}/{len(bio_folders)}: {os.path.basename(folder)}")
-        processor.sort_ind_folder(folder, reinject_list, order_key, recent_inumbers)
+    # Dry run - plan every folder into one plan and export it
+    if dry_run:
+        move_plan = MovePlan(file_dao)
+        for folder in bio_folders:
+            processor.plan_ind_folder(folder, reinject_list, order_key, recent_inumbers, move_plan)
+        plan = RunPlan("ind_sort_files")
+        plan.add_move_plan(move_plan)
+        report_dry_run(plan, timings, config.DRY_RUN_FOLDER, logger.info)
+        print("Dry run done, nothing was moved")
+        return
+    
+    # Finish whatever an interrupted run left behind, then journal this run
+    journal = SortJournal(os.path.join(data_folder, config.SORT_JOURNAL_NAME), config.SORT_JOURNAL_SYNC_BATCH)
+    processor.resume_from_journal(journal)
+    processor.journal = journal
     
+    try:
+        if watch:
+            # Sort files as they land until stopped, a regular run afterwards cleans up the folders
+            watcher = IngestWatcher(processor, data_folder, reinject_list, order_key, recent_inumbers,
+                                    config.WATCH_POLL_SECONDS, config.WATCH_SETTLE_SECONDS, logger.info,
+                                    reinject_path)
+            watcher.run()
+        else:
+            # Process each BioI folder
+            for i, folder in enumerate(bio_folders):
+                logger.info(f"Processing folder {i+1}/{len(bio_folders)}: {os.path.basename(folder)}")
+                processor.sort_ind_folder(folder, reinject_list, order_key, recent_inumbers)
+    finally:
+        journal.close()
+    
+    timings.save()
+    logger.info(processor.get_destination_resolver().summary())
     logger.info("All folders processed")
     print("All done!")
 
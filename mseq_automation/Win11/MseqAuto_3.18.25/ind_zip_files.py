@@ -10,17 +10,8 @@ from config import MseqConfig
 from file_system_dao import FileSystemDAO
 from folder_processor import FolderProcessor
 from logger import setup_logger
-
-# Check for 32-bit Python requirement
-if sys.maxsize > 2**32:
-    py32_path = MseqConfig.PYTHON32_PATH
-    if os.path.exists(py32_path) and py32_path != sys.executable:
-        script_path = os.path.abspath(__file__)
-        subprocess.run([py32_path, script_path])
-        sys.exit(0)
-    else:
-        print("32-bit Python not specified or same as current interpreter")
-        print("Continuing with current Python interpreter")
+from run_plan import OperationTimings, RunPlan, report_dry_run
+from zip_engine import ZipJob, get_zip_changes
 
 def get_folder_from_user():
     """Get folder selection from user"""
@@ -40,6 +31,59 @@ def get_folder_from_user():
         print("No folder selected")
         return None
 
+def get_zip_folders(processor, file_dao, config, data_folder, logger):
+    """Get (folder, include txt files) of every order and PCR folder to zip"""
+    folders = []
+    bio_folders = file_dao.get_folders(data_folder, pattern=r'bioi-\d+')
+    logger.info(f"Found {len(bio_folders)} BioI folders")
+    for bio_folder in bio_folders:
+        order_folders = processor.get_order_folders(bio_folder)
+        logger.info(f"Found {len(order_folders)} order folders in {os.path.basename(bio_folder)}")
+        for order_folder in order_folders:
+            # Special handling for Andreev orders
+            is_andreev = config.ANDREEV_NAME in os.path.basename(order_folder).lower()
+            folders.append((order_folder, not is_andreev))
+    
+    pcr_folders = file_dao.get_folders(data_folder, pattern=r'fb-pcr\d+_\d+')
+    logger.info(f"Found {len(pcr_folders)} PCR folders")
+    for pcr_folder in pcr_folders:
+        folders.append((pcr_folder, True))
+    return folders
+
+def plan_dry_run(processor, file_dao, config, data_folder, zip_dump_folder, timings, logger, update=False):
+    """Plan the zips and zip dump copies of a data folder and export the plan"""
+    plan = RunPlan("ind_zip_files")
+    if not os.path.exists(zip_dump_folder):
+        plan.add('create_folder', zip_dump_folder)
+    for folder, include_txt in get_zip_folders(processor, file_dao, config, data_folder, logger):
+        has_zip = file_dao.check_for_zip(folder)
+        if has_zip and not update:
+            plan.add('skip', folder, '', 'already has zip file')
+            continue
+        zip_plan = processor.get_order_zip_plan(folder, include_txt)
+        if zip_plan is None:
+            plan.add('skip', folder, '', 'not ready to zip')
+            continue
+        zip_path, files = zip_plan
+        if has_zip:
+            if not os.path.exists(zip_path):
+                plan.add('skip', folder, '', 'zip file has another name')
+                continue
+            changes = get_zip_changes(zip_path, files)
+            if changes.changed or changes.removed:
+                plan.add('zip', folder, zip_path, f"rewrite: {len(changes.new)} new, {len(changes.changed)} changed, "
+                                                  f"{len(changes.removed)} removed")
+            elif changes.new:
+                plan.add('zip_append', folder, zip_path, f"{len(changes.new)} new files")
+            else:
+                plan.add('skip', folder, '', 'zip file is up to date')
+            continue
+        copy_path = os.path.join(zip_dump_folder, os.path.basename(zip_path))
+        plan.add('zip', folder, zip_path, f"{len(files)} files, copy to {copy_path}")
+    
+    report_dry_run(plan, timings, config.DRY_RUN_FOLDER, logger.info)
+    print("Dry run done, nothing was zipped")
+
 def main():
     # Setup logger
     logger = setup_logger("ind_zip_files")
@@ -53,6 +97,13 @@ def main():
     processor = FolderProcessor(file_dao, None, config, logger=logger.info)
     logger.info("Folder processor initialized")
     
+    # Dry run: plan everything, touch nothing
+    dry_run = '--dry-run' in sys.argv
+    # Update mode: bring existing zips up to date with late injections instead of skipping them
+    update = '--update' in sys.argv
+    timings = OperationTimings(config.TIMINGS_PATH)
+    processor.timings = timings
+    
     # Select folder
     data_folder = get_folder_from_user()
     
@@ -65,75 +116,62 @@ def main():
     
     # Create zip dump folder
     zip_dump_folder = os.path.join(data_folder, config.ZIP_DUMP_FOLDER)
+    if dry_run:
+        plan_dry_run(processor, file_dao, config, data_folder, zip_dump_folder, timings, logger, update)
+        return
     if not os.path.exists(zip_dump_folder):
         os.makedirs(zip_dump_folder)
         logger.info(f"Created zip dump folder: {zip_dump_folder}")
     
-    # Get BioI folders
-    bio_folders = file_dao.get_folders(data_folder, pattern=r'bioi-\d+')
-    logger.info(f"Found {len(bio_folders)} BioI folders")
-    
-    # Get PCR folders
-    pcr_folders = file_dao.get_folders(data_folder, pattern=r'fb-pcr\d+_\d+')
-    logger.info(f"Found {len(pcr_folders)} PCR folders")
+    # Plan an archive for every order and PCR folder that is ready
+    jobs = []
+    for folder, include_txt in get_zip_folders(processor, file_dao, config, data_folder, logger):
+        # Check if folder already has a zip file
+        has_zip = file_dao.check_for_zip(folder)
+        if has_zip and not update:
+            logger.info(f"Skipping {os.path.basename(folder)} - already has zip file")
+            continue
+        zip_plan = processor.get_order_zip_plan(folder, include_txt)
+        if zip_plan is None:
+            logger.warning(f"Failed to zip {os.path.basename(folder)} - not ready to zip")
+            continue
+        zip_path, files = zip_plan
+        if has_zip and not os.path.exists(zip_path):
+            logger.warning(f"Skipping {os.path.basename(folder)} - its zip file has another name")
+            continue
+        jobs.append(ZipJob(folder, zip_path, files, os.path.join(zip_dump_folder, os.path.basename(zip_path)), has_zip))
     
-    # Process BioI folders
+    # Zip all folders in the worker pool, each zip goes to the dump folder in the same pass
+    logger.info(f"Zipping {len(jobs)} folders with {config.ZIP_WORKERS} workers")
+    report = processor.zip_folders(jobs)
     order_count = 0
-    for bio_folder in bio_folders:
-        # Get order folders
-        order_folders = processor.get_order_folders(bio_folder)
-        logger.info(f"Found {len(order_folders)} order folders in {os.path.basename(bio_folder)}")
-        
-        for order_folder in order_folders:
-            # Check if order already has a zip file
-            if file_dao.check_for_zip(order_folder):
-                logger.info(f"Skipping {os.path.basename(order_folder)} - already has zip file")
-                continue
-            
-            # Special handling for Andreev orders
-            is_andreev = config.ANDREEV_NAME in os.path.basename(order_folder).lower()
-            
-            # Zip the order folder
-            logger.info(f"Zipping {os.path.basename(order_folder)}")
-            zip_path = processor.zip_order_folder(order_folder, include_txt=not is_andreev)
-            
-            if zip_path:
-                # Copy zip to dump folder
-                logger.info(f"Copying zip to dump folder: {os.path.basename(zip_path)}")
-                file_dao.copy_zip_to_dump(zip_path, zip_dump_folder)
-                order_count += 1
-                
-                logger.info(f"Successfully processed {os.path.basename(order_folder)}")
-            else:
-                logger.warning(f"Failed to zip {os.path.basename(order_folder)}")
-    
-    # Process PCR folders
-    for pcr_folder in pcr_folders:
-        # Check if PCR folder already has a zip file
-        if file_dao.check_for_zip(pcr_folder):
-            logger.info(f"Skipping {os.path.basename(pcr_folder)} - already has zip file")
+    for result in report.zipped:
+        if result.action == 'unchanged':
             continue
-        
-        # Zip the PCR folder
-        logger.info(f"Zipping {os.path.basename(pcr_folder)}")
-        zip_path = processor.zip_order_folder(pcr_folder, include_txt=True)
-        
-        if zip_path:
-            # Copy zip to dump folder
-            logger.info(f"Copying zip to dump folder: {os.path.basename(zip_path)}")
-            file_dao.copy_zip_to_dump(zip_path, zip_dump_folder)
-            
-            logger.info(f"Successfully processed {os.path.basename(pcr_folder)}")
-        else:
-            logger.warning(f"Failed to zip {os.path.basename(pcr_folder)}")
+        order_count += 1
+        logger.info(f"Successfully processed {os.path.basename(result.job.folder)}")
     
     # Remove empty zip dump folder if nothing was processed
     if order_count == 0 and os.path.exists(zip_dump_folder) and not os.listdir(zip_dump_folder):
         os.rmdir(zip_dump_folder)
         logger.info("Removed empty zip dump folder")
     
+    timings.save()
     logger.info(f"Total orders zipped: {order_count}")
     print(f"All done! {order_count} orders zipped.")
 
 if __name__ == "__main__":
+    # Check for 32-bit Python requirement. Only when run as a script: the zip
+    # workers are spawned processes that import this module as __mp_main__ and
+    # must not relaunch or print
+    if sys.maxsize > 2**32:
+        py32_path = MseqConfig.PYTHON32_PATH
+        if os.path.exists(py32_path) and py32_path != sys.executable:
+            script_path = os.path.abspath(__file__)
+            subprocess.run([py32_path, script_path] + sys.argv[1:])
+            sys.exit(0)
+        else:
+            print("32-bit Python not specified or same as current interpreter")
+            print("Continuing with current Python interpreter")
+    
     main()
\ No newline at end of file
@@ -0,0 +1,177 @@
+# ingest_watcher.py
+import os
+import time
+
+
+class IngestWatcher:
+    """Long-running watch mode that sorts .ab1 files of a day folder as they land
+
+    There are no file notifications on the SMB share, so the day folder and
+    its unsorted BioI folders are polled through FileSystemDAO snapshots,
+    which only relist a folder when its mtime changed. Each listing is
+    diffed against the files already seen: a new file is only sorted once
+    its size and mtime stayed the same for settle_seconds, so files the
+    sequencer is still writing are skipped. A folder with such unsettled
+    files is relisted every poll, as a growing file doesn't touch the
+    folder's mtime.
+
+    The order key and the reinject list are checked every poll the same way:
+    the key file and the spreadsheet folders are stat'ed, and only reloaded
+    when they changed, so reinjects added during the day are routed.
+
+    Emptied BioI folders are left in place, the regular sort run removes them.
+    """
+
+    def __init__(self, processor, data_folder, reinject_list, order_key, recent_inumbers,
+                 poll_seconds=15, settle_seconds=30, logger=None, reinject_path=None):
+        self.processor = processor
+        self.file_dao = processor.file_dao
+        self.config = processor.config
+        self.data_folder = data_folder
+        self.reinject_list = reinject_list
+        self.reinject_path = reinject_path
+        self.order_key = order_key
+        self.recent_inumbers = recent_inumbers
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.logger = logger or print
+        self.pending = {}  # path -> ((size, mtime), time first seen with that signature)
+        self.handled = set()  # paths already planned, moved ones drop out once they are gone
+        self.unmatched = set()  # paths left in place, retried when the order key changes
+        self.retry = set()  # settled unmatched paths to plan again on the next poll
+        self.key_signature = self._get_key_signature()
+        self.reinject_signature = self._get_reinject_signature()
+        self.sorted_count = 0
+
+    def _get_key_signature(self):
+        try:
+            stat = os.stat(self.config.KEY_FILE_PATH)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def _get_reinject_signature(self):
+        """mtimes of the spreadsheet folders and the reinject list, a new reinject file changes one"""
+        paths = [self.config.SPREADSHEETS_PATH, self.config.ABI_UPLOADED_PATH]
+        if self.reinject_path:
+            paths.append(self.reinject_path)
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_size, stat.st_mtime))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def check_reinject_list(self):
+        """Reload the reinject list when a spreadsheet folder or the reinject list changed"""
+        signature = self._get_reinject_signature()
+        if signature == self.reinject_signature:
+            return False
+        try:
+            self.processor.get_spreadsheet_catalog().scan()
+            reinject_list = self.processor.get_reinject_list(self.recent_inumbers, self.reinject_path)
+        except Exception as e:
+            # Keep the current list, the next change tries again
+            self.logger(f"Error reloading reinject list: {e}")
+            return False
+        self.reinject_signature = signature
+        self.reinject_list = reinject_list
+        self.logger(f"Reinject list changed, {len(reinject_list)} reinjects")
+        return True
+
+    def check_order_key(self):
+        """Reload the order key index when the key file changed, so unmatched files get another try"""
+        signature = self._get_key_signature()
+        if signature is None or signature == self.key_signature:
+            return False
+        order_key = self.file_dao.load_order_key_index(self.config.KEY_FILE_PATH)
+        if order_key is None:
+            return False
+        self.key_signature = signature
+        self.order_key = order_key
+        i_numbers, _ = self.processor.get_todays_inumbers_from_folder(self.data_folder)
+        self.processor.refresh_order_key_index(order_key, set(self.recent_inumbers) | set(i_numbers))
+        self.logger(f"Order key changed, retrying {len(self.unmatched)} unmatched files")
+        self.handled -= self.unmatched
+        self.retry |= self.unmatched
+        self.unmatched.clear()
+        return True
+
+    def _is_settled(self, entry, now):
+        """True once a file kept the same size and mtime for settle_seconds"""
+        signature = (entry.size, entry.mtime)
+        seen = self.pending.get(entry.path)
+        if seen is None or seen[0] != signature:
+            self.pending[entry.path] = (signature, now)
+            return False
+        return entry.size > 0 and now - seen[1] >= self.settle_seconds
+
+    def find_settled_files(self, now=None):
+        """Diff the BioI folder listings against the files seen so far, returns {folder: [settled .ab1 paths]}"""
+        now = time.time() if now is None else now
+        _, bio_folders = self.processor.get_todays_inumbers_from_folder(self.data_folder)
+        pending_folders = {os.path.dirname(path) for path in self.pending}
+
+        settled = {}
+        present = set()
+        for folder in bio_folders:
+            snapshot = self.file_dao.get_snapshot(folder, refresh=folder in pending_folders)
+            for entry in snapshot:
+                if entry.is_dir or not entry.name.endswith('.ab1'):
+                    continue
+                present.add(entry.path)
+                if entry.path in self.handled:
+                    continue
+                if entry.path in self.retry or self._is_settled(entry, now):
+                    self.pending.pop(entry.path, None)
+                    settled.setdefault(folder, []).append(entry.path)
+
+        # Forget files that were moved or deleted
+        self.pending = {path: seen for path, seen in self.pending.items() if path in present}
+        self.handled &= present
+        self.unmatched &= present
+        self.retry.clear()
+        return settled
+
+    def sort_files(self, folder, file_paths):
+        """Plan and move settled files of one BioI folder"""
+        plan, _ = self.processor.plan_ind_folder(folder, self.reinject_list, self.order_key,
+                                                 self.recent_inumbers, ab1_files=file_paths)
+        report = self.processor.execute_move_plan(plan)
+        self.handled.update(file_paths)
+        self.unmatched.update(source for source, _ in plan.unmatched)
+        self.unmatched.update(result.move.source for result in report.results if not result.success)
+        self.sorted_count += report.moved
+        return report
+
+    def poll(self, now=None):
+        """One pass over the day folder, returns the number of files moved"""
+        self.check_order_key()
+        self.check_reinject_list()
+        moved = 0
+        for folder, file_paths in self.find_settled_files(now).items():
+            self.logger(f"Sorting {len(file_paths)} new files from {os.path.basename(folder)}")
+            moved += self.sort_files(folder, file_paths).moved
+        return moved
+
+    def run(self, max_polls=None):
+        """Poll until interrupted (Ctrl+C) or max_polls passes were made"""
+        self.logger(f"Watching {self.data_folder} every {self.poll_seconds}s, "
+                    f"files are sorted after {self.settle_seconds}s unchanged")
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                try:
+                    self.poll()
+                except OSError as e:
+                    # Share dropped for a moment - try again next poll
+                    self.logger(f"Error polling {self.data_folder}: {e}")
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(self.poll_seconds)
+        except KeyboardInterrupt:
+            self.logger("Watch stopped")
+        self.logger(f"Watch sorted {self.sorted_count} files, {len(self.unmatched)} left unmatched")
+        return self.sorted_count
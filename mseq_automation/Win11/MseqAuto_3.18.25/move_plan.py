@@ -0,0 +1,165 @@
+# move_plan.py
+import os
+import time
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+PlannedMove = namedtuple('PlannedMove', ['source', 'destination', 'reason', 'routing', 'size'])
+MoveResult = namedtuple('MoveResult', ['move', 'success', 'seconds'])
+
+
+class MovePlan:
+    """Every move a sort will make, decided before anything on the share is touched
+
+    reason is the file kind ('customer', 'pcr', 'control', 'blank') and routing
+    where it goes inside its destination ('main', 'alternate' for a name that
+    is already taken, 'reinject', 'preemptive'). Targets claimed by earlier
+    moves in the plan count as taken, the same as if they had been moved.
+    """
+    MAIN = 'main'
+    ALTERNATE = 'alternate'
+    REINJECT = 'reinject'
+    PREEMPTIVE = 'preemptive'
+    RESUMED = 'resumed'
+
+    def __init__(self, file_dao):
+        self.file_dao = file_dao
+        self.moves = []
+        self.directories = OrderedDict()  # folders to create, parents before children
+        self.unmatched = []  # (path, reason) of files that stay where they are
+        self._claimed = set()
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __iter__(self):
+        return iter(self.moves)
+
+    def add_directory(self, path):
+        """Plan a folder, nothing happens if it is already there"""
+        if path not in self.directories:
+            self.directories[path] = True
+
+    def add(self, source, destination, reason, routing=MAIN):
+        """Plan a move, the destination folder is planned as well"""
+        self.add_directory(os.path.dirname(destination))
+        self._claimed.add(destination)
+        move = PlannedMove(source, destination, reason, routing, self._get_size(source))
+        self.moves.append(move)
+        return move
+
+    def add_unmatched(self, source, reason):
+        """Record a file the planner decided not to move"""
+        self.unmatched.append((source, reason))
+
+    def target_exists(self, path):
+        """Check if a target is taken on disk or by an earlier move in the plan"""
+        if path in self._claimed:
+            return True
+        return os.path.basename(path) in self.file_dao.get_snapshot(os.path.dirname(path))
+
+    def by_destination(self):
+        """Group the moves by destination folder"""
+        groups = OrderedDict()
+        for move in self.moves:
+            groups.setdefault(os.path.dirname(move.destination), []).append(move)
+        return groups
+
+    @property
+    def total_bytes(self):
+        return sum(move.size for move in self.moves)
+
+    def _get_size(self, path):
+        entry = self.file_dao.get_snapshot(os.path.dirname(path)).get(os.path.basename(path))
+        return entry.size if entry else 0
+
+
+class MoveReport:
+    """Outcome of executing a MovePlan"""
+
+    def __init__(self, results, seconds):
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def moved(self):
+        return sum(1 for result in self.results if result.success)
+
+    @property
+    def failed(self):
+        return [result.move for result in self.results if not result.success]
+
+    @property
+    def bytes_moved(self):
+        return sum(result.move.size for result in self.results if result.success)
+
+    @property
+    def files_per_second(self):
+        return self.moved / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self):
+        megabytes = self.bytes_moved / (1024 * 1024)
+        return (f"Moved {self.moved}/{len(self.results)} files ({megabytes:.1f} MB) in {self.seconds:.2f}s, "
+                f"{self.files_per_second:.1f} files/s")
+
+
+class MoveExecutor:
+    """Apply a MovePlan: create all folders first, then move files in a bounded thread pool
+
+    Moves into the same destination folder run in order on one worker,
+    different destinations run concurrently.
+    """
+
+    def __init__(self, file_dao, logger=None, max_workers=8, ensure_folder=None, journal=None):
+        self.file_dao = file_dao
+        self.logger = logger or print
+        self.max_workers = max_workers
+        self.ensure_folder = ensure_folder or file_dao.create_folder_if_not_exists
+        self.journal = journal  # SortJournal, if moves should survive a crash
+
+    def execute(self, plan):
+        start = time.perf_counter()
+        if self.journal is not None:
+            self.journal.record_planned(plan)
+
+        for directory in plan.directories:
+            try:
+                self.ensure_folder(directory)
+            except OSError as e:
+                self.logger(f"Failed to create folder {directory}: {e}")
+
+        results = []
+        groups = plan.by_destination()
+        if groups:
+            workers = max(1, min(self.max_workers, len(groups)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(self._move_group, moves) for moves in groups.values()]
+                for future in as_completed(futures):
+                    for result in future.result():
+                        results.append(result)
+                        self._log_result(result)
+                        if self.journal is not None:
+                            self.journal.record_result(result.move.source, result.move.destination,
+                                                       result.success)
+            if self.journal is not None:
+                self.journal.sync()
+
+        report = MoveReport(results, time.perf_counter() - start)
+        self.logger(report.summary())
+        return report
+
+    def _move_group(self, moves):
+        results = []
+        for move in moves:
+            start = time.perf_counter()
+            success = self.file_dao.move_file(move.source, move.destination)
+            results.append(MoveResult(move, success, time.perf_counter() - start))
+        return results
+
+    def _log_result(self, result):
+        move = result.move
+        name = os.path.basename(move.source)
+        if result.success:
+            self.logger(f"Moved {move.reason} file {name} to {os.path.dirname(move.destination)} ({move.routing})")
+        else:
+            self.logger(f"Failed to move {move.reason} file {name} to {os.path.dirname(move.destination)}")
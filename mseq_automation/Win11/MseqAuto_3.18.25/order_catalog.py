@@ -0,0 +1,74 @@
+# order_catalog.py
+from order_key_index import OrderKeyIndex
+
+
+class OrderCatalog:
+    """Per-order lookups over the order key, built once per run
+
+    Replaces reloading and scanning the whole key for every order folder:
+    expected counts, sample lists and I numbers are plain dict lookups.
+    """
+
+    def __init__(self, adjust_chars):
+        self.adjust_chars = adjust_chars
+        self.orders = {}  # order number -> (I number, account, [raw sample names])
+        self._normalized = {}  # order number -> [ABI adjusted sample names]
+
+    @classmethod
+    def from_order_key(cls, order_key, adjust_chars):
+        """Build the catalog from order key rows (I number, account, order, sample)"""
+        if isinstance(order_key, OrderKeyIndex):
+            return cls.from_index(order_key, adjust_chars)
+
+        catalog = cls(adjust_chars)
+        for entry in order_key:
+            i_num, acct_name, order_num, sample_name = (str(field) for field in entry[0:4])
+            if order_num not in catalog.orders:
+                catalog.orders[order_num] = (i_num, acct_name, [])
+            catalog.orders[order_num][2].append(sample_name)
+        catalog._normalize_all()
+        return catalog
+
+    @classmethod
+    def from_index(cls, index, adjust_chars):
+        """Build the catalog from a compiled OrderKeyIndex"""
+        catalog = cls(adjust_chars)
+        for order_num, samples in index.by_order.items():
+            i_num, acct_name = index.order_info[order_num]
+            catalog.orders[order_num] = (i_num, acct_name, samples)
+        catalog._normalize_all()
+        return catalog
+
+    def _normalize_all(self):
+        for order_num, (i_num, acct_name, samples) in self.orders.items():
+            self._normalized[order_num] = [self.adjust_chars(sample) for sample in samples]
+
+    def __contains__(self, order_num):
+        return str(order_num) in self.orders
+
+    def __len__(self):
+        return len(self.orders)
+
+    def expected_count(self, order_num):
+        """Number of samples ordered, 0 for unknown orders"""
+        entry = self.orders.get(str(order_num))
+        return len(entry[2]) if entry else 0
+
+    def samples(self, order_num):
+        """Raw sample names as they appear in the order key"""
+        entry = self.orders.get(str(order_num))
+        return list(entry[2]) if entry else []
+
+    def normalized_samples(self, order_num):
+        """Sample names adjusted to ABI naming conventions"""
+        return list(self._normalized.get(str(order_num), []))
+
+    def i_number(self, order_num):
+        """I number the order belongs to, None for unknown orders"""
+        entry = self.orders.get(str(order_num))
+        return entry[0] if entry else None
+
+    def account(self, order_num):
+        """Account name of the order, None for unknown orders"""
+        entry = self.orders.get(str(order_num))
+        return entry[1] if entry else None
@@ -0,0 +1,122 @@
+# order_key_index.py
+import hashlib
+import json
+import os
+import tempfile
+
+
+class OrderKeyIndex:
+    """Compiled lookup tables for the order key file
+
+    by_name maps a normalized sample name to every (I number, account, order)
+    it appears under, by_order maps an order number to its raw sample names
+    and order_info maps an order number to its (I number, account).
+    The index is saved as JSON next to the key file and reused while the key
+    file signature (size, mtime, hash) is unchanged.
+    """
+    FORMAT_VERSION = 5
+
+    def __init__(self, by_name=None, by_order=None, order_info=None, signature=None):
+        self.by_name = by_name if by_name is not None else {}
+        self.by_order = by_order if by_order is not None else {}
+        self.order_info = order_info if order_info is not None else {}
+        self.signature = signature
+
+    @classmethod
+    def build(cls, order_key, normalize, signature=None):
+        """Build the index from order key rows using the given normalize function"""
+        by_name = {}
+        by_order = {}
+        order_info = {}
+
+        for entry in order_key:
+            # Plain str fields so the saved index never holds numpy or int values
+            i_num, acct_name, order_num, sample_name = (str(field) for field in entry[0:4])
+            normalized_name = normalize(sample_name)
+
+            # Handle multiple entries with same normalized name
+            if normalized_name not in by_name:
+                by_name[normalized_name] = []
+            by_name[normalized_name].append((i_num, acct_name, order_num))
+
+            if order_num not in by_order:
+                by_order[order_num] = []
+                order_info[order_num] = (i_num, acct_name)
+            by_order[order_num].append(sample_name)
+
+        return cls(by_name, by_order, order_info, signature)
+
+    def __contains__(self, normalized_name):
+        return normalized_name in self.by_name
+
+    def __getitem__(self, normalized_name):
+        return self.by_name[normalized_name]
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def get(self, normalized_name, default=None):
+        """Get matches for a normalized name"""
+        return self.by_name.get(normalized_name, default)
+
+    def samples_for_order(self, order_num):
+        """Get the raw sample names for an order"""
+        return self.by_order.get(str(order_num), [])
+
+    # Persistence
+    @staticmethod
+    def get_index_path(key_file_path):
+        """Get the path of the compiled index stored next to the key file"""
+        return os.path.splitext(key_file_path)[0] + '.index.json'
+
+    @staticmethod
+    def new_hash():
+        """The hash object the key file signature is computed with, fed while the key is read"""
+        return hashlib.sha1()
+
+    def save(self, index_path):
+        """Write the index atomically so a reader never sees a partial file
+
+        Every writer gets its own temporary file next to the index, so two
+        workstations rebuilding at once can't write into each other's file.
+        """
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', prefix=os.path.basename(index_path) + '.',
+                                         dir=os.path.dirname(index_path) or '.')
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.FORMAT_VERSION,
+                    'signature': self.signature,
+                    'by_name': self.by_name,
+                    'by_order': self.by_order,
+                    'order_info': self.order_info,
+                }, f)
+            os.chmod(temp_path, 0o644)  # mkstemp makes it private, the index is read by every workstation
+            os.replace(temp_path, index_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, index_path):
+        """Load a saved index, returns None if missing or from another format version
+
+        The file sits on the shared drive, so it is plain JSON read field by
+        field into str values, never anything that could run code.
+        Raises ValueError, KeyError or TypeError on a malformed file.
+        """
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('version') != cls.FORMAT_VERSION:
+            return None
+        signature = saved['signature']
+        signature = {'size': int(signature['size']), 'mtime': float(signature['mtime']),
+                     'hash': str(signature['hash'])}
+        by_name = {str(name): [tuple(str(field) for field in match) for match in matches]
+                   for name, matches in saved['by_name'].items()}
+        by_order = {str(order_num): [str(sample) for sample in samples]
+                    for order_num, samples in saved['by_order'].items()}
+        order_info = {str(order_num): (str(info[0]), str(info[1])) for order_num, info in saved['order_info'].items()}
+        return cls(by_name, by_order, order_info, signature)
@@ -0,0 +1,79 @@
+# order_key_table.py
+import sys
+from array import array
+
+
+class OrderKeyTable:
+    """Columnar, memory-compact storage for the order key
+
+    Every column is an integer array of indexes into a shared string table,
+    so repeated I numbers, orders, accounts and duplicate sample names are
+    only stored once. I numbers and order numbers are kept as the original
+    digit strings, leading zeros included. Rows read back as (I number,
+    account, order, sample) string tuples, the same shape np.loadtxt produced.
+    """
+
+    def __init__(self):
+        self.i_number_ids = array('l')
+        self.order_ids = array('l')
+        self.account_ids = array('l')
+        self.sample_ids = array('l')
+        self.i_numbers = []  # Shared I number string table
+        self.order_numbers = []  # Shared order number string table
+        self.accounts = []  # Shared account string table
+        self.samples = []  # Shared sample name string table
+        self._i_number_lookup = {}
+        self._order_lookup = {}
+        self._account_lookup = {}
+        self._sample_lookup = {}
+        self.bad_rows = []  # (line number, line) of rows that could not be parsed
+
+    def append(self, i_num, acct_name, order_num, sample_name):
+        """Add a parsed row"""
+        self.i_number_ids.append(self._intern(i_num, self.i_numbers, self._i_number_lookup))
+        self.order_ids.append(self._intern(order_num, self.order_numbers, self._order_lookup))
+        self.account_ids.append(self._intern(acct_name, self.accounts, self._account_lookup))
+        self.sample_ids.append(self._intern(sample_name, self.samples, self._sample_lookup))
+
+    @staticmethod
+    def _intern(value, table, lookup):
+        value_id = lookup.get(value)
+        if value_id is None:
+            value_id = len(table)
+            table.append(sys.intern(value))
+            lookup[value] = value_id
+        return value_id
+
+    def __len__(self):
+        return len(self.i_number_ids)
+
+    def __getitem__(self, row):
+        return (self.i_numbers[self.i_number_ids[row]],
+                self.accounts[self.account_ids[row]],
+                self.order_numbers[self.order_ids[row]],
+                self.samples[self.sample_ids[row]])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def rows_for_inumbers(self, i_numbers):
+        """Yield only the rows belonging to the given I numbers"""
+        wanted = {self._i_number_lookup[i_num] for i_num in map(str, i_numbers) if i_num in self._i_number_lookup}
+        for row, i_number_id in enumerate(self.i_number_ids):
+            if i_number_id in wanted:
+                yield self[row]
+
+
+def parse_order_key_line(line):
+    """Parse one tab separated order key line, returns None for a malformed row
+
+    I numbers and order numbers must be all digits but stay strings, so
+    leading zeros survive and there is no integer width limit.
+    """
+    fields = line.rstrip('\r\n').split('\t')
+    if len(fields) < 4 or not fields[3]:
+        return None
+    if not (fields[0].isdigit() and fields[2].isdigit()):
+        return None
+    return fields[0], fields[1], fields[2], fields[3]
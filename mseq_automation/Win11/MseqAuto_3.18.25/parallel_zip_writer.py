@@ -0,0 +1,202 @@
+# parallel_zip_writer.py
+import bz2
+import os
+import stat
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+from itertools import islice
+from zipfile import LZMACompressor, ZIP_BZIP2, ZIP_LZMA, ZIP_STORED
+
+from compression_policy import CompressionPolicy, METHODS
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_FILECOUNT_LIMIT = 0xFFFF
+UTF8_FLAG = 0x800
+LZMA_EOS_FLAG = 0x2  # zipfile writes LZMA members with an end-of-stream marker
+VERSION_DEFLATE = 20
+VERSION_ZIP64 = 45
+VERSION_BZIP2 = 46
+VERSION_LZMA = 63
+# Host system in 'version made by', as zipfile sets it
+CREATE_SYSTEM = 0 if sys.platform == 'win32' else 3
+
+LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+END_RECORD = struct.Struct('<4s4H2LH')
+ZIP64_END_RECORD = struct.Struct('<4sQ2H2L4Q')
+ZIP64_LOCATOR = struct.Struct('<4sLQL')
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def get_compressor(method, level=None):
+    """Compressor producing a zip member's data, None for stored members"""
+    if method == 'deflate':
+        return zlib.compressobj(-1 if level is None else level, zlib.DEFLATED, -15)
+    if method == 'bzip2':
+        return bz2.BZ2Compressor(9 if level is None else level)
+    if method == 'lzma':
+        return LZMACompressor()
+    return None
+
+
+def compress_member(file_path, method='deflate', level=None):
+    """Compress one file as a zip member, returns (path, crc, data, size, compress type, mtime, mode)
+
+    Runs in a worker process. Files that don't get smaller are stored.
+    """
+    file_stat = os.stat(file_path)
+    compressor = get_compressor(method, level)
+    if compressor is None:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        return file_path, zlib.crc32(data), data, len(data), ZIP_STORED, file_stat.st_mtime, file_stat.st_mode
+    crc = 0
+    size = 0
+    compressed = []
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            compressed.append(compressor.compress(chunk))
+    compressed.append(compressor.flush())
+    data = b''.join(compressed)
+    compress_type = METHODS[method]
+    if len(data) >= size:
+        # Not worth holding the raw bytes for the rare file that doesn't shrink, read it again to store it
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        if len(data) != size or zlib.crc32(data) != crc:
+            raise OSError(f"{file_path} changed while it was being zipped")
+        compress_type = ZIP_STORED
+    return file_path, crc, data, size, compress_type, file_stat.st_mtime, file_stat.st_mode
+
+
+def dos_date_time(mtime):
+    """(date, time) fields of a zip header, dates before 1980 are clamped like zipfile does"""
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return (0 << 9) | (1 << 5) | 1, 0
+    return ((t.tm_year - 1980) << 9 | t.tm_mon << 5 | t.tm_mday,
+            t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2)
+
+
+class ParallelZipWriter:
+    """Writes a zip whose members are compressed in parallel, one member per pool task
+
+    Members are deflated in worker processes and written in order as soon
+    as they are ready, with at most max_pending members in flight so memory
+    stays flat in the archive size. CRC and sizes are known before each
+    local header is written, so the output is a plain sequential stream (no
+    data descriptors, no seeking) that any unzip tool reads. ZIP64 records
+    are added when a member, the archive or the member count outgrows the
+    classic format. Members go under their base names, the same layout as
+    write_zip, and are compressed as the CompressionPolicy says.
+    """
+
+    def __init__(self, pool, policy=None, max_pending=None):
+        self.pool = pool
+        self.policy = policy or CompressionPolicy()
+        # Compressed members waiting to be written are held in memory, two per worker keeps the pool busy
+        self.max_pending = max_pending or 2 * getattr(pool, '_max_workers', os.cpu_count() or 1)
+
+    def write(self, target, file_paths):
+        """Write the archive of file_paths to a binary file object, returns the uncompressed bytes"""
+        file_paths = iter(file_paths)
+        futures = deque()
+        for file_path in islice(file_paths, self.max_pending):
+            futures.append(self._submit(file_path))
+        central_directory = []
+        offset = 0
+        bytes_in = 0
+        while futures:
+            file_path, crc, data, size, method, mtime, mode = futures.popleft().result()
+            next_path = next(file_paths, None)
+            if next_path is not None:
+                futures.append(self._submit(next_path))
+            name = os.path.basename(file_path)
+            header, central_header = self._headers(name, crc, len(data), size, method, mtime, mode, offset)
+            target.write(header)
+            target.write(data)
+            offset += len(header) + len(data)
+            bytes_in += size
+            central_directory.append(central_header)
+
+        directory_offset = offset
+        for central_header in central_directory:
+            target.write(central_header)
+            offset += len(central_header)
+        target.write(self._end_records(len(central_directory), offset - directory_offset, directory_offset))
+        return bytes_in
+
+    def _submit(self, file_path):
+        return self.pool.submit(compress_member, file_path, *self.policy.rule_for(os.path.basename(file_path)))
+
+    def _headers(self, name, crc, compressed_size, size, method, mtime, mode, offset):
+        """Local and central directory header of a member"""
+        try:
+            encoded_name = name.encode('ascii')
+            flags = 0
+        except UnicodeEncodeError:
+            encoded_name = name.encode('utf-8')
+            flags = UTF8_FLAG
+        minimum_version = VERSION_DEFLATE
+        if method == ZIP_BZIP2:
+            minimum_version = VERSION_BZIP2
+        elif method == ZIP_LZMA:
+            minimum_version = VERSION_LZMA
+            flags |= LZMA_EOS_FLAG
+        date, dos_time = dos_date_time(mtime)
+        external_attr = (stat.S_IFREG | (mode & 0xFFFF)) << 16 if mode else 0
+
+        # Local header: sizes go to the ZIP64 extra field when they don't fit
+        zip64_sizes = size >= ZIP64_LIMIT or compressed_size >= ZIP64_LIMIT
+        if zip64_sizes:
+            local_extra = struct.pack('<2H2Q', 1, 16, size, compressed_size)
+            local_sizes = (ZIP64_LIMIT, ZIP64_LIMIT)
+        else:
+            local_extra = b''
+            local_sizes = (compressed_size, size)
+        version = max(minimum_version, VERSION_ZIP64 if zip64_sizes or offset >= ZIP64_LIMIT else VERSION_DEFLATE)
+        local_header = LOCAL_HEADER.pack(b'PK\x03\x04', version, flags, method, dos_time, date, crc,
+                                         local_sizes[0], local_sizes[1], len(encoded_name), len(local_extra))
+
+        # Central header: only the fields that don't fit go to the ZIP64 extra field
+        zip64_fields = []
+        central_sizes = [compressed_size, size]
+        if size >= ZIP64_LIMIT:
+            zip64_fields.append(size)
+            central_sizes[1] = ZIP64_LIMIT
+        if compressed_size >= ZIP64_LIMIT:
+            zip64_fields.append(compressed_size)
+            central_sizes[0] = ZIP64_LIMIT
+        header_offset = offset
+        if offset >= ZIP64_LIMIT:
+            zip64_fields.append(offset)
+            header_offset = ZIP64_LIMIT
+        central_extra = b''
+        if zip64_fields:
+            central_extra = struct.pack(f'<2H{len(zip64_fields)}Q', 1, 8 * len(zip64_fields), *zip64_fields)
+        central_header = CENTRAL_HEADER.pack(b'PK\x01\x02', CREATE_SYSTEM << 8 | version, version, flags, method,
+                                             dos_time, date, crc, central_sizes[0], central_sizes[1],
+                                             len(encoded_name), len(central_extra), 0, 0, 0, external_attr,
+                                             header_offset)
+        return (local_header + encoded_name + local_extra,
+                central_header + encoded_name + central_extra)
+
+    @staticmethod
+    def _end_records(count, directory_size, directory_offset):
+        records = b''
+        if count > ZIP_FILECOUNT_LIMIT or directory_size >= ZIP64_LIMIT or directory_offset >= ZIP64_LIMIT:
+            zip64_end_offset = directory_offset + directory_size
+            records += ZIP64_END_RECORD.pack(b'PK\x06\x06', ZIP64_END_RECORD.size - 12, VERSION_ZIP64,
+                                             VERSION_ZIP64, 0, 0, count, count, directory_size, directory_offset)
+            records += ZIP64_LOCATOR.pack(b'PK\x06\x07', 0, zip64_end_offset, 1)
+            count = min(count, ZIP_FILECOUNT_LIMIT)
+            directory_size = min(directory_size, ZIP64_LIMIT)
+            directory_offset = min(directory_offset, ZIP64_LIMIT)
+        records += END_RECORD.pack(b'PK\x05\x06', 0, 0, count, count, directory_size, directory_offset, 0)
+        return records
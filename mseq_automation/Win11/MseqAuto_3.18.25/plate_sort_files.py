@@ -10,13 +10,14 @@ from config import MseqConfig
 from file_system_dao import FileSystemDAO
 from folder_processor import FolderProcessor
 from logger import setup_logger
+from run_plan import OperationTimings, RunPlan, report_dry_run
 
 # Check for 32-bit Python requirement
 if sys.maxsize > 2**32:
     py32_path = MseqConfig.PYTHON32_PATH
     if os.path.exists(py32_path) and py32_path != sys.executable:
         script_path = os.path.abspath(__file__)
-        subprocess.run([py32_path, script_path])
+        subprocess.run([py32_path, script_path] + sys.argv[1:])
         sys.exit(0)
     else:
         print("32-bit Python not specified or same as current interpreter")
@@ -53,6 +54,11 @@ def main():
     processor = FolderProcessor(file_dao, None, config, logger=logger.info)
     logger.info("Folder processor initialized")
     
+    # Dry run: plan everything, touch nothing
+    dry_run = '--dry-run' in sys.argv
+    timings = OperationTimings(config.TIMINGS_PATH)
+    processor.timings = timings
+    
     # Select folder
     data_folder = get_folder_from_user()
     
@@ -72,6 +78,15 @@ def main():
         print("No plate folders found, exiting")
         return
     
+    # Dry run - plan every plate folder and export the plan
+    if dry_run:
+        plan = RunPlan("plate_sort_files")
+        for folder in plate_folders:
+            plan.add_move_plan(processor.plan_plate_folder(folder))
+        report_dry_run(plan, timings, config.DRY_RUN_FOLDER, logger.info)
+        print("Dry run done, nothing was moved")
+        return
+    
     # Process each plate folder
     for i, folder in enumerate(plate_folders):
         logger.info(f"Processing plate folder {i+1}/{len(plate_folders)}: {os.path.basename(folder)}")
@@ -88,6 +103,7 @@ def main():
         logger.info(f"Removing braces from filenames in {os.path.basename(folder)}")
         processor.remove_braces_from_filenames(folder)
     
+    timings.save()
     logger.info("All plate folders processed")
     print("All done!")
 
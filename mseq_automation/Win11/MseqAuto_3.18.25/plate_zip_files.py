@@ -10,17 +10,7 @@ from config import MseqConfig
 from file_system_dao import FileSystemDAO
 from folder_processor import FolderProcessor
 from logger import setup_logger
-
-# Check for 32-bit Python requirement
-if sys.maxsize > 2**32:
-    py32_path = MseqConfig.PYTHON32_PATH
-    if os.path.exists(py32_path) and py32_path != sys.executable:
-        script_path = os.path.abspath(__file__)
-        subprocess.run([py32_path, script_path])
-        sys.exit(0)
-    else:
-        print("32-bit Python not specified or same as current interpreter")
-        print("Continuing with current Python interpreter")
+from zip_engine import ZipJob
 
 def get_folder_from_user():
     """Get folder selection from user"""
@@ -78,35 +68,30 @@ def main():
         print("No plate folders found, exiting")
         return
     
-    # Process each plate folder
-    plate_count = 0
+    # Plan an archive for every plate folder that is ready
+    jobs = []
     for plate_folder in plate_folders:
         # Check if plate folder already has a zip file
         if file_dao.check_for_zip(plate_folder):
             logger.info(f"Skipping {os.path.basename(plate_folder)} - already has zip file")
             continue
         
-        # Check if this is an FSA plate
+        # FSA plates are zipped with their fsa files only, others with AB1 and txt files
         has_fsa = file_dao.contains_file_type(plate_folder, config.FSA_EXTENSION)
-        
-        if has_fsa:
-            # Zip FSA files only
-            logger.info(f"Zipping FSA files in {os.path.basename(plate_folder)}")
-            zip_path = processor.zip_plate_folder(plate_folder, fsa_only=True)
-        else:
-            # Zip AB1 and txt files
-            logger.info(f"Zipping AB1 and txt files in {os.path.basename(plate_folder)}")
-            zip_path = processor.zip_plate_folder(plate_folder, fsa_only=False)
-        
-        if zip_path:
-            # Copy zip to dump folder
-            logger.info(f"Copying zip to dump folder: {os.path.basename(zip_path)}")
-            file_dao.copy_zip_to_dump(zip_path, zip_dump_folder)
-            plate_count += 1
-            
-            logger.info(f"Successfully processed {os.path.basename(plate_folder)}")
-        else:
-            logger.warning(f"Failed to zip {os.path.basename(plate_folder)}")
+        zip_plan = processor.get_plate_zip_plan(plate_folder, fsa_only=has_fsa)
+        if zip_plan is None:
+            logger.warning(f"Failed to zip {os.path.basename(plate_folder)} - not ready to zip")
+            continue
+        zip_path, files = zip_plan
+        jobs.append(ZipJob(plate_folder, zip_path, files, os.path.join(zip_dump_folder, os.path.basename(zip_path))))
+    
+    # Zip all plates in the worker pool, each zip goes to the dump folder in the same pass
+    logger.info(f"Zipping {len(jobs)} plate folders with {config.ZIP_WORKERS} workers")
+    report = processor.zip_folders(jobs)
+    plate_count = 0
+    for result in report.zipped:
+        plate_count += 1
+        logger.info(f"Successfully processed {os.path.basename(result.job.folder)}")
     
     # Remove empty zip dump folder if nothing was processed
     if plate_count == 0 and os.path.exists(zip_dump_folder) and not os.listdir(zip_dump_folder):
@@ -117,4 +102,17 @@ def main():
     print(f"All done! {plate_count} plates zipped.")
 
 if __name__ == "__main__":
+    # Check for 32-bit Python requirement. Only when run as a script: the zip
+    # workers are spawned processes that import this module as __mp_main__ and
+    # must not relaunch or print
+    if sys.maxsize > 2**32:
+        py32_path = MseqConfig.PYTHON32_PATH
+        if os.path.exists(py32_path) and py32_path != sys.executable:
+            script_path = os.path.abspath(__file__)
+            subprocess.run([py32_path, script_path])
+            sys.exit(0)
+        else:
+            print("32-bit Python not specified or same as current interpreter")
+            print("Continuing with current Python interpreter")
+    
     main()
\ No newline at end of file
@@ -0,0 +1,47 @@
+# reinject_index.py
+
+
+class ReinjectIndex:
+    """Reinject lookups by normalized sample name
+
+    Built once from the raw reinject entries (as listed in the plate txt
+    files, braces included). Maps each normalized name to its raw names and
+    remembers whether the entry is a preemptive {!P} reinject.
+    """
+    PREEMPTIVE_TAG = '{!P}'
+
+    def __init__(self, normalize, raw_names=None):
+        self.normalize = normalize
+        self.raw_names = {}  # normalized name -> [raw names]
+        self.preemptive = set()  # normalized names whose first raw entry is {!P}
+        self.count = 0
+        for raw_name in raw_names or []:
+            self.add(raw_name)
+
+    def add(self, raw_name):
+        """Add a raw reinject entry"""
+        normalized_name = self.normalize(raw_name)
+        if normalized_name not in self.raw_names:
+            self.raw_names[normalized_name] = []
+            # The first entry decides, matching the old reinject_list.index() lookup
+            if self.PREEMPTIVE_TAG in raw_name:
+                self.preemptive.add(normalized_name)
+        self.raw_names[normalized_name].append(raw_name)
+        self.count += 1
+
+    def __contains__(self, normalized_name):
+        return normalized_name in self.raw_names
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def get_raw_names(self, normalized_name):
+        """Raw reinject entries for a normalized name"""
+        return self.raw_names.get(normalized_name, [])
+
+    def is_preemptive(self, normalized_name):
+        """Check if a reinject should go to the main folder instead of Alternate Injections"""
+        return normalized_name in self.preemptive
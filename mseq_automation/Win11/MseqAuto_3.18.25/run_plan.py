@@ -0,0 +1,153 @@
+# run_plan.py
+import csv
+import json
+import os
+from collections import namedtuple, OrderedDict
+from datetime import datetime
+
+PlannedAction = namedtuple('PlannedAction', ['operation', 'source', 'destination', 'detail'])
+
+
+class RunPlan:
+    """Everything a sort, zip or mSeq run would do, built in dry-run mode
+
+    Operations are short names ('create_folder', 'move', 'rename', 'zip',
+    'copy_zip', 'mseq', 'move_folder') that OperationTimings has recorded
+    per-operation durations for.
+    """
+    FIELDS = ['operation', 'source', 'destination', 'detail']
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.actions = []
+        self.created = datetime.now()
+
+    def __len__(self):
+        return len(self.actions)
+
+    def __iter__(self):
+        return iter(self.actions)
+
+    def add(self, operation, source, destination='', detail=''):
+        action = PlannedAction(operation, source, destination, detail)
+        self.actions.append(action)
+        return action
+
+    def add_move_plan(self, move_plan):
+        """Add the folders and moves of a MovePlan, unmatched files are listed as skipped"""
+        for directory in move_plan.directories:
+            if not os.path.isdir(directory):
+                self.add('create_folder', directory)
+        for move in move_plan:
+            operation = 'rename' if move.reason == 'rename' else 'move'
+            self.add(operation, move.source, move.destination, f"{move.reason} ({move.routing})")
+        for source, reason in move_plan.unmatched:
+            self.add('skip', source, '', reason)
+
+    def counts(self):
+        """Number of actions per operation"""
+        counts = OrderedDict()
+        for action in self.actions:
+            counts[action.operation] = counts.get(action.operation, 0) + 1
+        return counts
+
+    def export_json(self, path, estimate=None):
+        data = {
+            'stage': self.stage,
+            'created': self.created.isoformat(timespec='seconds'),
+            'counts': self.counts(),
+            'estimated_seconds': estimate,
+            'actions': [action._asdict() for action in self.actions],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.FIELDS)
+            writer.writerows(self.actions)
+        return path
+
+    def export(self, folder, timings=None):
+        """Write the plan as JSON and CSV into a (local) folder, returns the two paths"""
+        os.makedirs(folder, exist_ok=True)
+        base_name = f"{self.stage}_dry_run_{self.created.strftime('%Y%m%d_%H%M%S')}"
+        estimate = timings.estimate(self)[0] if timings else None
+        json_path = self.export_json(os.path.join(folder, base_name + '.json'), estimate)
+        csv_path = self.export_csv(os.path.join(folder, base_name + '.csv'))
+        return json_path, csv_path
+
+
+class OperationTimings:
+    """Per-operation durations recorded by previous runs, kept in a small local JSON file"""
+    # Skipped files cost nothing, folder creation is included in the recorded move times
+    UNTIMED = {'skip', 'create_folder'}
+
+    def __init__(self, path):
+        self.path = path
+        self.stats = {}  # operation -> [count, total seconds]
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.stats = {operation: list(values) for operation, values in json.load(f).items()}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable timings file {self.path}: {e}")
+
+    def record(self, operation, seconds, count=1):
+        """Record the duration of count operations"""
+        stats = self.stats.setdefault(operation, [0, 0.0])
+        stats[0] += count
+        stats[1] += seconds
+        self.dirty = True
+
+    def mean(self, operation):
+        """Mean duration of an operation, None if it was never recorded"""
+        count, seconds = self.stats.get(operation, (0, 0.0))
+        return seconds / count if count else None
+
+    def estimate(self, plan):
+        """Estimate the wall-clock seconds of a plan, returns (seconds, operations with no timings)"""
+        total = 0.0
+        unknown = set()
+        for operation, count in plan.counts().items():
+            if operation in self.UNTIMED:
+                continue
+            mean = self.mean(operation)
+            if mean is None:
+                unknown.add(operation)
+            else:
+                total += mean * count
+        return total, sorted(unknown)
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.stats, f, indent=2)
+            os.replace(temp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Error saving timings file {self.path}: {e}")
+
+
+def report_dry_run(plan, timings, folder, log=print):
+    """Log what a dry run would do and how long it would take, then export the plan"""
+    for operation, count in plan.counts().items():
+        log(f"Dry run - {operation}: {count}")
+    seconds, unknown = timings.estimate(plan)
+    log(f"Dry run - estimated time: {seconds:.1f}s")
+    if unknown:
+        log(f"Dry run - no recorded timings yet for: {', '.join(unknown)}")
+    json_path, csv_path = plan.export(folder, timings)
+    log(f"Dry run plan written to {json_path} and {csv_path}")
+    return json_path, csv_path
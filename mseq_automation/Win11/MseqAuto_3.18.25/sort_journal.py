@@ -0,0 +1,93 @@
+# sort_journal.py
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+
+
+class SortJournal:
+    """Append-only journal of planned and completed moves, kept in the day folder
+
+    Each line is a JSON record: 'planned' for every move of a plan (synced
+    before any file is moved), then 'done' or 'failed' per move. Completion
+    records are fsynced in batches, so a crash loses at most one batch of
+    them; on resume those moves are recognised because their source is gone
+    and their destination exists. A torn last line is ignored.
+    """
+    PLANNED = 'planned'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, path, batch_size=32):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = OrderedDict()  # (source, destination) -> reason of moves not known to be done
+        self._file = None
+        self._unsynced = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key = (record['src'], record['dst'])
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn write from a crash
+                if record.get('op') == self.PLANNED:
+                    self.pending[key] = record.get('reason', '')
+                else:
+                    self.pending.pop(key, None)
+
+    def _write(self, op, source, destination, reason=None):
+        if self._file is None:
+            torn = self._ends_torn()
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if torn:
+                self._file.write('\n')  # don't glue new records onto a torn line
+        record = {'op': op, 'src': source, 'dst': destination, 'time': datetime.now().isoformat(timespec='seconds')}
+        if reason:
+            record['reason'] = reason
+        self._file.write(json.dumps(record) + '\n')
+        self._unsynced += 1
+
+    def _ends_torn(self):
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b'\n'
+        except OSError:
+            return False  # missing or empty
+
+    def sync(self):
+        """Flush and fsync everything written so far"""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def record_planned(self, moves):
+        """Journal the moves of a plan, synced before the first move is made"""
+        for move in moves:
+            self._write(self.PLANNED, move.source, move.destination, move.reason)
+            self.pending[(move.source, move.destination)] = move.reason
+        self.sync()
+
+    def record_result(self, source, destination, success):
+        """Journal the outcome of a move, synced once per batch"""
+        self._write(self.DONE if success else self.FAILED, source, destination)
+        self.pending.pop((source, destination), None)
+        if self._unsynced >= self.batch_size:
+            self.sync()
+
+    def get_pending(self):
+        """(source, destination, reason) of planned moves with no recorded outcome"""
+        return [(source, destination, reason) for (source, destination), reason in self.pending.items()]
+
+    def close(self):
+        self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,162 @@
+# spreadsheet_catalog.py
+import json
+import os
+import re
+import tempfile
+
+
+class SpreadsheetCatalog:
+    """One-time listing of the plate spreadsheet folders with cached parsed plates
+
+    Both G:\\Lab\\Spreadsheets and its 'Individual Uploaded to ABI' subfolder
+    are listed once. Plate txt files are parsed into (well, raw sample name)
+    records on first use and kept in a local JSON cache keyed by path and mtime,
+    so unchanged plates are never read over the network again. Plates that
+    were deleted or changed since they were parsed are dropped from the
+    cache when it is saved.
+    """
+    CACHE_VERSION = 2
+    FIRST_ROW = 5  # B6 in Excel terms
+    LAST_ROW = 101
+    WELL_PATTERN = re.compile(r'^{(\w+)}')
+
+    def __init__(self, directories, cache_path=None, logger=None):
+        self.directories = directories
+        self.cache_path = cache_path
+        self.logger = logger or print
+        self.files = {}  # path -> (file name, mtime) of every txt file
+        self.scanned = set()  # directories listed without error
+        self.plates = {}  # path -> (mtime, [(well, raw sample name)])
+        self.cache_dirty = False
+        self._load_cache()
+        self.scan()
+
+    def scan(self):
+        """List every directory once, keeping the mtime from the directory entry"""
+        self.files = {}
+        self.scanned = set()
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.endswith('.txt') and entry.is_file():
+                            self.files[entry.path] = (entry.name, entry.stat().st_mtime)
+                self.scanned.add(os.path.normpath(directory))
+            except OSError as e:
+                self.logger(f"Error scanning spreadsheet folder {directory}: {e}")
+
+    def reinject_files(self, i_numbers):
+        """Get reinject txt files mentioning any of the I numbers"""
+        return [path for path, (name, mtime) in self.files.items()
+                if 'reinject' in name.lower() and any(i_num in name for i_num in i_numbers)]
+
+    def plate_files(self, i_num):
+        """Get non-reinject txt files for an I number"""
+        pattern = re.compile(f'.*{i_num}.*txt', re.IGNORECASE)
+        return [path for path, (name, mtime) in self.files.items()
+                if pattern.search(name) and 'reinject' not in name]
+
+    def get_plate(self, path):
+        """Get the (well, raw sample name) records of a plate txt file"""
+        mtime = self._get_mtime(path)
+        cached = self.plates.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        records = self.parse_plate(path)
+        self.plates[path] = (mtime, records)
+        self.cache_dirty = True
+        return records
+
+    def get_plate_samples(self, path):
+        """Get the raw sample names of a plate txt file"""
+        return [sample for well, sample in self.get_plate(path)]
+
+    def _get_mtime(self, path):
+        if path in self.files:
+            return self.files[path][1]
+        return os.path.getmtime(path)
+
+    @classmethod
+    def parse_plate(cls, path):
+        """Parse column B of rows 6-101 of a tab separated plate file"""
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            # Blank lines don't count as rows, same as np.loadtxt
+            rows = [line.rstrip('\r\n').split('\t') for line in f if line.strip()]
+
+        records = []
+        for fields in rows[cls.FIRST_ROW:cls.LAST_ROW]:
+            if len(fields) > 1:
+                match = cls.WELL_PATTERN.match(fields[1])
+                well = match.group(1) if match else fields[0]
+                records.append((well, fields[1]))
+        return records
+
+    # Local cache
+    def _load_cache(self):
+        """Load parsed plates from the local cache, a cache from another version is ignored
+
+        Read field by field into str and float values, the same as the order key index.
+        """
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('version') == self.CACHE_VERSION:
+                self.plates = {str(path): (float(plate['mtime']),
+                                           [(str(well), str(sample)) for well, sample in plate['records']])
+                               for path, plate in saved['plates'].items()}
+        except Exception as e:
+            self.logger(f"Ignoring unreadable spreadsheet cache {self.cache_path}: {e}")
+
+    def prune_cache(self):
+        """Drop cached plates that are gone, changed, or outside the catalog's directories
+
+        Plates of a directory that couldn't be listed this run are kept, an
+        unreachable share doesn't empty the cache.
+        """
+        directories = {os.path.normpath(directory) for directory in self.directories}
+        stale = []
+        for path, (mtime, records) in self.plates.items():
+            directory = os.path.normpath(os.path.dirname(path))
+            if directory in self.scanned:
+                entry = self.files.get(path)
+                if entry is None or entry[1] != mtime:
+                    stale.append(path)
+            elif directory not in directories:
+                stale.append(path)
+        for path in stale:
+            del self.plates[path]
+        if stale:
+            self.cache_dirty = True
+        return len(stale)
+
+    def save_cache(self):
+        """Write parsed plates to the local cache if anything changed, stale plates pruned first"""
+        if not self.cache_path:
+            return
+        self.prune_cache()
+        if not self.cache_dirty:
+            return
+        try:
+            cache_folder = os.path.dirname(self.cache_path) or '.'
+            os.makedirs(cache_folder, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix='.tmp', prefix=os.path.basename(self.cache_path) + '.',
+                                             dir=cache_folder)
+            try:
+                with open(fd, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'version': self.CACHE_VERSION,
+                        'plates': {path: {'mtime': mtime, 'records': records}
+                                   for path, (mtime, records) in self.plates.items()},
+                    }, f)
+                os.replace(temp_path, self.cache_path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            self.cache_dirty = False
+        except Exception as e:
+            self.logger(f"Error saving spreadsheet cache {self.cache_path}: {e}")
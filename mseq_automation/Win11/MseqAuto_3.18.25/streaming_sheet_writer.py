@@ -0,0 +1,158 @@
+# streaming_sheet_writer.py
+import re
+import tempfile
+from xml.sax.saxutils import escape
+from zipfile import ZIP_DEFLATED, ZipFile
+
+COPY_CHUNK_SIZE = 1024 * 1024
+# Control characters are not allowed in xlsx XML
+ILLEGAL_CHARACTERS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>')
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>')
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>')
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>')
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">')
+
+
+def column_letter(column):
+    """Excel letter of a 1-based column index"""
+    letters = ''
+    while column:
+        column, remainder = divmod(column - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+class StreamingSheetWriter:
+    """Writes a one-sheet xlsx row by row, with memory flat in the number of rows
+
+    Rows are written as sheet XML to a temporary file as they come, only the
+    longest value per column is kept. close() assembles the workbook: the
+    column widths (longest value + 2, as the legacy summary sets them), the
+    streamed rows and a styles part with one solid fill per named style.
+    Strings are written inline, so no shared string table is built up.
+    """
+
+    def __init__(self, path, fills, sheet_name='Sheet1'):
+        self.path = path
+        self.fills = dict(fills)  # style name -> RGB hex, e.g. MseqConfig.EXCEL_STYLES
+        self.style_ids = {name: style_id for style_id, name in enumerate(self.fills, 1)}
+        self.sheet_name = sheet_name
+        self.widths = {}  # column index -> longest value
+        self.row_count = 0
+        self._rows = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    def append(self, values, styles=None, hidden=False):
+        """Write the next row: values from column A on, styles maps column letters to style names"""
+        self.row_count += 1
+        row = self.row_count
+        styles = styles or {}
+        cells = []
+        for column, value in enumerate(values, 1):
+            letter = column_letter(column)
+            style = styles.get(letter)
+            style_attribute = f' s="{self.style_ids[style]}"' if style else ''
+            if value is None or value == '':
+                if style:
+                    cells.append(f'<c r="{letter}{row}"{style_attribute}/>')
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                cells.append(f'<c r="{letter}{row}"{style_attribute}><v>{value!r}</v></c>')
+            else:
+                text = escape(ILLEGAL_CHARACTERS.sub('', str(value)))
+                cells.append(f'<c r="{letter}{row}"{style_attribute} t="inlineStr">'
+                             f'<is><t xml:space="preserve">{text}</t></is></c>')
+            self.widths[column] = max(self.widths.get(column, 0), len(str(value)))
+        hidden_attribute = ' hidden="1"' if hidden else ''
+        self._rows.write(f'<row r="{row}"{hidden_attribute}>{"".join(cells)}</row>')
+
+    def close(self):
+        """Write the workbook to path"""
+        try:
+            with ZipFile(self.path, 'w', ZIP_DEFLATED) as zip_file:
+                zip_file.writestr('[Content_Types].xml', CONTENT_TYPES)
+                zip_file.writestr('_rels/.rels', ROOT_RELS)
+                zip_file.writestr('xl/workbook.xml', WORKBOOK.format(sheet_name=escape(self.sheet_name)))
+                zip_file.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+                zip_file.writestr('xl/styles.xml', self._styles())
+                with zip_file.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+                    sheet.write((SHEET_START + self._columns() + '<sheetData>').encode('utf-8'))
+                    self._rows.seek(0)
+                    for chunk in iter(lambda: self._rows.read(COPY_CHUNK_SIZE), ''):
+                        sheet.write(chunk.encode('utf-8'))
+                    sheet.write(b'</sheetData></worksheet>')
+        finally:
+            self._rows.close()
+
+    def discard(self):
+        """Drop the rows without writing anything"""
+        self._rows.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _columns(self):
+        if not self.widths:
+            return ''
+        columns = ''.join(f'<col min="{column}" max="{column}" width="{length + 2}" customWidth="1"/>'
+                          for column, length in sorted(self.widths.items()))
+        return f'<cols>{columns}</cols>'
+
+    def _styles(self):
+        # Fills 0 and 1 are reserved by Excel, the named fills follow
+        fills = ''.join(f'<fill><patternFill patternType="solid"><fgColor rgb="FF{rgb}"/>'
+                        f'<bgColor rgb="FF{rgb}"/></patternFill></fill>' for rgb in self.fills.values())
+        cell_formats = ''.join(f'<xf numFmtId="0" fontId="0" fillId="{style_id + 1}" borderId="0" xfId="0" '
+                               'applyFill="1"/>'
+                               for style_id in self.style_ids.values())
+        return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+                f'<fills count="{len(self.fills) + 2}"><fill><patternFill patternType="none"/></fill>'
+                f'<fill><patternFill patternType="gray125"/></fill>{fills}</fills>'
+                '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+                '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                f'<cellXfs count="{len(self.style_ids) + 1}"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" '
+                f'xfId="0"/>{cell_formats}</cellXfs>'
+                '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+                '</styleSheet>')
@@ -0,0 +1,94 @@
+# summary_index.py
+import json
+import os
+from collections import namedtuple
+
+# row is the order's header row in the summary sheet, zip_mtime the zip timestamp written in column H
+SummaryEntry = namedtuple('SummaryEntry', ['row', 'zip_mtime', 'status'])
+
+
+class SummaryIndex:
+    """Order number -> SummaryEntry of the orders in a zip order summary workbook
+
+    Built with one pass over the sheet, then kept in a JSON sidecar next to
+    the workbook together with the workbook's (size, mtime) signature. While
+    the signature matches, later runs decide what to re-validate from the
+    sidecar alone without parsing the xlsx. An order validated more than once
+    keeps its last row, so a re-validated zip isn't validated again.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, entries=None, next_row=2, signature=None):
+        self.entries = entries if entries is not None else {}
+        self.next_row = next_row  # first free row of the sheet
+        self.signature = signature
+
+    @staticmethod
+    def sidecar_path(workbook_path):
+        return os.path.splitext(workbook_path)[0] + '.index.json'
+
+    @staticmethod
+    def get_signature(workbook_path):
+        try:
+            workbook_stat = os.stat(workbook_path)
+        except OSError:
+            return None
+        return [workbook_stat.st_size, workbook_stat.st_mtime]
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Index the order header rows (the rows with an order number) of a summary sheet's row values"""
+        entries = {}
+        row = 1
+        for row, row_data in enumerate(rows, 1):
+            if row == 1 or len(row_data) < 3 or row_data[1] in (None, ''):
+                continue
+            try:
+                zip_mtime = float(row_data[7])
+            except (IndexError, TypeError, ValueError):
+                zip_mtime = None
+            entries[str(row_data[1])] = SummaryEntry(row, zip_mtime, row_data[2])
+        return cls(entries, row + 1)
+
+    @classmethod
+    def load(cls, workbook_path):
+        """Index from the workbook's sidecar, None if there is none or the workbook changed since"""
+        signature = cls.get_signature(workbook_path)
+        sidecar_path = cls.sidecar_path(workbook_path)
+        if signature is None or not os.path.exists(sidecar_path):
+            return None
+        try:
+            with open(sidecar_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != cls.FORMAT_VERSION or data.get('signature') != signature:
+                return None
+            entries = {order_number: SummaryEntry(*entry) for order_number, entry in data['entries'].items()}
+            return cls(entries, data['next_row'], signature)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable summary index {sidecar_path}: {e}")
+            return None
+
+    def save(self, workbook_path):
+        """Write the sidecar, stamped with the workbook as it is now on disk"""
+        self.signature = self.get_signature(workbook_path)
+        sidecar_path = self.sidecar_path(workbook_path)
+        temp_path = sidecar_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.FORMAT_VERSION, 'signature': self.signature,
+                           'next_row': self.next_row,
+                           'entries': {order_number: list(entry) for order_number, entry in self.entries.items()}}, f)
+            os.replace(temp_path, sidecar_path)
+        except OSError as e:
+            print(f"Error saving summary index {sidecar_path}: {e}")
+
+    def get(self, order_number):
+        return self.entries.get(str(order_number))
+
+    def is_current(self, order_number, zip_mtime):
+        """True if the order was validated with a zip at least as new as zip_mtime (whole seconds, as legacy D)"""
+        entry = self.get(order_number)
+        return entry is not None and entry.zip_mtime is not None and int(entry.zip_mtime) >= int(zip_mtime)
+
+    def add(self, order_number, row, zip_mtime, status):
+        self.entries[str(order_number)] = SummaryEntry(row, zip_mtime, status)
@@ -0,0 +1,130 @@
+# test_filename_normalizer.py
+import os
+import re
+import sys
+import time
+from filename_normalizer import (adjust_abi_chars, neutralize_suffixes, normalize_filename,
+                                 normalize_many)
+
+
+# Legacy implementations, copied from LegacyScripts/A IND Sort Files 1.py
+def AdjustABIChars(fileName):
+    newFileName = fileName
+    newFileName = newFileName.replace(' ', '')
+    newFileName = newFileName.replace('+', '&')
+    newFileName = newFileName.replace('*', '-')
+    newFileName = newFileName.replace('|', '-')
+    newFileName = newFileName.replace('/', '-')
+    newFileName = newFileName.replace('\\', '-')
+    newFileName = newFileName.replace(':', '-')
+    newFileName = newFileName.replace('"', '')
+    newFileName = newFileName.replace("'", '')
+    newFileName = newFileName.replace('<', '-')
+    newFileName = newFileName.replace('>', '-')
+    newFileName = newFileName.replace('?', '')
+    newFileName = newFileName.replace(',', '')
+    return newFileName
+
+
+def NeutralizeSuffixes(fileName):
+    newFileName = fileName
+    newFileName = newFileName.replace('_Premixed', '')
+    newFileName = newFileName.replace('_RTI', '')
+    return newFileName
+
+
+def LegacyNormalize(fileName, removeExtension=True):
+    newFileName = AdjustABIChars(fileName)
+    if removeExtension and '.' in newFileName:
+        newFileName = newFileName[:newFileName.rfind('.')]
+    return re.sub(r'{.*?}', '', NeutralizeSuffixes(newFileName))
+
+
+SAMPLE_NAMES = [
+    '',
+    '.',
+    '.ab1',
+    'plain.ab1',
+    '{01A}Sample 1_Primer+F.ab1',
+    '{01A}{!P}Sample_1_Premixed.ab1',
+    '{03B}{PCR1234_exp1}Clone*7|8/9\\10.ab1',
+    'Odd:name"with\'quotes<and>more?,.ab1',
+    'Sample_RTI_Premixed.v2.ab1',
+    'Sample_Premixed_RTI',
+    'Sample_RT_I.ab1',
+    '{unclosed brace.ab1',
+    'braces}{in}{wrong{order}.ab1',
+    '__Premixed__RTI_RTI.txt',
+    'trailing dot.',
+    'μ-sample é+ü.ab1',
+    '07H_.ab1',
+    '01A__.ab1',
+]
+
+
+def load_order_key_names(key_path):
+    """Raw sample names from an order key, if one is available"""
+    names = []
+    if key_path and os.path.exists(key_path):
+        with open(key_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                fields = line.rstrip('\r\n').split('\t')
+                if len(fields) > 3:
+                    names.append(fields[3])
+    return names
+
+
+def check_parity(names):
+    """Compare the kernel against the legacy functions, returns the mismatches"""
+    mismatches = []
+    for name in names:
+        checks = [
+            ('adjust_abi_chars', adjust_abi_chars(name), AdjustABIChars(name)),
+            ('neutralize_suffixes', neutralize_suffixes(name), NeutralizeSuffixes(name)),
+            ('normalize_filename', normalize_filename(name), LegacyNormalize(name)),
+            ('normalize_filename(remove_extension=False)',
+             normalize_filename(name, False), LegacyNormalize(name, False)),
+        ]
+        for label, new, old in checks:
+            if new.encode('utf-8', 'surrogatepass') != old.encode('utf-8', 'surrogatepass'):
+                mismatches.append((label, name, new, old))
+
+    batch = normalize_many(names)
+    for name, new in zip(names, batch):
+        if new != LegacyNormalize(name):
+            mismatches.append(('normalize_many', name, new, LegacyNormalize(name)))
+    return mismatches
+
+
+def main():
+    key_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'Dependencies', 'order_key.txt')
+    key_names = load_order_key_names(key_path)
+    names = SAMPLE_NAMES + key_names + [name + '.ab1' for name in key_names]
+    print(f"Checking {len(names)} names ({len(key_names)} from {key_path})")
+
+    mismatches = check_parity(names)
+    for label, name, new, old in mismatches[:20]:
+        print(f"MISMATCH {label}: {name!r} -> {new!r}, legacy {old!r}")
+
+    # Rough timing, second pass is served from the memo
+    normalize_filename.cache_clear()
+    for label in ('cold', 'warm'):
+        start = time.perf_counter()
+        normalize_many(names)
+        print(f"{label} pass: {time.perf_counter() - start:.4f}s")
+    start = time.perf_counter()
+    for name in names:
+        LegacyNormalize(name)
+    print(f"legacy pass: {time.perf_counter() - start:.4f}s")
+    print(normalize_filename.cache_info())
+
+    if mismatches:
+        print(f"FAILED: {len(mismatches)} mismatches")
+        return 1
+    print("All names match the legacy output")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
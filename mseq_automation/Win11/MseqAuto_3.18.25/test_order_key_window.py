@@ -0,0 +1,90 @@
+# test_order_key_window.py
+import random
+import sys
+from config import MseqConfig
+from file_system_dao import FileSystemDAO
+from folder_processor import FolderProcessor
+from order_key_index import OrderKeyIndex
+from order_key_table import OrderKeyTable
+
+# I numbers of the key, the window holds the recent ones
+I_NUMBERS = ['21000', '21001', '21002', '21003', '21004', '21005']
+WINDOW = {'21003', '21004', '21005'}
+
+# (sample name, current I number): the match picked must not depend on the window
+CASES = [
+    ('Only_Old', '21004'),  # only outside the window
+    ('Only_Recent', '21004'),  # only inside the window
+    ('Old_And_Recent', '21004'),  # current I number has no match, the full key's first match is outside
+    ('Old_And_Recent', '21005'),  # current I number matches inside the window
+    ('Old_And_Recent', '21000'),  # current I number outside the window
+    ('Old_And_Recent', None),  # folder without an I number
+    ('Old_And_Recent', ''),
+    ('Missing', '21004'),
+]
+KEY_ROWS = [
+    ('21000', 'Acct', '1000', 'Only_Old'),
+    ('21001', 'Acct', '1001', 'Old_And_Recent'),
+    ('21003', 'Acct', '1003', 'Only_Recent'),
+    ('21005', 'Acct', '1005', 'Old_And_Recent'),
+    ('21002', 'Acct', '1002', 'Old_And_Recent'),
+]
+
+
+def random_key(count, seed=1):
+    """Order key rows from a small name pool so names repeat across I numbers"""
+    rng = random.Random(seed)
+    return [(rng.choice(I_NUMBERS), 'Acct', str(2000 + row), f"Sample_{rng.randint(0, 40)}")
+            for row in range(count)]
+
+
+def make_processor(order_key, window):
+    config = MseqConfig()
+    file_dao = FileSystemDAO(config)
+    processor = FolderProcessor(file_dao, None, config, lambda message: None)
+    processor.build_order_key_index(order_key, window)
+    return processor, file_dao
+
+
+def check_parity(rows, cases):
+    """Compare windowed lookups against the full key, returns the mismatches"""
+    table = OrderKeyTable()
+    for row in rows:
+        table.append(*row)
+    full, file_dao = make_processor(table, None)
+    index = OrderKeyIndex.build(table, lambda name: file_dao.normalize_filename(name, remove_extension=False))
+    lookups = [
+        ('window', make_processor(table, WINDOW)[0]),
+        ('compiled index', make_processor(index, None)[0]),
+        ('compiled index with window', make_processor(index, WINDOW)[0]),
+    ]
+
+    mismatches = []
+    for name, current_i_num in cases:
+        expected = full.find_order_key_match(name, current_i_num)
+        for label, processor in lookups:
+            found = processor.find_order_key_match(name, current_i_num)
+            if found != expected:
+                mismatches.append((label, name, current_i_num, found, expected))
+    return mismatches
+
+
+def main():
+    rows = KEY_ROWS + random_key(500)
+    names = sorted({row[3] for row in rows}) + ['Missing']
+    cases = CASES + [(name, current_i_num) for name in names for current_i_num in I_NUMBERS + [None]]
+    print(f"Checking {len(cases)} lookups over {len(rows)} order key rows")
+
+    mismatches = check_parity(rows, cases)
+    for label, name, current_i_num, found, expected in mismatches[:20]:
+        print(f"MISMATCH {label}: {name!r} in I number {current_i_num!r} -> {found!r}, full key {expected!r}")
+
+    if mismatches:
+        print(f"FAILED: {len(mismatches)} mismatches")
+        return 1
+    print("All lookups match the full order key")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
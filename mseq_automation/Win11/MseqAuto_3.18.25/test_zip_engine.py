@@ -0,0 +1,269 @@
+# test_zip_engine.py
+import os
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from compression_policy import CompressionPolicy
+from parallel_zip_writer import ZIP_FILECOUNT_LIMIT, ParallelZipWriter
+from zip_engine import (ZipEngine, ZipJob, copy_checked, get_zip_changes, is_linked, on_same_volume,
+                        run_zip_job, write_archive, write_zip_with_copy)
+
+# File name -> contents; random bytes don't shrink and are stored, the rest deflates
+ORDER_FILES = {
+    'Sample1.ab1': b'ABIF' + b'ACGT' * 5000,
+    'Sample2_Premixed.ab1': b'ABIF' + bytes(range(256)) * 40,
+    'Sampleµ é+ü.ab1': b'ABIF' + b'TTGA' * 3000,
+    'Order.seq.txt': b'>Sample1\nACGTACGT\n' * 200,
+    'Incompressible.ab1': os.urandom(20000),
+    'Empty.seq.info.txt': b'',
+}
+
+
+def write_files(folder, files):
+    """Write name -> contents into folder, returns the paths in order"""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for name, data in files.items():
+        path = os.path.join(folder, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def read_back(zip_path):
+    """name -> (contents, compress type) of an archive, raises on a bad CRC"""
+    with ZipFile(zip_path, 'r') as zip_file:
+        bad_member = zip_file.testzip()
+        if bad_member is not None:
+            raise ValueError(f"bad CRC in {bad_member}")
+        return {info.filename: (zip_file.read(info), info.compress_type) for info in zip_file.infolist()}
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def check(failures, label, condition, detail=''):
+    if not condition:
+        failures.append(f"{label}{': ' + str(detail) if detail else ''}")
+
+
+def check_contents(failures, label, zip_path, files):
+    """The archive holds exactly files, byte for byte"""
+    try:
+        members = read_back(zip_path)
+    except Exception as e:
+        failures.append(f"{label}: {e}")
+        return {}
+    check(failures, f"{label} names", sorted(members) == sorted(files), sorted(members))
+    for name, data in files.items():
+        check(failures, f"{label} {name!r}", members.get(name, (None,))[0] == data)
+    return members
+
+
+def check_parallel_writer(folder, pool):
+    """Stored, deflated and UTF-8 named members written by the hand-built writer"""
+    failures = []
+    paths = write_files(os.path.join(folder, 'parallel'), ORDER_FILES)
+    zip_path = os.path.join(folder, 'parallel.zip')
+    with open(zip_path, 'wb') as target:
+        bytes_in = ParallelZipWriter(pool, max_pending=2).write(target, paths)
+    check(failures, 'parallel bytes in', bytes_in == sum(len(data) for data in ORDER_FILES.values()), bytes_in)
+    members = check_contents(failures, 'parallel', zip_path, ORDER_FILES)
+    if members:
+        check(failures, 'parallel deflated', members['Sample1.ab1'][1] == ZIP_DEFLATED)
+        check(failures, 'parallel incompressible stored', members['Incompressible.ab1'][1] == ZIP_STORED)
+
+    # Member timestamps survive, so an update sees nothing to do
+    changes = get_zip_changes(zip_path, paths)
+    check(failures, 'parallel zip changes', not any(changes), changes)
+
+    # Every member stored by policy
+    stored_path = os.path.join(folder, 'stored.zip')
+    with open(stored_path, 'wb') as target:
+        ParallelZipWriter(pool, CompressionPolicy(default=('stored', None))).write(target, paths)
+    members = check_contents(failures, 'stored', stored_path, ORDER_FILES)
+    check(failures, 'stored types', all(compress_type == ZIP_STORED for _, compress_type in members.values()))
+    return failures
+
+
+def check_zip64_member_count(folder):
+    """More members than the classic end record can count"""
+    failures = []
+    path = write_files(os.path.join(folder, 'zip64'), {'Tiny.ab1': b'x'})[0]
+    count = ZIP_FILECOUNT_LIMIT + 10
+    zip_path = os.path.join(folder, 'zip64.zip')
+    # A thread pool is enough here, the members are one byte
+    with ThreadPoolExecutor(max_workers=4) as pool, open(zip_path, 'wb') as target:
+        ParallelZipWriter(pool).write(target, [path] * count)
+    with ZipFile(zip_path, 'r') as zip_file:
+        infos = zip_file.infolist()
+        check(failures, 'zip64 member count', len(infos) == count, len(infos))
+        check(failures, 'zip64 last member', zip_file.read(infos[-1]) == b'x')
+    return failures
+
+
+def check_engine(folder):
+    """Archives spread over worker processes, a failed job leaves no archive behind"""
+    failures = []
+    jobs = []
+    for order in range(6):
+        paths = write_files(os.path.join(folder, f'order{order}'), ORDER_FILES)
+        jobs.append(ZipJob(os.path.dirname(paths[0]), os.path.join(folder, f'order{order}.zip'), paths))
+    missing = os.path.join(folder, 'order0', 'Missing.ab1')
+    jobs.append(ZipJob(folder, os.path.join(folder, 'failed.zip'), jobs[0].files + [missing]))
+
+    for max_workers in (1, 4, 16):
+        report = ZipEngine(max_workers, logger=lambda message: None).run(jobs)
+        check(failures, f"engine {max_workers} workers zipped", len(report.zipped) == 6, report.summary())
+        check(failures, f"engine {max_workers} workers failed", [result.job for result in report.failed] == [jobs[-1]])
+        check(failures, f"engine {max_workers} workers failed zip removed", not os.path.exists(jobs[-1].zip_path))
+        for job in jobs[:-1]:
+            check_contents(failures, f"engine {max_workers} workers {os.path.basename(job.zip_path)}",
+                           job.zip_path, ORDER_FILES)
+    return failures
+
+
+def check_copies(folder, pool, other_volume=None):
+    """Zip dump copies by hardlink, by teeing the stream, and by a checked copy"""
+    failures = []
+    paths = write_files(os.path.join(folder, 'copies'), ORDER_FILES)
+    dump_folder = os.path.join(folder, 'dump')
+    os.makedirs(dump_folder)
+
+    for label, job_pool in (('serial', None), ('pool', pool)):
+        zip_path = os.path.join(folder, f'link {label}.zip')
+        copy_path = os.path.join(dump_folder, f'link {label}.zip')
+        _, bytes_out, method = write_zip_with_copy(zip_path, paths, copy_path, job_pool)
+        check(failures, f"same volume {label} method", method in ('link', 'copy'), method)
+        check(failures, f"same volume {label} size", os.path.getsize(copy_path) == bytes_out)
+        check_contents(failures, f"same volume {label} copy", copy_path, ORDER_FILES)
+
+        # Both files from one stream, as on two volumes
+        tee_paths = [os.path.join(folder, f'tee {label}.zip'), os.path.join(dump_folder, f'tee {label}.zip')]
+        _, bytes_out, crc = write_archive(tee_paths, paths, job_pool)
+        check(failures, f"tee {label} identical", read_file(tee_paths[0]) == read_file(tee_paths[1]))
+        check(failures, f"tee {label} crc", zlib.crc32(read_file(tee_paths[1])) == crc)
+        check_contents(failures, f"tee {label}", tee_paths[1], ORDER_FILES)
+
+        # Fallback where the share has no hardlinks
+        fallback_path = os.path.join(dump_folder, f'fallback {label}.zip')
+        copy_checked(tee_paths[0], fallback_path, crc)
+        check(failures, f"copy {label} identical", read_file(fallback_path) == read_file(tee_paths[0]))
+        try:
+            copy_checked(tee_paths[0], fallback_path, crc ^ 1)
+            failures.append(f"copy {label} accepted a wrong CRC")
+        except OSError:
+            pass
+
+    if other_volume:
+        zip_path = os.path.join(folder, 'other volume.zip')
+        copy_path = os.path.join(other_volume, f'test_zip_engine {os.getpid()}.zip')
+        try:
+            _, _, method = write_zip_with_copy(zip_path, paths, copy_path, pool)
+            check(failures, 'other volume method', method == 'tee', method)
+            check(failures, 'other volume identical', read_file(zip_path) == read_file(copy_path))
+        finally:
+            if os.path.exists(copy_path):
+                os.remove(copy_path)
+    return failures
+
+
+def check_updates(folder, pool):
+    """Append, rewrite, unchanged and failed updates of an existing archive and its copy"""
+    failures = []
+    order_folder = os.path.join(folder, 'update')
+    paths = write_files(order_folder, ORDER_FILES)
+    dump_folder = os.path.join(folder, 'update dump')
+    os.makedirs(dump_folder)
+    zip_path = os.path.join(folder, 'update.zip')
+    copy_path = os.path.join(dump_folder, 'update.zip')
+    run_zip_job(ZipJob(order_folder, zip_path, paths, copy_path), pool)
+    files = dict(ORDER_FILES)
+
+    # Nothing changed: archive untouched, a deleted copy is not sent to the dump again
+    os.remove(copy_path)
+    result = run_zip_job(ZipJob(order_folder, zip_path, paths, copy_path, True), pool)
+    check(failures, 'unchanged action', result.success and result.action == 'unchanged', result)
+    check(failures, 'unchanged copy not recreated', not os.path.exists(copy_path))
+
+    # New file without a linked copy: appended, copy refreshed
+    new_paths = write_files(order_folder, {'Late.ab1': b'ABIF' + b'GATC' * 1000})
+    files['Late.ab1'] = b'ABIF' + b'GATC' * 1000
+    paths += new_paths
+    result = run_zip_job(ZipJob(order_folder, zip_path, paths, copy_path, True), pool)
+    check(failures, 'append action', result.success and result.action == 'appended', result)
+    check_contents(failures, 'append', zip_path, files)
+    check_contents(failures, 'append copy', copy_path, files)
+
+    # New file with a linked copy: rewritten, the handed-off copy keeps its members
+    if os.path.exists(copy_path) and is_linked(zip_path):
+        handed_off = read_file(copy_path)
+        paths += write_files(order_folder, {'Later.ab1': b'ABIF' + b'CCGG' * 1000})
+        files['Later.ab1'] = b'ABIF' + b'CCGG' * 1000
+        result = run_zip_job(ZipJob(order_folder, zip_path, paths, None, True), pool)
+        check(failures, 'linked action', result.success and result.action == 'rewritten', result)
+        check(failures, 'linked copy kept', read_file(copy_path) == handed_off)
+        check_contents(failures, 'linked rewrite', zip_path, files)
+
+    # Changed file: rewritten
+    time.sleep(2.1)  # zip timestamps have 2 second resolution
+    write_files(order_folder, {'Sample1.ab1': b'ABIF' + b'ACGT' * 6000})
+    files['Sample1.ab1'] = b'ABIF' + b'ACGT' * 6000
+    result = run_zip_job(ZipJob(order_folder, zip_path, paths, copy_path, True), pool)
+    check(failures, 'rewrite action', result.success and result.action == 'rewritten', result)
+    check_contents(failures, 'rewrite', zip_path, files)
+    check_contents(failures, 'rewrite copy', copy_path, files)
+
+    # Failed append and failed rewrite leave the archive and its copy as they were
+    os.remove(copy_path)
+    copy_checked(zip_path, copy_path)
+    before = read_file(zip_path)
+    missing = os.path.join(order_folder, 'Missing.ab1')
+    for label, job_paths in (('append', paths + [missing]), ('rewrite', paths[1:] + [missing])):
+        result = run_zip_job(ZipJob(order_folder, zip_path, job_paths, copy_path, True), pool)
+        check(failures, f"failed {label} reported", not result.success, result)
+        check(failures, f"failed {label} archive kept", os.path.exists(zip_path) and read_file(zip_path) == before)
+        check(failures, f"failed {label} copy kept", os.path.exists(copy_path) and read_file(copy_path) == before)
+        leftovers = [name for name in os.listdir(folder) + os.listdir(dump_folder) if name.endswith('.tmp')]
+        check(failures, f"failed {label} temp files removed", not leftovers, leftovers)
+    return failures
+
+
+def main():
+    # Optional folder on another volume than the temp folder, to zip a copy by tee
+    other_volume = sys.argv[1] if len(sys.argv) > 1 else None
+    failures = []
+    with tempfile.TemporaryDirectory() as folder, ProcessPoolExecutor(max_workers=4) as pool:
+        if other_volume and on_same_volume(os.path.join(folder, 'x'), os.path.join(other_volume, 'x')):
+            print(f"{other_volume} is on the same volume as {folder}, the tee to it is not checked")
+            other_volume = None
+        for label, check_function, args in [
+            ('parallel writer', check_parallel_writer, (folder, pool)),
+            ('ZIP64 member count', check_zip64_member_count, (folder,)),
+            ('engine', check_engine, (folder,)),
+            ('zip dump copies', check_copies, (folder, pool, other_volume)),
+            ('updates', check_updates, (folder, pool)),
+        ]:
+            start = time.perf_counter()
+            check_failures = check_function(*args)
+            print(f"{label}: {len(check_failures)} failures in {time.perf_counter() - start:.2f}s")
+            failures += check_failures
+
+    for failure in failures[:20]:
+        print(f"FAILURE {failure}")
+    if failures:
+        print(f"FAILED: {len(failures)} failures")
+        return 1
+    print("All zip engine checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# test_zip_matching.py
+import random
+import sys
+import time
+from config import MseqConfig
+from file_system_dao import FileSystemDAO
+from folder_processor import FolderProcessor
+
+
+# Legacy implementations, copied from LegacyScripts/D IND Validate Zip Files.py
+def AdjustABIChars(fileName):
+    newFileName = fileName
+    newFileName = newFileName.replace(" ", "")
+    newFileName = newFileName.replace("+", "&")
+    newFileName = newFileName.replace("*", "-")
+    newFileName = newFileName.replace("|", "-")
+    newFileName = newFileName.replace("/", "-")
+    newFileName = newFileName.replace("\\", "-")
+    newFileName = newFileName.replace(":", "-")
+    newFileName = newFileName.replace("\"", "")
+    newFileName = newFileName.replace("'", "")
+    newFileName = newFileName.replace("<", "-")
+    newFileName = newFileName.replace(">", "-")
+    newFileName = newFileName.replace("?", "")
+    newFileName = newFileName.replace(",", "")
+    return newFileName
+
+
+def NeutralizeSuffixesAnd_ab1_Extension(fileName):
+    newFileName = fileName
+    newFileName = newFileName.replace('_Premixed', '')
+    newFileName = newFileName.replace('_RTI', '')
+    newFileName = newFileName.replace('.ab1', '')
+    return newFileName
+
+
+def LegacyValidate(rawNames, zipContents):
+    """Legacy D's matching loop, with the sheet writes collected into lists"""
+    orderKey = [[AdjustABIChars(rawName), rawName] for rawName in rawNames]
+    zipContents = list(zipContents)
+    txtlist = ['raw.qual.txt', 'raw.seq.txt', 'seq.info.txt', 'seq.qual.txt', 'seq.txt']
+    matches = []
+    mismatchesInZip = []
+    mismatchesInOrder = []
+    txtFiles = []
+
+    for item in orderKey[:]:
+        for zipitem in zipContents[:]:
+            if zipitem.endswith('.ab1'):
+                cleanZipItem = NeutralizeSuffixesAnd_ab1_Extension(zipitem)
+                if item[0]==cleanZipItem:  #match
+                    matches.append((item[1], zipitem))
+                    zipContents.remove(zipitem)
+                    orderKey.remove(item)
+                    break
+
+    for zipitem in zipContents:
+        if zipitem.endswith('.ab1'):
+            mismatchesInZip.append(zipitem)
+
+    for item in orderKey:
+        mismatchesInOrder.append(item[1])
+
+    for txt in txtlist:
+        for zipitem in zipContents:
+            if zipitem.endswith(txt):
+                zipContents.remove(zipitem)
+                txtFiles.append(txt)
+                break
+    return matches, mismatchesInZip, mismatchesInOrder, txtFiles
+
+
+TXT_FILES = ['.raw.qual.txt', '.raw.seq.txt', '.seq.info.txt', '.seq.qual.txt', '.seq.txt']
+
+# (order sample names, zip member names)
+CASES = [
+    (['Sample1', 'Sample2'],
+     ['Sample1.ab1', 'Sample2.ab1'] + ['Order' + txt for txt in TXT_FILES]),
+    # Duplicate sample names in the order and in the zip
+    (['Dup', 'Dup', 'Dup'], ['Dup.ab1', 'Dup_Premixed.ab1']),
+    (['Dup', 'Other', 'Dup'], ['Dup_RTI.ab1', 'Dup.ab1', 'Dup.ab1', 'Other.ab1']),
+    # Suffixes are only dropped from the zip side
+    (['Sample_Premixed', 'Sample_RTI', 'Sample'], ['Sample_Premixed.ab1', 'Sample_RTI.ab1']),
+    (['Mix_RTI_Premixed', 'Mix'], ['Mix_Premixed_RTI.ab1', 'Mix_RTI.ab1']),
+    # ABI adjusted order names
+    (['Sample 1+F', 'Clone*7/8', 'Odd:"name"?,'], ['Sample1&F.ab1', 'Clone-7-8.ab1', 'Odd-name.ab1']),
+    # Extra and missing files, non ab1 files
+    (['Ordered', 'Missing'], ['Ordered.ab1', 'Extra.ab1', 'Extra.ab1', 'notes.pdf', 'Missing.scf']),
+    ([], ['Stray.ab1', 'Order.seq.txt']),
+    (['Nothing', 'Zipped'], []),
+    # Missing, duplicate and look-alike txt files
+    (['A'], ['A.ab1', 'A.raw.seq.txt', 'A.seq.txt', 'A.seq.txt', 'A.seq.info.txt']),
+    (['A'], ['A.ab1', 'A.raw.qual.txt', 'A.raw.seq.txt', 'A.seq.qual.txt']),
+]
+
+
+def random_cases(count, seed=1):
+    """Orders drawn from a small name pool so duplicates and suffixes collide often"""
+    rng = random.Random(seed)
+    pool = ['S1', 'S2', 'S3', 'Dup', 'Sample 4', 'Mix+1']
+    suffixes = ['', '', '_Premixed', '_RTI', '_RTI_Premixed']
+    cases = []
+    for _ in range(count):
+        raw_names = [rng.choice(pool) + rng.choice(['', '', '_RTI']) for _ in range(rng.randint(0, 8))]
+        zip_contents = [AdjustABIChars(rng.choice(pool)) + rng.choice(suffixes) + '.ab1'
+                        for _ in range(rng.randint(0, 8))]
+        zip_contents += ['Order' + txt for txt in TXT_FILES if rng.random() < 0.8]
+        rng.shuffle(zip_contents)
+        cases.append((raw_names, zip_contents))
+    return cases
+
+
+def make_processor():
+    config = MseqConfig()
+    processor = FolderProcessor(FileSystemDAO(config), None, config, lambda message: None)
+    return processor, config
+
+
+def check_parity(processor, cases):
+    """Compare _reconcile_order against the legacy loop, returns the mismatches"""
+    order_key = [('1', 'Acct', str(order_number), raw_name)
+                 for order_number, (raw_names, zip_contents) in enumerate(cases, 1000)
+                 for raw_name in raw_names]
+    catalog = processor.get_order_catalog(order_key)
+    mismatches = []
+    for order_number, (raw_names, zip_contents) in enumerate(cases, 1000):
+        result = processor._reconcile_order(catalog, '1', str(order_number), zip_contents)
+        matches, in_zip, in_order, txt_files = LegacyValidate(raw_names, zip_contents)
+        checks = [
+            ('matches', [(match['raw_name'], match['file_name']) for match in result['matches']], matches),
+            ('mismatches_in_zip', result['mismatches_in_zip'], in_zip),
+            ('mismatches_in_order', [item['raw_name'] for item in result['mismatches_in_order']], in_order),
+            ('txt_files', result['txt_files'], ['.' + txt for txt in txt_files]),
+            ('expected_count', result['expected_count'], len(raw_names)),
+        ]
+        for label, new, old in checks:
+            if new != old:
+                mismatches.append((label, raw_names, zip_contents, new, old))
+    return mismatches
+
+
+def main():
+    processor, config = make_processor()
+    if config.TEXT_FILES != TXT_FILES:
+        print(f"Config TEXT_FILES changed, update the test: {config.TEXT_FILES}")
+        return 1
+
+    cases = CASES + random_cases(2000)
+    print(f"Checking {len(cases)} orders ({len(CASES)} fixed, {len(cases) - len(CASES)} random)")
+    mismatches = check_parity(processor, cases)
+    for label, raw_names, zip_contents, new, old in mismatches[:20]:
+        print(f"MISMATCH {label}: order {raw_names!r}, zip {zip_contents!r} -> {new!r}, legacy {old!r}")
+
+    # Rough timing on one large order with many duplicates
+    raw_names = [f"Sample{n % 500}" for n in range(5000)]
+    zip_contents = [f"Sample{n % 500}.ab1" for n in reversed(range(5000))]
+    processor.order_catalog = None
+    catalog = processor.get_order_catalog([('1', 'Acct', '1', raw_name) for raw_name in raw_names])
+    start = time.perf_counter()
+    processor._reconcile_order(catalog, '1', '1', zip_contents)
+    print(f"5000 samples: {time.perf_counter() - start:.4f}s")
+    start = time.perf_counter()
+    LegacyValidate(raw_names, zip_contents)
+    print(f"5000 samples, legacy: {time.perf_counter() - start:.4f}s")
+
+    if mismatches:
+        print(f"FAILED: {len(mismatches)} mismatches")
+        return 1
+    print("All orders match the legacy output")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,13 +12,16 @@ from file_system_dao import FileSystemDAO
 from folder_processor import FolderProcessor
 from excel_dao import ExcelDAO
 from logger import setup_logger
+from summary_index import SummaryIndex
+from validation_report import SUMMARY_HEADERS, ValidationReport, validation_rows
+from zip_validator import ValidationTask, ZipValidator
 
 # Check for 32-bit Python requirement
 if sys.maxsize > 2**32:
     py32_path = MseqConfig.PYTHON32_PATH
     if os.path.exists(py32_path) and py32_path != sys.executable:
         script_path = os.path.abspath(__file__)
-        subprocess.run([py32_path, script_path])
+        subprocess.run([py32_path, script_path] + sys.argv[1:])
         sys.exit(0)
     else:
         print("32-bit Python not specified or same as current interpreter")
@@ -42,6 +45,27 @@ def get_folder_from_user():
         print("No folder selected")
         return None
 
+def copy_summary_rows(writer, rows, resolved_orders):
+    """Copy the rows of the existing summary, earlier rows of newly completed orders become Resolved
+    
+    Detail rows of Completed and Resolved orders are hidden, as legacy D hides them.
+    """
+    status = None
+    for row, (values, styles) in enumerate(rows, 1):
+        values = list(values) + [None] * (3 - len(values))
+        if row == 1 or values[0] == 'Break':
+            status = None
+            writer.append(values, styles)
+        elif values[1] not in (None, ''):
+            # An order's row
+            if str(values[1]) in resolved_orders:
+                values[2] = 'Resolved'
+                styles = dict(styles, C='resolved')
+            status = values[2]
+            writer.append(values, styles)
+        else:
+            writer.append(values, styles, hidden=status in ('Completed', 'Resolved'))
+
 def main():
     # Setup logger
     logger = setup_logger("validate_zip_files")
@@ -57,6 +81,9 @@ def main():
     processor = FolderProcessor(file_dao, None, config, logger=logger.info)
     logger.info("Folder processor initialized")
     
+    # Deep mode also checks the CRC of every zip member, reading the whole archives
+    deep = '--deep' in sys.argv
+    
     # Run batch file to generate order key
     try:
         logger.info(f"Running batch file: {config.BATCH_FILE_PATH}")
@@ -77,8 +104,8 @@ def main():
     
     logger.info(f"Using folder: {data_folder}")
     
-    # Load order key
-    order_key = file_dao.load_order_key(config.KEY_FILE_PATH)
+    # Load compiled order key index (rebuilt only if the key file changed)
+    order_key = file_dao.load_order_key_index(config.KEY_FILE_PATH)
     logger.info("Order key loaded")
     
     # Create Excel file name
@@ -88,42 +115,27 @@ def main():
     # Check if summary file already exists
     summary_exists = os.path.exists(excel_path)
     
-    # Create or load workbook
-    if summary_exists:
-        logger.info(f"Loading existing summary: {excel_filename}")
+    # Orders already in the summary, from the sidecar index while the workbook is unchanged
+    summary_index = SummaryIndex.load(excel_path) if summary_exists else SummaryIndex()
+    if summary_index is not None:
+        if summary_exists:
+            logger.info(f"Summary index loaded: {len(summary_index.entries)} orders")
+    else:
         try:
-            workbook = excel_dao.load_workbook(excel_path)
-            if not workbook:
-                raise Exception("Failed to load existing workbook")
-            worksheet = workbook.active
+            summary_index = SummaryIndex.from_rows(values for values, styles in excel_dao.read_sheet_rows(excel_path))
         except Exception as e:
             logger.error(f"Error loading existing workbook: {e}")
             print(f"Error: Could not load existing summary. Make sure the file is not open in Excel.")
             return
-    else:
-        logger.info("Creating new summary workbook")
-        workbook = excel_dao.create_workbook()
-        worksheet = workbook.active
-        
-        # Add headers
-        worksheet['A1'] = 'I Number'
-        worksheet['B1'] = 'Order Number'
-        worksheet['C1'] = 'Status'
-        worksheet['D1'] = 'Zip Filename'
-        worksheet['E1'] = 'Order Items'
-        worksheet['F1'] = 'File Names'
-        worksheet['G1'] = 'Match Status'
-        worksheet['H1'] = 'Zip Timestamp'
+        summary_index.save(excel_path)
+        logger.info(f"Summary index rebuilt from {excel_filename}: {len(summary_index.entries)} orders")
     
     # Get BioI folders
     bio_folders = file_dao.get_folders(data_folder, pattern=r'bioi-\d+')
     logger.info(f"Found {len(bio_folders)} BioI folders")
     
-    # Track number of orders validated
-    order_count = 0
-    row_count = worksheet.max_row + 1 if summary_exists else 2
-    
-    # Process each BioI folder
+    # Find the order zips that need validating
+    tasks = []
     for bio_folder in bio_folders:
         # Get order folders
         order_folders = processor.get_order_folders(bio_folder)
@@ -141,114 +153,65 @@ def main():
             order_number = processor.get_order_number_from_folder_name(order_folder)
             
             # Check if order already in summary with same zip timestamp
-            if summary_exists:
-                current_mod_time = os.path.getmtime(zip_path)
-                existing_mod_time = processor.get_zip_mod_time(worksheet, order_number)
-                
-                if existing_mod_time and float(existing_mod_time) >= current_mod_time:
-                    logger.info(f"Skipping {os.path.basename(order_folder)} - already validated")
-                    continue
-            
-            # Validate zip contents against order key
-            logger.info(f"Validating {os.path.basename(order_folder)}")
-            validation_result = processor.validate_zip_contents(
-                zip_path, i_number, order_number, order_key
-            )
+            if summary_index.is_current(order_number, os.path.getmtime(zip_path)):
+                logger.info(f"Skipping {os.path.basename(order_folder)} - already validated")
+                continue
             
-            # Add validation results to worksheet
-            if validation_result:
-                order_count += 1
-                order_row = row_count
-                
-                # Write order header info
-                worksheet[f'A{row_count}'] = i_number
-                worksheet[f'B{row_count}'] = order_number
-                worksheet[f'D{row_count}'] = os.path.basename(zip_path)
-                worksheet[f'H{row_count}'] = str(int(os.path.getmtime(zip_path)))
-                
-                # Determine status color based on match counts
-                match_count = validation_result.get('match_count', 0)
-                mismatch_count = validation_result.get('mismatch_count', 0)
-                txt_count = validation_result.get('txt_count', 0)
-                expected_count = validation_result.get('expected_count', 0)
-                
-                # Set status based on validation results
-                is_andreev = config.ANDREEV_NAME in os.path.basename(order_folder).lower()
-                
-                if is_andreev:
-                    # Andreev special case - only care about AB1 files, not TXT
-                    if match_count == expected_count:
-                        worksheet[f'C{row_count}'] = 'Completed'
-                        excel_dao.apply_style(worksheet, f'C{row_count}', 'success')
-                    else:
-                        worksheet[f'C{row_count}'] = 'ATTENTION'
-                        excel_dao.apply_style(worksheet, f'C{row_count}', 'attention')
-                else:
-                    # Normal case - need all AB1 and TXT files
-                    if match_count == expected_count and txt_count == 5:
-                        worksheet[f'C{row_count}'] = 'Completed'
-                        excel_dao.apply_style(worksheet, f'C{row_count}', 'success')
-                    else:
-                        worksheet[f'C{row_count}'] = 'ATTENTION'
-                        excel_dao.apply_style(worksheet, f'C{row_count}', 'attention')
-                
-                row_count += 1
-                
-                # Write detailed match information
-                for match in validation_result.get('matches', []):
-                    worksheet[f'E{row_count}'] = match['raw_name']
-                    worksheet[f'F{row_count}'] = match['file_name']
-                    worksheet[f'G{row_count}'] = 'match'
-                    excel_dao.apply_style(worksheet, f'G{row_count}', 'success')
-                    row_count += 1
-                
-                # Write mismatches - files in zip without corresponding order item
-                for mismatch in validation_result.get('mismatches_in_zip', []):
-                    worksheet[f'F{row_count}'] = mismatch
-                    worksheet[f'G{row_count}'] = 'no match'
-                    excel_dao.apply_style(worksheet, f'G{row_count}', 'attention')
-                    row_count += 1
-                
-                # Write mismatches - order items without corresponding file
-                for mismatch in validation_result.get('mismatches_in_order', []):
-                    worksheet[f'E{row_count}'] = mismatch['raw_name']
-                    worksheet[f'G{row_count}'] = 'no match'
-                    excel_dao.apply_style(worksheet, f'G{row_count}', 'attention')
-                    row_count += 1
-                
-                # Write txt file information
-                for txt_ext in config.TEXT_FILES:
-                    worksheet[f'E{row_count}'] = txt_ext
-                    if txt_ext in validation_result.get('txt_files', []):
-                        worksheet[f'F{row_count}'] = f"*{txt_ext}"
-                        worksheet[f'G{row_count}'] = 'txt file'
-                        excel_dao.apply_style(worksheet, f'G{row_count}', 'success')
-                    else:
-                        worksheet[f'G{row_count}'] = 'MISSING txt file'
-                        excel_dao.apply_style(worksheet, f'G{row_count}', 'attention')
-                    row_count += 1
-                
-                # Hide rows for completed orders
-                if worksheet[f'C{order_row}'].value == 'Completed':
-                    for i in range(order_row + 1, row_count):
-                        worksheet.row_dimensions[i].hidden = True
-    
-    # If this is an update to existing workbook, add a break
-    if summary_exists and order_count > 0:
-        worksheet[f'A{row_count}'] = "Break"
-        excel_dao.apply_style(worksheet, f'A{row_count}', 'break')
-    
-    # Auto-adjust column widths
-    if order_count > 0:
-        excel_dao.adjust_column_widths(worksheet)
+            tasks.append(ValidationTask(order_folder, zip_path, i_number, order_number))
+    
+    # Validate all zips against the order key, the zip directories are read in parallel.
+    # Each order goes into the CSV and HTML reports as soon as it is validated
+    logger.info(f"Validating {len(tasks)} order zips")
+    validator = ZipValidator(processor, config.VALIDATION_WORKERS, deep, logger.info)
+    validations = []
+    if tasks:
+        report_path = os.path.splitext(excel_path)[0]
+        with ValidationReport(report_path + '.csv', report_path + '.html', config, logger.info) as report:
+            for validation in validator.iter_validate(tasks, order_key):
+                report.add(validation)
+                validations.append(validation)
+        logger.info(f"Reports written to {os.path.basename(report_path)}.csv and .html")
+    
+    # Nothing new, the workbook stays as it is
+    if not validations:
+        logger.info("Total orders validated: 0")
+        print("All done! 0 orders validated.")
+        return
     
-    # Save workbook
+    # Stream the existing rows and the new ones into a new workbook, then swap it in
+    resolved_orders = {str(validation.order_number) for validation in validations
+                       if validation.status == 'Completed' and summary_index.get(validation.order_number)}
+    temp_path = excel_path + '.tmp'
+    order_count = 0
     try:
-        excel_dao.save_workbook(workbook, excel_path)
+        with excel_dao.open_sheet_writer(temp_path) as writer:
+            if summary_exists:
+                copy_summary_rows(writer, excel_dao.read_sheet_rows(excel_path), resolved_orders)
+            else:
+                writer.append(SUMMARY_HEADERS)
+            
+            # Add validation results
+            for validation in validations:
+                order_count += 1
+                order_row = writer.row_count + 1
+                for values, styles, hidden in validation_rows(validation, config):
+                    writer.append(values, styles, hidden)
+                zip_mtime = int(validation.zip_mtime) if validation.zip_mtime is not None else None
+                summary_index.add(validation.order_number, order_row, zip_mtime, validation.status)
+            
+            # If this is an update to existing workbook, add a break
+            if summary_exists:
+                writer.append(['Break'], {'A': 'break'})
+            summary_index.next_row = writer.row_count + 1
+        os.replace(temp_path, excel_path)
         logger.info(f"Summary saved to {excel_filename}")
+        summary_index.save(excel_path)
     except Exception as e:
         logger.error(f"Error saving workbook: {e}")
         print(f"Error: Could not save summary. Make sure the file is not open in Excel.")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return
     
     logger.info(f"Total orders validated: {order_count}")
     print(f"All done! {order_count} orders validated.")
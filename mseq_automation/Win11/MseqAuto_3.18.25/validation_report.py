@@ -0,0 +1,146 @@
+# validation_report.py
+import csv
+import html
+import os
+from datetime import datetime
+
+SUMMARY_HEADERS = ['I Number', 'Order Number', 'Status', 'Zip Filename',
+                   'Order Items', 'File Names', 'Match Status', 'Zip Timestamp']
+
+
+def validation_rows(validation, config):
+    """Summary sheet rows of one validated order as (values, styles, hidden), the order's row first"""
+    # Detail rows of completed orders are hidden
+    hidden = validation.status == 'Completed'
+    zip_mtime = str(int(validation.zip_mtime)) if validation.zip_mtime is not None else None
+    status_style = 'success' if validation.status == 'Completed' else 'attention'
+    yield ([validation.i_number, validation.order_number, validation.status,
+            os.path.basename(validation.zip_path), None, None, None, zip_mtime], {'C': status_style}, False)
+
+    # Unreadable zip or bad CRC
+    if validation.error:
+        yield [None, None, None, None, None, validation.error, 'zip error'], {'G': 'attention'}, hidden
+    if validation.result is None:
+        return
+    validation_result = validation.result
+
+    # Detailed match information
+    for match in validation_result.get('matches', []):
+        yield [None, None, None, None, match['raw_name'], match['file_name'], 'match'], {'G': 'success'}, hidden
+
+    # Mismatches - files in zip without corresponding order item
+    for mismatch in validation_result.get('mismatches_in_zip', []):
+        yield [None, None, None, None, None, mismatch, 'no match'], {'G': 'attention'}, hidden
+
+    # Mismatches - order items without corresponding file
+    for mismatch in validation_result.get('mismatches_in_order', []):
+        yield [None, None, None, None, mismatch['raw_name'], None, 'no match'], {'G': 'attention'}, hidden
+
+    # Txt file information
+    for txt_ext in config.TEXT_FILES:
+        if txt_ext in validation_result.get('txt_files', []):
+            yield [None, None, None, None, txt_ext, f"*{txt_ext}", 'txt file'], {'G': 'success'}, hidden
+        else:
+            yield [None, None, None, None, txt_ext, None, 'MISSING txt file'], {'G': 'attention'}, hidden
+
+
+class ValidationReport:
+    """CSV and self-contained HTML report of validated orders, written as they come in
+
+    Each order is written and flushed as soon as it is validated, so staff can
+    follow a long run without opening the summary workbook. The CSV has the
+    summary sheet's rows plus a 'Hidden' column. The HTML shows one
+    collapsible block per order, colored by status, with orders needing
+    attention expanded. Both files are appended to by the day's later runs,
+    the HTML leaves out its closing tags so it can be extended.
+    A report file that can't be opened (e.g. the CSV open in Excel) is
+    skipped with a message.
+    """
+    STATUS_CLASSES = {'Completed': 'success', 'Resolved': 'resolved'}
+    STYLE = (
+        'body{font-family:Calibri,Arial,sans-serif;font-size:14px;margin:16px}'
+        'h2{font-size:16px;margin:20px 0 8px}'
+        'details{border:1px solid #ccc;margin:2px 0;padding:2px 6px}'
+        'summary{cursor:pointer}'
+        'table{border-collapse:collapse;margin:4px 0 4px 16px}'
+        'td{padding:1px 8px}'
+        '.status{display:inline-block;min-width:90px;padding:0 4px}'
+    )
+
+    def __init__(self, csv_path, html_path, config, logger=None):
+        self.config = config
+        self.logger = logger or print
+        self.order_count = 0
+        self.attention_count = 0
+        self.csv_file = self._open(csv_path)
+        self.csv_writer = None
+        if self.csv_file is not None:
+            self.csv_writer = csv.writer(self.csv_file)
+            if self.csv_file.tell() == 0:
+                self.csv_writer.writerow(SUMMARY_HEADERS + ['Hidden'])
+        self.html_file = self._open(html_path)
+        if self.html_file is not None:
+            if self.html_file.tell() == 0:
+                self.html_file.write(self._html_head())
+            self.html_file.write(f"<h2>Run at {datetime.now().strftime('%H:%M:%S')}</h2>\n")
+            self.html_file.flush()
+
+    def _open(self, path):
+        try:
+            return open(path, 'a', encoding='utf-8', newline='')
+        except OSError as e:
+            self.logger(f"Could not open report {path}, skipping it: {e}")
+            return None
+
+    def _html_head(self):
+        fills = ''.join(f'.{name}{{background:#{rgb}}}' for name, rgb in self.config.EXCEL_STYLES.items())
+        return ('<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+                '<title>Zip order summary</title>'
+                f'<style>{self.STYLE}{fills}</style></head><body>\n')
+
+    def add(self, validation):
+        """Write one OrderValidation to both reports"""
+        rows = list(validation_rows(validation, self.config))
+        self.order_count += 1
+        if validation.status != 'Completed':
+            self.attention_count += 1
+        if self.csv_writer is not None:
+            self.csv_writer.writerows(self._csv_row(values, hidden) for values, styles, hidden in rows)
+            self.csv_file.flush()
+        if self.html_file is not None:
+            self.html_file.write(self._html_order(validation, rows))
+            self.html_file.flush()
+
+    def close(self):
+        if self.csv_file is not None:
+            self.csv_file.close()
+        if self.html_file is not None:
+            self.html_file.write(f"<p>{self.order_count} orders validated, "
+                                 f"{self.attention_count} need attention.</p>\n")
+            self.html_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def _csv_row(values, hidden):
+        values = list(values) + [None] * (len(SUMMARY_HEADERS) - len(values))
+        return ['' if value is None else value for value in values] + ['yes' if hidden else '']
+
+    def _html_order(self, validation, rows):
+        status_class = self.STATUS_CLASSES.get(validation.status, 'attention')
+        order_values = rows[0][0]
+        title = ' &middot; '.join(html.escape(str(value)) for value in order_values[0:2] + order_values[3:4])
+        opened = '' if validation.status == 'Completed' else ' open'
+        detail_rows = []
+        for values, styles, hidden in rows[1:]:
+            cells = ''.join(f'<td>{html.escape(str(value)) if value is not None else ""}</td>' for value in values[4:6])
+            match_class = styles.get('G', '')
+            detail_rows.append(f'{cells}<td class="{match_class}">{html.escape(str(values[6]))}</td>')
+        table = ''.join(f'<tr>{row}</tr>' for row in detail_rows)
+        return (f'<details{opened}><summary><span class="status {status_class}">'
+                f'{html.escape(validation.status)}</span> {title}</summary>'
+                f'<table>{table}</table></details>\n')
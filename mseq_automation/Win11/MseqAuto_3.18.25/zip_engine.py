@@ -0,0 +1,401 @@
+# zip_engine.py
+import io
+import os
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from zipfile import ZipFile
+
+from compression_policy import CompressionPolicy
+from parallel_zip_writer import ParallelZipWriter
+
+# copy_path is the zip dump copy of the archive, if any; update brings an existing archive up to date
+ZipJob = namedtuple('ZipJob', ['folder', 'zip_path', 'files', 'copy_path', 'update'], defaults=(None, False))
+# copy_method is how the copy was made: 'link', 'tee' or 'copy' (None without a copy),
+# action is 'created', or for updates 'appended', 'rewritten' or 'unchanged'
+ZipResult = namedtuple('ZipResult', ['job', 'success', 'seconds', 'bytes_in', 'bytes_out', 'error',
+                                     'copy_method', 'action'], defaults=(None, None))
+ZipChanges = namedtuple('ZipChanges', ['new', 'changed', 'removed'])
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class TeeFile:
+    """Write-only file object writing the same bytes to several files
+
+    It can't seek, so ZipFile writes every member with a data descriptor
+    and the archive goes out as one sequential stream. The size and CRC32
+    of that stream are kept as it is written, so the files can be checked
+    against them without reading anything back.
+    """
+
+    def __init__(self, paths):
+        self.files = []
+        self.size = 0
+        self.crc = 0
+        try:
+            for path in paths:
+                self.files.append(open(path, 'wb'))
+        except OSError:
+            self.close()
+            raise
+
+    def write(self, data):
+        for f in self.files:
+            f.write(data)
+        self.size += len(data)
+        self.crc = zlib.crc32(data, self.crc)
+        return len(data)
+
+    def tell(self):
+        return self.size
+
+    def seekable(self):
+        return False
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        raise io.UnsupportedOperation("TeeFile can't seek")
+
+    def flush(self):
+        for f in self.files:
+            f.flush()
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def add_members(zip_file, file_paths, policy=None):
+    """Write files into an open ZipFile under their base names, returns the uncompressed bytes"""
+    policy = policy or CompressionPolicy()
+    bytes_in = 0
+    for file_path in file_paths:
+        name = os.path.basename(file_path)
+        compress_type, compress_level = policy.zip_args(name)
+        zip_file.write(file_path, arcname=name, compress_type=compress_type, compresslevel=compress_level)
+        bytes_in += zip_file.getinfo(name).file_size
+    return bytes_in
+
+
+def write_archive(paths, file_paths, pool=None, policy=None):
+    """Zip files under their base names to every path in one pass, returns (bytes in, bytes out, CRC32)
+
+    Each file is checked to have the size of the written stream. With a
+    process pool the members are compressed in parallel by a ParallelZipWriter.
+    """
+    with TeeFile(paths) as target:
+        if pool is not None:
+            bytes_in = ParallelZipWriter(pool, policy).write(target, file_paths)
+        else:
+            with ZipFile(target, 'w') as zip_file:
+                bytes_in = add_members(zip_file, file_paths, policy)
+    for path in paths:
+        check_size(path, target.size)
+    return bytes_in, target.size, target.crc
+
+
+def write_zip(zip_path, file_paths, copy_path=None, pool=None, policy=None):
+    """Zip files under their base names, written to copy_path in the same pass, returns (bytes in, bytes out)"""
+    bytes_in, bytes_out, _ = write_archive([zip_path, copy_path] if copy_path else [zip_path],
+                                           file_paths, pool, policy)
+    return bytes_in, bytes_out
+
+
+def check_size(path, size):
+    """Raise OSError if a file doesn't have the size that was written to it"""
+    file_size = os.path.getsize(path)
+    if file_size != size:
+        raise OSError(f"{path} is {file_size} bytes, {size} were written")
+
+
+def copy_checked(source_path, copy_path, crc=None):
+    """Copy a file, checking the copy's size and (if given) the CRC32 of the bytes copied"""
+    copied_crc = 0
+    size = 0
+    with open(source_path, 'rb') as source, open(copy_path, 'wb') as copy:
+        for chunk in iter(lambda: source.read(COPY_CHUNK_SIZE), b''):
+            copy.write(chunk)
+            copied_crc = zlib.crc32(chunk, copied_crc)
+            size += len(chunk)
+    check_size(copy_path, size)
+    if crc is not None and copied_crc != crc:
+        raise OSError(f"CRC of {copy_path} doesn't match the archive written")
+
+
+def on_same_volume(path, other_path):
+    try:
+        return os.stat(os.path.dirname(path)).st_dev == os.stat(os.path.dirname(other_path)).st_dev
+    except OSError:
+        return False
+
+
+def write_zip_with_copy(zip_path, file_paths, copy_path, pool=None, policy=None):
+    """Write an archive and its copy with a single write of the data, returns (bytes in, bytes out, method)
+
+    On one volume the copy is a hardlink to the archive, otherwise both are
+    written from the same compressed stream and checked against its size.
+    Where the share has no hardlinks the archive is copied, checked against
+    the CRC of the stream. A linked copy is the same file as the archive, so
+    update_zip never appends to a linked archive, it rewrites it instead.
+    """
+    if on_same_volume(zip_path, copy_path):
+        bytes_in, bytes_out, crc = write_archive([zip_path], file_paths, pool, policy)
+        if os.path.lexists(copy_path):
+            os.remove(copy_path)
+        try:
+            os.link(zip_path, copy_path)
+            method = 'link'
+        except OSError:
+            # Share without hardlink support
+            copy_checked(zip_path, copy_path, crc)
+            method = 'copy'
+    else:
+        bytes_in, bytes_out, _ = write_archive([zip_path, copy_path], file_paths, pool, policy)
+        method = 'tee'
+    return bytes_in, bytes_out, method
+
+
+def refresh_copy(zip_path, copy_path):
+    """Bring the copy of an archive up to date, returns the method used (None if it already was)"""
+    if os.path.exists(copy_path) and os.path.samefile(zip_path, copy_path):
+        return None  # hardlink, updated along with the archive
+    if os.path.lexists(copy_path):
+        os.remove(copy_path)
+    if on_same_volume(zip_path, copy_path):
+        try:
+            os.link(zip_path, copy_path)
+            return 'link'
+        except OSError:
+            pass
+    copy_checked(zip_path, copy_path)
+    return 'copy'
+
+
+def is_linked(path):
+    """True if the file has other hardlinks, e.g. a zip dump copy"""
+    return os.stat(path).st_nlink > 1
+
+
+def zip_date_time(mtime):
+    """The date_time a file with this mtime gets in a zip (DOS time, 2 second resolution)"""
+    date_time = time.localtime(mtime)[0:6]
+    return date_time[0:5] + (date_time[5] - date_time[5] % 2,)
+
+
+def get_zip_changes(zip_path, file_paths):
+    """Compare files with the archive's central directory by name, size and mtime, returns ZipChanges"""
+    with ZipFile(zip_path, 'r') as zip_file:
+        members = {info.filename: info for info in zip_file.infolist()}
+    new, changed = [], []
+    names = set()
+    for file_path in file_paths:
+        name = os.path.basename(file_path)
+        names.add(name)
+        info = members.get(name)
+        if info is None:
+            new.append(file_path)
+            continue
+        stat = os.stat(file_path)
+        if info.file_size != stat.st_size or info.date_time != zip_date_time(stat.st_mtime):
+            changed.append(file_path)
+    removed = [name for name in members if name not in names]
+    return ZipChanges(new, changed, removed)
+
+
+def append_members(zip_path, file_paths, policy=None):
+    """Append files to an archive, returns the uncompressed bytes
+
+    The new members overwrite the central directory, which is written again
+    after them. On failure the saved directory is put back at its offset and
+    the file cut to its original end, so the archive is left as it was.
+    """
+    with ZipFile(zip_path, 'r') as zip_file:
+        directory_offset = zip_file.start_dir
+    with open(zip_path, 'rb') as f:
+        f.seek(directory_offset)
+        directory = f.read()  # central directory and end records
+    try:
+        with ZipFile(zip_path, 'a') as zip_file:
+            return add_members(zip_file, file_paths, policy)
+    except BaseException:
+        with open(zip_path, 'r+b') as f:
+            f.seek(directory_offset)
+            f.write(directory)
+            f.truncate()
+        raise
+
+
+def rewrite_zip(zip_path, file_paths, copy_path=None, pool=None, policy=None):
+    """Write an archive (and its copy) next to the existing one, then swap it in, returns (bytes in, bytes out, method)
+
+    Until the swap the existing archive and copy stay untouched, a failure
+    only removes the temporary files.
+    """
+    temp_path = zip_path + '.tmp'
+    temp_copy_path = copy_path + '.tmp' if copy_path else None
+    try:
+        if copy_path:
+            bytes_in, bytes_out, method = write_zip_with_copy(temp_path, file_paths, temp_copy_path, pool, policy)
+        else:
+            bytes_in, bytes_out = write_zip(temp_path, file_paths, pool=pool, policy=policy)
+            method = None
+        os.replace(temp_path, zip_path)
+        if copy_path:
+            os.replace(temp_copy_path, copy_path)
+    except BaseException:
+        _remove_quietly(temp_path)
+        if temp_copy_path:
+            _remove_quietly(temp_copy_path)
+        raise
+    return bytes_in, bytes_out, method
+
+
+def update_zip(zip_path, file_paths, copy_path=None, pool=None, policy=None):
+    """Bring an existing archive up to date with its folder, returns (bytes in, bytes out, copy method, action)
+
+    New files are appended to the archive. A changed or removed file means
+    the archive is rewritten, as appending a changed file would leave two
+    members with the same name. A failed update leaves the archive as it
+    was. The copy is only refreshed when the archive changed, an unchanged
+    order doesn't go back to the zip dump.
+    """
+    changes = get_zip_changes(zip_path, file_paths)
+    # Appending to a linked archive would also change a copy that was already handed off
+    if changes.changed or changes.removed or (changes.new and is_linked(zip_path)):
+        bytes_in, bytes_out, method = rewrite_zip(zip_path, file_paths, copy_path, pool, policy)
+        return bytes_in, bytes_out, method, 'rewritten'
+    if not changes.new:
+        return 0, os.path.getsize(zip_path), None, 'unchanged'
+
+    bytes_in = append_members(zip_path, changes.new, policy)
+    method = refresh_copy(zip_path, copy_path) if copy_path else None
+    return bytes_in, os.path.getsize(zip_path), method, 'appended'
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def run_zip_job(job, pool=None, policy=None):
+    """Write one archive (and its copy)
+
+    A failed new archive is removed so the folder isn't seen as zipped. A
+    failed update never removes the existing archive, only a copy the job
+    itself created. With a process pool the archive's members are
+    compressed in parallel.
+    """
+    start = time.perf_counter()
+    method = None
+    action = 'created'
+    created_paths = [job.zip_path, job.copy_path]
+    if job.update:
+        created_paths = [job.copy_path] if job.copy_path and not os.path.lexists(job.copy_path) else []
+    try:
+        if job.update:
+            bytes_in, bytes_out, method, action = update_zip(job.zip_path, job.files, job.copy_path, pool, policy)
+        elif job.copy_path:
+            bytes_in, bytes_out, method = write_zip_with_copy(job.zip_path, job.files, job.copy_path, pool, policy)
+        else:
+            bytes_in, bytes_out = write_zip(job.zip_path, job.files, pool=pool, policy=policy)
+    except Exception as e:
+        for path in created_paths:
+            if path:
+                _remove_quietly(path)
+        return ZipResult(job, False, time.perf_counter() - start, 0, 0, str(e), None, action)
+    return ZipResult(job, True, time.perf_counter() - start, bytes_in, bytes_out, None, method, action)
+
+
+class ZipReport:
+    """Outcome of a batch of archives"""
+
+    def __init__(self, results, seconds):
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def zipped(self):
+        return [result for result in self.results if result.success]
+
+    @property
+    def failed(self):
+        return [result for result in self.results if not result.success]
+
+    @property
+    def bytes_in(self):
+        return sum(result.bytes_in for result in self.results)
+
+    @property
+    def bytes_out(self):
+        return sum(result.bytes_out for result in self.results)
+
+    def summary(self):
+        megabytes_in = self.bytes_in / (1024 * 1024)
+        megabytes_out = self.bytes_out / (1024 * 1024)
+        return (f"Zipped {len(self.zipped)}/{len(self.results)} archives "
+                f"({megabytes_in:.1f} MB -> {megabytes_out:.1f} MB) in {self.seconds:.2f}s")
+
+
+class ZipEngine:
+    """Writes independent archives in a pool of worker processes
+
+    Deflate holds the GIL, so archives are spread over processes rather than
+    threads. Every archive is written by one worker, with the same layout as
+    FileSystemDAO.zip_file_list, together with its zip dump copy when the job
+    has one. With fewer archives than workers (typically one big plate) the
+    archives are written one at a time instead, their members compressed in
+    parallel. With one worker everything runs in this process.
+    """
+
+    def __init__(self, max_workers=4, logger=None, policy=None):
+        self.max_workers = max_workers
+        self.logger = logger or print
+        self.policy = policy
+
+    def run(self, jobs):
+        """Write every job's archive, returns a ZipReport with results in completion order"""
+        jobs = list(jobs)
+        start = time.perf_counter()
+        results = []
+        if self.max_workers <= 1 or not jobs:
+            for job in jobs:
+                results.append(self._log(run_zip_job(job, policy=self.policy)))
+        elif len(jobs) < self.max_workers:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                for job in jobs:
+                    results.append(self._log(run_zip_job(job, pool, self.policy)))
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+                futures = {pool.submit(run_zip_job, job, None, self.policy): job for job in jobs}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Worker process died
+                        result = ZipResult(futures[future], False, 0.0, 0, 0, str(e))
+                    results.append(self._log(result))
+        report = ZipReport(results, time.perf_counter() - start)
+        if jobs:
+            self.logger(report.summary())
+        return report
+
+    def _log(self, result):
+        name = os.path.basename(result.job.zip_path)
+        if result.success and result.action == 'unchanged':
+            self.logger(f"{name} is up to date")
+        elif result.success:
+            copy = f", copy by {result.copy_method}" if result.copy_method else ""
+            self.logger(f"Zipped {name} ({result.action}): {len(result.job.files)} files, "
+                        f"{result.bytes_in} -> {result.bytes_out} bytes in {result.seconds:.2f}s{copy}")
+        else:
+            self.logger(f"Failed to zip {name}: {result.error}")
+        return result
@@ -0,0 +1,104 @@
+# zip_validator.py
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from zipfile import BadZipFile, ZipFile
+
+# names are the archive's member names, bad_member the first member failing its CRC check (deep mode)
+ZipListing = namedtuple('ZipListing', ['zip_path', 'names', 'mtime', 'error', 'bad_member'])
+# One validated order, result is the dict of FolderProcessor.validate_zip_contents (None if the zip is unreadable)
+OrderValidation = namedtuple('OrderValidation', ['order_folder', 'zip_path', 'i_number', 'order_number',
+                                                 'zip_mtime', 'status', 'result', 'error'])
+# An order folder with a zip to validate
+ValidationTask = namedtuple('ValidationTask', ['order_folder', 'zip_path', 'i_number', 'order_number'])
+
+
+def read_zip_listing(zip_path, deep=False):
+    """Read an archive's central directory, and with deep every member's data to check its CRC"""
+    try:
+        mtime = os.path.getmtime(zip_path)
+        with ZipFile(zip_path, 'r') as zip_file:
+            names = zip_file.namelist()
+            bad_member = zip_file.testzip() if deep else None
+    except (OSError, BadZipFile) as e:
+        return ZipListing(zip_path, [], None, str(e), None)
+    return ZipListing(zip_path, names, mtime, None, bad_member)
+
+
+class ZipValidator:
+    """Validates order zips against the order key, reading the archives in a thread pool
+
+    Opening a zip only reads its central directory (the member list at the
+    end of the file), so validation is bound by the latency of the share.
+    The archives are listed in parallel threads, then matched against the
+    order key in this thread. iter_validate hands out the orders chunk by
+    chunk, for reports written while validation runs. Deep mode
+    also reads every member to check its CRC, which reads the whole archive.
+    """
+    COMPLETED = 'Completed'
+    ATTENTION = 'ATTENTION'
+
+    def __init__(self, processor, max_workers=16, deep=False, logger=None):
+        self.processor = processor
+        self.config = processor.config
+        self.max_workers = max_workers
+        self.deep = deep
+        self.logger = logger or print
+
+    def validate(self, tasks, order_key=None):
+        """Validate the zips of ValidationTasks, returns OrderValidations in the same order"""
+        return list(self.iter_validate(tasks, order_key))
+
+    def iter_validate(self, tasks, order_key=None):
+        """Validate the zips of ValidationTasks, yielding OrderValidations in order as the zips are read
+
+        The listings are matched in chunks of max_workers orders through
+        FolderProcessor.validate_zip_batch, so a report gets rows while the
+        later zips are still being read.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as pool:
+            listings = pool.map(lambda task: read_zip_listing(task.zip_path, self.deep), tasks)
+            chunk = []
+            for task, listing in zip(tasks, listings):
+                chunk.append((task, listing))
+                if len(chunk) >= self.max_workers:
+                    yield from self._validate_chunk(chunk, order_key)
+                    chunk = []
+            yield from self._validate_chunk(chunk, order_key)
+        self.logger(f"Validated {len(tasks)} zips in {time.perf_counter() - start:.2f}s"
+                    + (" (deep CRC check)" if self.deep else ""))
+
+    def _validate_chunk(self, chunk, order_key):
+        # Match every readable zip of the chunk against the order key in one batch
+        readable = [(task, listing) for task, listing in chunk if not listing.error]
+        results = iter(self.processor.validate_zip_batch(
+            [(task.i_number, task.order_number, listing.names) for task, listing in readable], order_key)
+            if readable else [])
+        return [self._to_validation(task, listing, None if listing.error else next(results))
+                for task, listing in chunk]
+
+    def _to_validation(self, task, listing, result):
+        if listing.error:
+            self.logger(f"Could not read {os.path.basename(task.zip_path)}: {listing.error}")
+            return OrderValidation(*task, None, self.ATTENTION, None, listing.error)
+
+        error = None
+        if listing.bad_member:
+            error = f"bad CRC in {listing.bad_member}"
+            self.logger(f"{os.path.basename(task.zip_path)}: {error}")
+        status = self.get_status(task.order_folder, result) if error is None else self.ATTENTION
+        return OrderValidation(*task, listing.mtime, status, result, error)
+
+    def get_status(self, order_folder, result):
+        """Completed when every order item matched (Andreev's zips have no txt files), as legacy D decides"""
+        if result['match_count'] == 0 or result['expected_count'] != result['match_count']:
+            return self.ATTENTION
+        is_andreev = self.config.ANDREEV_NAME in os.path.basename(order_folder).lower()
+        if not is_andreev and result['txt_count'] != len(self.config.TEXT_FILES):
+            return self.ATTENTION
+        return self.COMPLETED